@@ -1,12 +1,111 @@
-from fastapi import FastAPI, HTTPException, Request
+import time
+
+# Time module imports for the startup report (heavy ML modules load later, during warm-up)
+_IMPORTS_STARTED = time.perf_counter()
+
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import partial
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from app.utils.dream_matcher import match_dream
-from app.utils.data_loader import load_destinations
-from app.utils.recommender import recommend_destinations_ml
+from app.utils.data_loader import StaleWorkerIndex
+from app.utils.dream_matcher import DEFAULT_TOP_K, DreamIndex, match_dream_in_worker
+from app.utils.recommender import (
+    import_ml_modules,
+    fetch_live_destinations,
+    stream_live_destinations,
+    live_search_enabled,
+    recommend_local,
+    recommend_local_in_worker,
+    recommend_batch,
+    recommend_batch_in_worker,
+    rank_rows,
+    rank_rows_in_worker,
+)
+from app.utils.opentripmap_client import get_opentripmap_client
+from app.utils.http_client import close_async_http_client
+from app.utils.circuit_breaker import breaker_states
+from app.utils.executor import (
+    CPU_PROCESSES,
+    ExecutorSaturated,
+    cpu_executor,
+    cpu_local_executor,
+    io_executor,
+    executor_stats,
+    shutdown_executors,
+)
+from app.utils.startup import StartupReport
+from app.utils.catalog import MAX_PAGE_SIZE
+from app.utils.snapshot import SnapshotStore, build_snapshot
+from app.utils.serialization import NDJSON_MEDIA_TYPE, ORJSONResponse, ndjson_line, negotiated_response
+from app.utils.result_cache import canonical_preferences, result_cache_from_env
+from app.utils.metrics import REGISTRY, MetricsMiddleware, stage
+from app.utils.logging_setup import configure_logging, logging_stats
+from typing import Optional
 import os
 
-app = FastAPI()
+configure_logging()
+logger = logging.getLogger(__name__)
+
+STARTUP = StartupReport(started_at=_IMPORTS_STARTED)
+STARTUP.record("imports", time.perf_counter() - _IMPORTS_STARTED)
+
+# Finished /recommend results by canonical preferences; invalidated when the data version changes
+RESULT_CACHE = result_cache_from_env()
+
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+
+# Seconds between data file checks for hot reload (0 disables the watcher; POST /admin/reload still works)
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", "0"))
+
+
+def on_snapshot_published(snapshot):
+    if RESULT_CACHE is not None:
+        RESULT_CACHE.set_version(snapshot.version)
+
+
+# Destinations and every index built from them, swapped atomically on reload.
+# Empty until warm_up(); endpoints return 503 until then.
+SNAPSHOTS = SnapshotStore(partial(build_snapshot, CATALOG_MAX_AGE), on_publish=on_snapshot_published)
+
+# "blocking" finishes warm-up before the server accepts connections;
+# "background" accepts connections immediately and reports readiness via /ready
+WARMUP_MODE = os.getenv("WARMUP_MODE", "blocking").lower()
+
+
+def warm_up():
+    """Load data and build every index, recording each phase in STARTUP."""
+    try:
+        with STARTUP.phase("imports"):
+            import_ml_modules()
+
+        # Fit the indexes once; /recommend only transforms and scores the query
+        SNAPSHOTS.load(report=STARTUP)
+        SNAPSHOTS.watch(DATA_WATCH_INTERVAL)
+        STARTUP.mark_ready()
+    except Exception as e:
+        STARTUP.mark_failed(e)
+        raise
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_MODE == "background":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        await asyncio.to_thread(warm_up)
+    yield
+    SNAPSHOTS.stop()
+    # Release pooled upstream connections and worker pools
+    await close_async_http_client()
+    shutdown_executors()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Allow CORS for frontend communication
 app.add_middleware(
@@ -15,16 +114,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Outermost, so Server-Timing and request latency cover every other middleware
+app.add_middleware(MetricsMiddleware)
+
 
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    # Shed load quickly instead of queueing without bound
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
+
+
+def require_ready():
+    """
+    Return the current data snapshot, or 503 while warming up. Handlers use
+    this one snapshot for the whole request, even if a reload swaps in another.
+    """
+    snapshot = SNAPSHOTS.current
+    if not STARTUP.ready or snapshot is None:
+        raise HTTPException(status_code=503, detail="Service is warming up", headers={"Retry-After": "1"})
+    return snapshot
 
-# Load destinations at startup
-try:
-    DESTINATIONS = load_destinations()
-    print(f"✅ Loaded {len(DESTINATIONS)} destinations.")
-except Exception as e:
-    raise RuntimeError(f"Failed to load destinations: {e}")
 
 # Pydantic model for input validation
 class UserPreferences(BaseModel):
@@ -35,66 +151,409 @@ class UserPreferences(BaseModel):
     season: str = None  # optional
 
 
+class BatchRecommendRequest(BaseModel):
+    queries: list[UserPreferences]
+    top_n: int = 3
+
+
+# Upper bound on profiles per /recommend/batch call
+MAX_BATCH_SIZE = int(os.getenv("RECOMMEND_BATCH_MAX", "1000"))
+
+# Upper bound on matches per /match-dream call
+MAX_DREAM_MATCHES = int(os.getenv("DREAM_MATCH_MAX", "50"))
+
+# Upper bound on results per /nearby call, and how many of the closest destinations
+# are ranked when a /nearby query also carries preferences
+MAX_NEARBY_RESULTS = int(os.getenv("NEARBY_MAX_RESULTS", "100"))
+NEARBY_RANK_POOL = int(os.getenv("NEARBY_RANK_POOL", "5000"))
+
+
+async def score_on_cpu(snapshot, index, fn, worker_fn, *args):
+    """
+    Run ``fn(index, *args)`` on the CPU pool. With process workers,
+    ``worker_fn`` scores the worker's own copy of the snapshot's data; if that
+    copy is a different generation (the files changed and this process has not
+    reloaded yet), score in-process instead and start a reload.
+    """
+    if not CPU_PROCESSES:
+        return await cpu_executor.run(fn, index, *args)
+    try:
+        return await cpu_executor.run(worker_fn, snapshot.source, index.version, *args)
+    except StaleWorkerIndex as e:
+        logger.warning("⚠️  Scoring in-process, %s; reloading", e)
+        SNAPSHOTS.reload_in_background()
+        return await cpu_local_executor.run(fn, index, *args)
+
+
+async def score_locally(snapshot, fn, worker_fn, *args):
+    """Run recommender index scoring on the CPU pool."""
+    return await score_on_cpu(snapshot, snapshot.index, fn, worker_fn, *args)
+
+
+@app.get("/ready")
+def readiness():
+    """Readiness probe: 200 once data is loaded and indexes are built, 503 before."""
+    report = STARTUP.as_dict()
+    if SNAPSHOTS.current is not None:
+        report["data_version"] = SNAPSHOTS.current.version
+    return JSONResponse(status_code=200 if STARTUP.ready else 503, content=report)
+
+
 @app.get("/")
-def read_root():
-    return {
-        "success": "success",
-        "destinations": DESTINATIONS
-    }
+def read_root(request: Request, offset: int = 0, limit: Optional[int] = None, fields: Optional[str] = None):
+    """
+    Destination catalog, served from pre-serialized (and pre-compressed)
+    bytes. Supports If-None-Match, ?offset=&limit= and ?fields=a,b,c.
+    """
+    catalog = require_ready().catalog
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must be non-negative")
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    try:
+        names = catalog.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return catalog.response(request, catalog.render(offset, limit, names))
+
+
+async def cached_recommendations(snapshot, preferences):
+    """Look up a canonical preference set for ``snapshot``'s data, going to the shared tier off the event loop."""
+    if RESULT_CACHE is None:
+        return None
+    if RESULT_CACHE.shared is not None:
+        return await io_executor.run(RESULT_CACHE.get, preferences, snapshot.version)
+    return RESULT_CACHE.get(preferences, snapshot.version)
+
+
+async def cache_recommendations(snapshot, preferences, recommendations, fallback=False):
+    """
+    Store a result computed from ``snapshot`` (dropped if a reload has since
+    replaced it); ``fallback`` (local results standing in for live ones) uses the short TTL.
+    """
+    if RESULT_CACHE is None:
+        return
+    ttl = RESULT_CACHE.fallback_ttl if fallback else None
+    if RESULT_CACHE.shared is not None:
+        await io_executor.run(RESULT_CACHE.set, preferences, recommendations, ttl, snapshot.version)
+    else:
+        RESULT_CACHE.set(preferences, recommendations, ttl, snapshot.version)
 
 
 @app.post("/recommend")
-async def get_recommendations(preferences: UserPreferences):
-    print(preferences)
+async def get_recommendations(request: Request, preferences: UserPreferences):
+    snapshot = require_ready()
+    logger.debug("Recommendation request", extra={"preferences": preferences})
+    # Equivalent preference sets (case, order, duplicates) share one cached result
+    prefs = canonical_preferences(
+        preferences.budget, preferences.weather, preferences.activities,
+        preferences.group_type, preferences.season
+    )
+    try:
+        with stage("recommend", "cache_lookup"):
+            recommendations = await cached_recommendations(snapshot, prefs)
+        if recommendations is None:
+            recommendations = await fetch_live_destinations(
+                budget=prefs.budget,
+                weather=list(prefs.weather),
+                activities=list(prefs.activities)
+            )
+            fallback = False
+            if not recommendations:
+                logger.debug("📁 Using local destinations.json file")
+                recommendations = await score_locally(
+                    snapshot, recommend_local, recommend_local_in_worker,
+                    prefs.budget, list(prefs.weather), list(prefs.activities),
+                    prefs.group_type, prefs.season
+                )
+                # Providers are configured but failed or came back empty: don't pin
+                # the local answer for the full TTL, so live results return soon
+                fallback = live_search_enabled()
+            await cache_recommendations(snapshot, prefs, recommendations, fallback)
+        with stage("recommend", "serialize"):
+            return negotiated_response(request, {
+                "status": "success",
+                "recommendations": recommendations
+            })
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@app.post("/recommend/stream")
+async def stream_recommendations(preferences: UserPreferences):
+    """
+    NDJSON stream: local-index results first (ready in milliseconds), then
+    each live provider place as soon as it arrives, then a final
+    "done" line. Time to first result does not depend on upstream latency.
+    """
+    snapshot = require_ready()
+    logger.debug("Streaming recommendation request", extra={"preferences": preferences})
+    prefs = canonical_preferences(
+        preferences.budget, preferences.weather, preferences.activities,
+        preferences.group_type, preferences.season
+    )
+    # Scored before the response starts, so saturation and errors still get a proper status code
     try:
-        recommendations = recommend_destinations_ml(
-            destinations=DESTINATIONS,
-            budget=preferences.budget,
-            weather=preferences.weather,
-            activities=preferences.activities,
-            group_type=preferences.group_type,
-            season=preferences.season
+        local = await score_locally(
+            snapshot, recommend_local, recommend_local_in_worker,
+            prefs.budget, list(prefs.weather), list(prefs.activities),
+            prefs.group_type, prefs.season
         )
-        return {
-            "status": "success",
-            "recommendations": recommendations
-        }
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+    async def events():
+        yield ndjson_line({"type": "local", "recommendations": local})
+        live = 0
+        try:
+            with stage("recommend_stream", "live"):
+                async for destination in stream_live_destinations(
+                    budget=prefs.budget,
+                    weather=list(prefs.weather),
+                    activities=list(prefs.activities)
+                ):
+                    live += 1
+                    yield ndjson_line({"type": "live", "destination": destination})
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band
+            logger.warning("⚠️  Live results stream failed: %s", e)
+            yield ndjson_line({"type": "error", "detail": str(e)})
+        yield ndjson_line({"type": "done", "live": live})
+
+    # X-Accel-Buffering stops nginx-style proxies from holding lines back
+    return StreamingResponse(events(), media_type=NDJSON_MEDIA_TYPE,
+                             headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"})
+
+
+@app.post("/recommend/batch")
+async def get_batch_recommendations(request: Request, batch: BatchRecommendRequest):
+    """
+    Score many preference profiles in one pass against the local index.
+    All queries are vectorized together and scored with one matrix product.
+    """
+    snapshot = require_ready()
+    if len(batch.queries) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} queries)")
+    if batch.top_n < 1:
+        raise HTTPException(status_code=400, detail="top_n must be at least 1")
+
+    try:
+        queries = [(p.budget, p.weather, p.activities, p.group_type, p.season) for p in batch.queries]
+        results = await score_locally(snapshot, recommend_batch, recommend_batch_in_worker, queries, batch.top_n)
+        with stage("batch", "serialize"):
+            return negotiated_response(request, {
+                "status": "success",
+                "results": [{"recommendations": recommendations} for recommendations in results]
+            })
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+def check_point(lat: float, lon: float):
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        raise HTTPException(status_code=400, detail="lat must be within [-90, 90] and lon within [-180, 180]")
+
+
+def check_nearby_limit(k: int):
+    if not 1 <= k <= MAX_NEARBY_RESULTS:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {MAX_NEARBY_RESULTS}")
+
+
+async def nearby_results(snapshot, rows, distances, k, budget, weather, activities, group_type, season):
+    """
+    Destinations for spatial hits, each with its ``distance_km``: nearest
+    first, or ranked by preference score when any preference is given.
+    """
+    distance_of = dict(zip(rows.tolist(), distances.tolist()))
+    if budget or weather or activities or group_type or season:
+        rows = await score_locally(
+            snapshot, rank_rows, rank_rows_in_worker,
+            rows, budget or "", weather, activities, group_type, season, k
+        )
+    destinations = snapshot.destinations
+    return [
+        {**destinations.row_dict(row), "distance_km": round(distance_of[row], 3)}
+        for row in rows[:k].tolist()
+    ]
+
+
+@app.get("/nearby")
+async def nearby(request: Request, lat: float, lon: float, radius_km: float = 50.0, k: int = 10,
+                 budget: Optional[str] = None, weather: list[str] = Query(default=[]),
+                 activities: list[str] = Query(default=[]), group_type: Optional[str] = None,
+                 season: Optional[str] = None):
+    """
+    Up to ``k`` destinations within ``radius_km`` of (lat, lon), nearest first.
+    With any preference (budget, weather, activities, group_type, season) the
+    closest NEARBY_RANK_POOL destinations in range are ranked by preference instead.
+    """
+    snapshot = require_ready()
+    check_point(lat, lon)
+    check_nearby_limit(k)
+    if radius_km <= 0:
+        raise HTTPException(status_code=400, detail="radius_km must be positive")
+
+    ranked = bool(budget or weather or activities or group_type or season)
+    try:
+        with stage("nearby", "spatial"):
+            rows, distances = snapshot.spatial.nearest(lat, lon, max(k, NEARBY_RANK_POOL) if ranked else k, radius_km)
+        results = await nearby_results(snapshot, rows, distances, k, budget, weather, activities, group_type, season)
+        with stage("nearby", "serialize"):
+            return negotiated_response(request, {"status": "success", "destinations": results})
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@app.get("/nearby/bbox")
+async def nearby_bbox(request: Request, lat_min: float, lon_min: float, lat_max: float, lon_max: float,
+                      k: int = 10, budget: Optional[str] = None, weather: list[str] = Query(default=[]),
+                      activities: list[str] = Query(default=[]), group_type: Optional[str] = None,
+                      season: Optional[str] = None):
+    """
+    Up to ``k`` destinations inside a bounding box, nearest to its centre
+    first (or ranked by preference, as for /nearby). A box with
+    ``lon_min > lon_max`` crosses the antimeridian.
+    """
+    snapshot = require_ready()
+    check_point(lat_min, lon_min)
+    check_point(lat_max, lon_max)
+    check_nearby_limit(k)
+    if lat_min > lat_max:
+        raise HTTPException(status_code=400, detail="lat_min must not exceed lat_max")
+
+    ranked = bool(budget or weather or activities or group_type or season)
+    try:
+        with stage("nearby", "spatial"):
+            rows, distances = snapshot.spatial.in_bbox(lat_min, lon_min, lat_max, lon_max,
+                                                       max(k, NEARBY_RANK_POOL) if ranked else k)
+        results = await nearby_results(snapshot, rows, distances, k, budget, weather, activities, group_type, season)
+        with stage("nearby", "serialize"):
+            return negotiated_response(request, {"status": "success", "destinations": results})
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
 @app.post("/match-dream")
 async def match_dream_endpoint(request: Request):
+    snapshot = require_ready()
+    dream_index = snapshot.dream_index
     data = await request.json()
-    print("Received data:", data)
+    logger.debug("Dream match request", extra={"payload": data})
     if not data or 'dream' not in data:
         raise HTTPException(status_code=400, detail='No dream input provided')
 
     dream_input = data['dream']
+    k = data.get('k', DEFAULT_TOP_K)
+    if not isinstance(k, int) or not 1 <= k <= MAX_DREAM_MATCHES:
+        raise HTTPException(status_code=400, detail=f'k must be an integer between 1 and {MAX_DREAM_MATCHES}')
 
     try:
-        # Call the match_dream function to get matches
-        matches = match_dream(dream_input)  # Should return a list of matched destinations
-
-        # Transform matches into the desired format
-        formatted_matches = [
-            {
-                "id": str(destination.get("id", "")),
-                "name": destination.get("name", ""),
-                "country": destination.get("country", ""),
-                "description": destination.get("description", ""),
-                "image": destination.get("image", ""),
-                "cost": destination.get("avg_budget", ""),
-                "weather": " ".join(destination.get("weather", [])),
-                "activities": destination.get("activities", []),
-                "bestFor": " ".join(destination.get("travel_with", [])),
-                "rating": destination.get("rating", 0),
-                "facts": destination.get("facts", []),
-                "tags": destination.get("tags", []),
-            }
-            for destination in matches
-        ]
-
-        return {"matches": formatted_matches}
+        # Matches come back already in the response shape
+        matches = await score_on_cpu(snapshot, dream_index, DreamIndex.match, match_dream_in_worker, dream_input, k, True)
+
+        with stage("dream", "serialize"):
+            return negotiated_response(request, {"matches": matches})
+    except ExecutorSaturated:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Something went wrong: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Something went wrong: {str(e)}")
+
+
+@app.get("/admin/cache")
+def cache_stats():
+    """Upstream response and result cache counters, for tuning TTLs and capacity."""
+    cache = get_opentripmap_client().cache
+    return {
+        "opentripmap": cache.stats() if cache else None,
+        "recommendations": RESULT_CACHE.stats() if RESULT_CACHE else None,
+    }
+
+
+@app.get("/admin/providers")
+def provider_health():
+    """Circuit breaker state for each upstream provider."""
+    return {"providers": breaker_states()}
+
+
+@app.get("/admin/executors")
+def executor_health():
+    """Queue depth, wait time and rejection counts for the worker pools."""
+    return {"executors": executor_stats()}
+
+
+@app.get("/admin/data")
+def data_status():
+    """Loaded data version and hot-reload status."""
+    return SNAPSHOTS.status()
+
+
+@app.post("/admin/reload")
+def reload_data():
+    """
+    Rebuild data and indexes in the background and swap them in atomically.
+    In-flight requests finish on the snapshot they started with.
+    """
+    require_ready()
+    started = SNAPSHOTS.reload_in_background()
+    return JSONResponse(
+        status_code=202 if started else 409,
+        content={"status": "reloading" if started else "reload already in progress", **SNAPSHOTS.status()},
+    )
+
+
+def collect_service_metrics():
+    """Scrape-time gauges and counters from startup, data, caches, pools and breakers."""
+    yield ("ready", "gauge", "1 once warm-up has finished", [({}, int(STARTUP.ready))])
+    yield ("startup_phase_seconds", "gauge", "Duration of each warm-up phase",
+           [({"phase": name}, seconds) for name, seconds in STARTUP.phases.items()])
+
+    data = SNAPSHOTS.status()
+    yield ("destinations", "gauge", "Destinations in the loaded snapshot", [({}, data["destinations"])])
+    yield ("data_reloads_total", "counter", "Completed data reloads", [({}, data["reloads"])])
+    yield ("data_last_reload_seconds", "gauge", "Duration of the last data reload",
+           [({}, data["last_reload_ms"] / 1000 if data["last_reload_ms"] is not None else None)])
+
+    caches = {"opentripmap": get_opentripmap_client().cache, "recommendations": RESULT_CACHE}
+    cache_stats = {name: cache.stats() for name, cache in caches.items() if cache is not None}
+    for key, metric_type in (("hits", "counter"), ("misses", "counter"), ("entries", "gauge")):
+        yield (f"cache_{key}" + ("_total" if metric_type == "counter" else ""), metric_type, f"Cache {key}",
+               [({"cache": name}, stats.get(key)) for name, stats in cache_stats.items()])
+    if "recommendations" in cache_stats:
+        yield ("cache_memory_bytes", "gauge", "Approximate memory held by cached results",
+               [({"cache": "recommendations"}, cache_stats["recommendations"]["memory_bytes"])])
+
+    executors = executor_stats()
+    for key, metric_type, help in (("pending", "gauge", "Tasks queued or running"),
+                                   ("workers", "gauge", "Worker threads or processes"),
+                                   ("rejected", "counter", "Tasks rejected because the queue was full")):
+        yield (f"executor_{key}" + ("_total" if metric_type == "counter" else ""), metric_type, help,
+               [({"executor": name}, stats.get(key)) for name, stats in executors.items()])
+
+    logs = logging_stats()
+    yield ("log_records_dropped_total", "counter", "Log records dropped because the log queue was full",
+           [({}, logs["dropped"])])
+    yield ("log_records_sampled_out_total", "counter", "Repeated log records skipped by sampling",
+           [({}, logs["sampled_out"])])
+
+    yield ("circuit_open", "gauge", "1 while a provider's circuit breaker is open",
+           [({"provider": name}, int(state["state"] == "open")) for name, state in breaker_states().items()])
+
+
+REGISTRY.register_collector(collect_service_metrics)
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of request, stage, upstream and service metrics."""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -3,14 +3,24 @@ Amadeus Travel API Client
 Fetches real destination data from Amadeus API
 """
 
+import logging
 import os
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 import requests
 
+from app.utils.http_client import get_async_http_client
+from app.utils.circuit_breaker import get_breaker
+from app.utils.response_cache import ResponseCache, CACHE_DIR
+from app.utils.token_manager import TokenManager, FileTokenStore
+from app.utils.metrics import track_upstream
+from app.utils.places import stable_place_id
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class AmadeusClient:
     """Client for Amadeus Travel API"""
     
@@ -19,19 +29,45 @@ class AmadeusClient:
         self.api_secret = os.getenv('AMADEUS_API_SECRET')
         self.environment = os.getenv('AMADEUS_ENVIRONMENT', 'test')
         
-        # Set base URL based on environment
+        # Set base URL based on environment (AMADEUS_BASE_URL overrides, e.g. for a local stand-in)
         if self.environment == 'production':
             self.base_url = 'https://api.amadeus.com'
         else:
             self.base_url = 'https://test.api.amadeus.com'
+        self.base_url = os.getenv('AMADEUS_BASE_URL', self.base_url).rstrip('/')
         
-        self.access_token = None
+        self.breaker = get_breaker('amadeus')
+        # Same limit as the async pool; the token request runs under the cross-worker token lock
+        self.timeout = float(os.getenv('HTTP_TIMEOUT', 10))
         
+        # Expiry-aware token shared across workers through a local file
+        store_path = os.getenv('AMADEUS_TOKEN_STORE', os.path.join(CACHE_DIR, 'amadeus_token.json'))
+        self.tokens = TokenManager(
+            self._fetch_token,
+            store=FileTokenStore(store_path) if store_path else None,
+            refresh_margin=float(os.getenv('AMADEUS_TOKEN_REFRESH_MARGIN', 120)),
+            name='Amadeus access token'
+        )
+        
+    def _is_configured(self) -> bool:
+        return bool(self.api_key and self.api_secret)
+    
     def _get_access_token(self) -> str:
         """Get OAuth2 access token"""
-        if self.access_token:
-            return self.access_token
-            
+        if not self._is_configured():
+            return None
+        return self.tokens.get_token()
+    
+    def _fetch_token(self):
+        """Request a new token; returns (access_token, expires_in)"""
+        url, headers, data = self._token_request()
+        # No breaker key: a failed token POST must not be negatively cached and
+        # block every refresh; it still counts towards opening the circuit
+        token_data = self.breaker.call(None, self._request_token, url, headers, data)
+        return token_data['access_token'], token_data.get('expires_in', 1799)
+    
+    def _token_request(self):
+        """Build the OAuth2 client-credentials token request"""
         url = f'{self.base_url}/v1/security/oauth2/token'
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
         data = {
@@ -39,15 +75,7 @@ class AmadeusClient:
             'client_id': self.api_key,
             'client_secret': self.api_secret
         }
-        
-        try:
-            response = requests.post(url, headers=headers, data=data)
-            response.raise_for_status()
-            self.access_token = response.json()['access_token']
-            return self.access_token
-        except Exception as e:
-            print(f"Error getting access token: {e}")
-            return None
+        return url, headers, data
     
     def search_destinations(self, 
                           budget: str = None,
@@ -69,6 +97,45 @@ class AmadeusClient:
             # Return fallback data if API is not configured
             return self._get_fallback_destinations()
         
+        try:
+            data = self._search(token, budget, limit)
+            if data is None:
+                # Token revoked or expired early: drop it and retry once with a new one
+                self.tokens.invalidate(token)
+                token = self._get_access_token()
+                data = self._search(token, budget, limit) if token else None
+            if data is None:
+                logger.warning("Amadeus rejected a freshly fetched access token")
+                return self._get_fallback_destinations()
+            
+            # Transform API response to our format
+            return self._transform_api_response(data.get('data', []))
+        except Exception as e:
+            logger.warning("Error fetching destinations: %s", e)
+            return self._get_fallback_destinations()
+    
+    def _request_token(self, url: str, headers: Dict, data: Dict):
+        with track_upstream('amadeus', 'token') as call:
+            call.response = response = requests.post(url, headers=headers, data=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def _search(self, token: str, budget: str, limit: int) -> Optional[Dict]:
+        """Run the activities search; None if the token was rejected"""
+        url, headers, params = self._search_request(token, budget, limit)
+        return self.breaker.call(ResponseCache.make_key(url, params), self._request_json, url, headers, params)
+
+    def _request_json(self, url: str, headers: Dict, params: Dict):
+        with track_upstream('amadeus', 'activities') as call:
+            call.response = response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+        if response.status_code == 401:
+            # A rejected token is ours to fix, not an upstream failure
+            return None
+        response.raise_for_status()
+        return response.json()
+    
+    def _search_request(self, token: str, budget: str, limit: int):
+        """Build the activities search URL, headers and params"""
         # Use Amadeus Points of Interest API
         url = f'{self.base_url}/v1/shopping/activities'
         headers = {'Authorization': f'Bearer {token}'}
@@ -82,17 +149,7 @@ class AmadeusClient:
             'radius': 50,
             'limit': limit
         }
-        
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Transform API response to our format
-            return self._transform_api_response(data.get('data', []))
-        except Exception as e:
-            print(f"Error fetching destinations: {e}")
-            return self._get_fallback_destinations()
+        return url, headers, params
     
     def _map_budget_to_price(self, budget: str) -> str:
         """Map budget level to price range"""
@@ -108,10 +165,11 @@ class AmadeusClient:
         destinations = []
         
         for item in api_data:
+            geo_code = item.get('geoCode', {})
             destination = {
-                'id': item.get('id', ''),
+                'id': stable_place_id('amadeus', item.get('id') or item.get('name', 'Unknown')),
                 'name': item.get('name', 'Unknown'),
-                'country': item.get('geoCode', {}).get('country', 'Unknown'),
+                'country': geo_code.get('country', 'Unknown'),
                 'description': item.get('shortDescription', ''),
                 'avg_budget': self._format_price(item.get('price', {})),
                 'weather': ['Varies'],
@@ -119,8 +177,10 @@ class AmadeusClient:
                 'travel_with': ['Everyone'],
                 'best_season': ['Year-round'],
                 'image': item.get('pictures', [''])[0] if item.get('pictures') else '',
-                'googlemap_link': f"https://maps.google.com/?q={item.get('geoCode', {}).get('latitude', 0)},{item.get('geoCode', {}).get('longitude', 0)}",
-                'tags': [item.get('type', '').lower()]
+                'googlemap_link': f"https://maps.google.com/?q={geo_code.get('latitude', 0)},{geo_code.get('longitude', 0)}",
+                'tags': [item.get('type', '').lower()],
+                'latitude': geo_code.get('latitude'),
+                'longitude': geo_code.get('longitude')
             }
             destinations.append(destination)
         
@@ -141,5 +201,91 @@ class AmadeusClient:
         return []
 
 
-# Create singleton instance
-amadeus_client = AmadeusClient()
+class AsyncAmadeusClient:
+    """Async counterpart of AmadeusClient using the shared pooled HTTP client"""
+
+    def __init__(self, base: AmadeusClient):
+        self.base = base
+
+    async def _get_access_token(self) -> Optional[str]:
+        """Get OAuth2 access token (shared with the sync client)"""
+        if not self.base._is_configured():
+            return None
+        return await self.base.tokens.get_token_async(self._fetch_token)
+
+    async def _fetch_token(self):
+        url, headers, data = self.base._token_request()
+        token_data = await self.base.breaker.call_async(None, self._request_token, url, headers, data)
+        return token_data['access_token'], token_data.get('expires_in', 1799)
+
+    async def _request_token(self, url: str, headers: Dict, data: Dict):
+        with track_upstream('amadeus', 'token') as call:
+            call.response = response = await get_async_http_client().post(url, headers=headers, data=data)
+        response.raise_for_status()
+        return response.json()
+
+    async def _search(self, token: str, budget: str, limit: int) -> Optional[Dict]:
+        url, headers, params = self.base._search_request(token, budget, limit)
+        return await self.base.breaker.call_async(
+            ResponseCache.make_key(url, params), self._request_json, url, headers, params
+        )
+
+    async def _request_json(self, url: str, headers: Dict, params: Dict):
+        with track_upstream('amadeus', 'activities') as call:
+            call.response = response = await get_async_http_client().get(url, headers=headers, params=params)
+        if response.status_code == 401:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def search_destinations(self,
+                                  budget: str = None,
+                                  activities: List[str] = None,
+                                  limit: int = 10) -> List[Dict]:
+        """Async version of AmadeusClient.search_destinations"""
+        token = await self._get_access_token()
+        if not token:
+            return self.base._get_fallback_destinations()
+
+        try:
+            data = await self._search(token, budget, limit)
+            if data is None:
+                self.base.tokens.invalidate(token)
+                token = await self._get_access_token()
+                data = await self._search(token, budget, limit) if token else None
+            if data is None:
+                logger.warning("Amadeus rejected a freshly fetched access token")
+                return self.base._get_fallback_destinations()
+
+            return self.base._transform_api_response(data.get('data', []))
+        except Exception as e:
+            logger.warning("Error fetching destinations: %s", e)
+            return self.base._get_fallback_destinations()
+
+
+# Singleton instances are created on first use so importing this module stays cheap
+_amadeus_client = None
+_async_amadeus_client = None
+
+
+def get_amadeus_client() -> AmadeusClient:
+    global _amadeus_client
+    if _amadeus_client is None:
+        _amadeus_client = AmadeusClient()
+    return _amadeus_client
+
+
+def get_async_amadeus_client() -> AsyncAmadeusClient:
+    global _async_amadeus_client
+    if _async_amadeus_client is None:
+        _async_amadeus_client = AsyncAmadeusClient(get_amadeus_client())
+    return _async_amadeus_client
+
+
+def __getattr__(name):
+    # Keep `from app.utils.amadeus_client import amadeus_client` working for scripts
+    if name == 'amadeus_client':
+        return get_amadeus_client()
+    if name == 'async_amadeus_client':
+        return get_async_amadeus_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
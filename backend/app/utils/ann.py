@@ -0,0 +1,134 @@
+"""
+Approximate nearest-neighbour search
+LSA (TruncatedSVD) projection of TF-IDF vectors and a NumPy inverted-file (IVF) index
+over the resulting dense float32 vectors, for catalogs too large to scan exactly
+"""
+
+import numpy as np
+
+
+def normalize_rows(vectors):
+    """L2-normalize float32 rows in place (zero rows stay zero) and return them."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def top_k_scores(scores, ids, k):
+    """The ``k`` best (id, score) pairs, best first; ties go to the lower id."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    if k < len(scores):
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[keep], ids[keep]
+    order = np.lexsort((ids, -scores))
+    return ids[order], scores[order]
+
+
+class LSAProjector:
+    """TruncatedSVD reduction of sparse TF-IDF rows to unit-length float32 vectors."""
+
+    def __init__(self, components):
+        # (dims x features) projection; transform is a single sparse-dense product
+        self.components = components
+        self.dims = components.shape[0]
+
+    @classmethod
+    def fit(cls, matrix, dims=256, seed=0):
+        from sklearn.decomposition import TruncatedSVD
+
+        # TruncatedSVD needs fewer components than features; small catalogs get fewer dims
+        dims = max(1, min(dims, min(matrix.shape) - 1))
+        svd = TruncatedSVD(n_components=dims, algorithm="randomized", random_state=seed)
+        svd.fit(matrix)
+        return cls(svd.components_.astype(np.float32))
+
+    def transform(self, matrix):
+        return normalize_rows(np.asarray(matrix @ self.components.T, dtype=np.float32))
+
+
+class IVFIndex:
+    """
+    Inverted-file index over unit vectors (inner product = cosine).
+
+    Vectors are clustered with spherical k-means into ``nlist`` lists; a
+    query scans only the ``nprobe`` lists whose centroids are closest.
+    Raising ``nprobe`` trades latency for recall (``nprobe == nlist`` is
+    an exact scan). Each list's vectors are stored contiguously.
+    """
+
+    def __init__(self, centroids, offsets, ids, vectors, nprobe=8):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, vectors, nlist=None, nprobe=8, iterations=20, max_train=256, seed=0, batch_size=65536):
+        """
+        Cluster ``vectors`` (unit-length float32 rows). ``nlist`` defaults to
+        about sqrt(n); k-means trains on at most ``max_train`` rows per list.
+        """
+        # Imported here so importing this module (and the exact search mode) never loads scipy
+        from scipy import sparse
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(seed)
+
+        train = vectors
+        if n > nlist * max_train:
+            train = vectors[rng.choice(n, nlist * max_train, replace=False)]
+        centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = cls._assign(train, centroids, batch_size)
+            members = sparse.csr_matrix(
+                (np.ones(len(train), dtype=np.float32), (assign, np.arange(len(train)))),
+                shape=(nlist, len(train))
+            )
+            sums = np.asarray(members @ train)
+            # Reseed empty lists from random training rows
+            empty = np.bincount(assign, minlength=nlist) == 0
+            sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+            centroids = normalize_rows(sums.astype(np.float32))
+
+        assign = cls._assign(vectors, centroids, batch_size)
+        ids = np.argsort(assign, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=nlist)))).astype(np.int64)
+        return cls(centroids, offsets, ids.astype(np.int64), vectors[ids], nprobe=min(nprobe, nlist))
+
+    @staticmethod
+    def _assign(vectors, centroids, batch_size):
+        assign = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), batch_size):
+            assign[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+        return assign
+
+    def search(self, query, k, nprobe=None):
+        """Row ids and scores of the ``k`` best matches for one unit query vector, best first."""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+
+        rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in probe])
+        return top_k_scores(self.vectors[rows] @ query, self.ids[rows], k)
+
+
+def recall_at_k(exact, approx):
+    """Mean fraction of each exact top-k list that the approximate search also found."""
+    if not exact:
+        return 0.0
+    hits = [len(set(e) & set(a)) / len(e) for e, a in zip(exact, approx) if len(e)]
+    return float(np.mean(hits)) if hits else 0.0
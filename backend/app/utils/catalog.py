@@ -0,0 +1,156 @@
+"""
+Pre-serialized catalog responses
+Serializes and compresses the destination catalog once per data version, with
+ETag revalidation, pagination and field projection for GET /
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.utils.columnar import DestinationStore
+from app.utils.serialization import MSGPACK_MEDIA_TYPE, dumps, msgpack, packb, wants_msgpack
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MAX_PAGE_SIZE = 1000
+
+# Brotli's top quality costs seconds per MB, so large bodies use a faster level
+BROTLI_MAX_QUALITY_BYTES = 256 * 1024
+BROTLI_LARGE_QUALITY = 9
+
+
+class CatalogBody(NamedTuple):
+    etag: str
+    identity: bytes
+    gzip: bytes
+    br: Optional[bytes]
+    msgpack: Optional[bytes]
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in header.split(",")]
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or any((c[2:] if c.startswith("W/") else c) == bare for c in candidates)
+
+
+class CatalogCache:
+    """
+    Serialized catalog responses for one data version.
+
+    The full catalog is rendered up front; paginated or projected variants
+    are rendered on first request and kept in a small LRU. Each variant is
+    stored as JSON, gzip and (if the optional packages are installed)
+    brotli and MessagePack bytes, so requests only pick the right buffer.
+    ``full`` supplies the full-catalog body already rendered (e.g. buffers
+    memory-mapped from a compiled snapshot); it is never evicted.
+    """
+
+    def __init__(self, destinations: List[Dict], version: str, max_variants: int = 128, max_age: int = 60,
+                 full: Optional[CatalogBody] = None):
+        self.destinations = DestinationStore.of(destinations)
+        self.version = version
+        self.max_variants = max_variants
+        self.max_age = max_age
+        self.fields = sorted(self.destinations.fields)
+
+        self._variants: "OrderedDict[Tuple, CatalogBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.full = None
+        self.full = full or self.render()
+
+    def parse_fields(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Validate a comma-separated ``fields`` parameter; raises ValueError on unknown names."""
+        if not fields:
+            return None
+        names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return names or None
+
+    def render(self, offset: int = 0, limit: Optional[int] = None, fields: Optional[Tuple[str, ...]] = None) -> CatalogBody:
+        key = (offset, limit, fields)
+        if key == (0, None, None) and self.full is not None:
+            return self.full
+        with self._lock:
+            body = self._variants.get(key)
+            if body is not None:
+                self._variants.move_to_end(key)
+                return body
+
+        # Rows are materialized from the columnar store only while rendering
+        paginated = offset or limit is not None
+        rows = self.destinations.dicts(offset, offset + limit if limit is not None else None, fields)
+
+        payload = {"success": "success", "destinations": rows}
+        if paginated:
+            payload.update({"total": len(self.destinations), "offset": offset, "limit": limit})
+
+        identity = dumps(payload)
+        variant = hashlib.sha1(repr(key).encode()).hexdigest()[:10]
+        body = CatalogBody(
+            etag=f'W/"{self.version[:16]}-{variant}"',
+            identity=identity,
+            gzip=gzip.compress(identity, compresslevel=9),
+            br=self._brotli(identity) if brotli else None,
+            msgpack=packb(payload) if msgpack else None,
+        )
+
+        with self._lock:
+            self._variants[key] = body
+            while len(self._variants) > self.max_variants:
+                self._variants.popitem(last=False)
+        return body
+
+    @staticmethod
+    def _brotli(identity: bytes) -> bytes:
+        quality = 11 if len(identity) <= BROTLI_MAX_QUALITY_BYTES else BROTLI_LARGE_QUALITY
+        return brotli.compress(identity, quality=quality)
+
+    def response(self, request: Request, body: CatalogBody) -> Response:
+        """Build a 200 or 304 response, picking the best encoding the client accepts."""
+        headers = {
+            "ETag": body.etag,
+            "Vary": "Accept, Accept-Encoding",
+            "Cache-Control": f"public, max-age={self.max_age}",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, body.etag):
+            return Response(status_code=304, headers=headers)
+
+        if body.msgpack is not None and wants_msgpack(request):
+            return Response(content=body.msgpack, media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        content = body.identity
+        if body.br is not None and accepted.get("br", 0) > 0:
+            content = body.br
+            headers["Content-Encoding"] = "br"
+        elif accepted.get("gzip", 0) > 0:
+            content = body.gzip
+            headers["Content-Encoding"] = "gzip"
+        return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,208 @@
+"""
+Per-provider circuit breakers
+Stop calling an upstream API after repeated failures so requests fall back to local data immediately
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class NegativeCacheHit(CircuitOpenError):
+    """Raised instead of repeating a query that failed moments ago (the circuit itself may be closed)"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    every call is rejected without touching the network. Once
+    ``reset_timeout`` seconds have passed, up to ``half_open_max_calls`` probe
+    calls are let through: a success closes the circuit, a failure reopens it.
+
+    Individual failing queries are also negatively cached for
+    ``negative_ttl`` seconds, so a query that just failed is not retried even
+    while the circuit as a whole is still closed.
+    """
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1,
+                 negative_ttl: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._negative: Dict[str, float] = {}
+        self._counters = {'successes': 0, 'failures': 0, 'rejected': 0, 'negative_hits': 0, 'trips': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self, key: Optional[str] = None) -> bool:
+        """Return True if a call (for ``key``, if given) may go to the provider"""
+        return self._rejection(key)[0] is None
+
+    def _rejection(self, key: Optional[str]) -> Tuple[Optional[str], bool]:
+        """
+        (reason, probe): reason is None if the call may proceed, else 'negative'
+        or the circuit state; probe is True if the call took a half-open slot.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if key is not None:
+                expires = self._negative.get(key)
+                if expires is not None:
+                    if expires > now:
+                        self._counters['negative_hits'] += 1
+                        return 'negative', False
+                    del self._negative[key]
+
+            state = self._current_state(now)
+            if state == CLOSED:
+                return None, False
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return None, True
+            self._counters['rejected'] += 1
+            return state, False
+
+    def before_call(self, key: Optional[str] = None) -> bool:
+        """
+        Like ``allow`` but raises when the call is rejected: NegativeCacheHit
+        for a recently failed ``key``, CircuitOpenError otherwise. Returns True
+        if the call is a half-open probe; one that ends without a verdict (e.g.
+        cancelled) must hand its slot back with ``release_probe``.
+        """
+        reason, probe = self._rejection(key)
+        if reason == 'negative':
+            raise NegativeCacheHit(f"{self.name} {key} negatively cached; skipping upstream call")
+        if reason is not None:
+            raise CircuitOpenError(f"{self.name} circuit is {reason}; skipping upstream call")
+        return probe
+
+    def release_probe(self):
+        """Free a half-open slot taken by a probe that neither succeeded nor failed"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._counters['successes'] += 1
+            self._failures = 0
+            if self._state != CLOSED:
+                logger.info("🔌 %s circuit closed", self.name)
+            self._state = CLOSED
+
+    def record_failure(self, key: Optional[str] = None):
+        now = time.monotonic()
+        with self._lock:
+            self._counters['failures'] += 1
+            self._failures += 1
+            if key is not None and self.negative_ttl > 0:
+                self._negative[key] = now + self.negative_ttl
+                if len(self._negative) > 1024:
+                    self._negative = {k: v for k, v in self._negative.items() if v > now}
+
+            state = self._current_state(now)
+            if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = now
+                self._counters['trips'] += 1
+                logger.warning("🔌 %s circuit opened after %d consecutive failures", self.name, self._failures)
+
+    def call(self, key: Optional[str], fn, *args, **kwargs):
+        """Run ``fn`` through the breaker, recording its outcome"""
+        self.before_call(key)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure(key)
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, key: Optional[str], fn, *args, **kwargs):
+        """
+        Await ``fn`` through the breaker, recording its outcome. A cancelled
+        call (e.g. by a caller's deadline) records nothing but frees its probe.
+        """
+        probe = self.before_call(key)
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            self.record_failure(key)
+            raise
+        except BaseException:
+            if probe:
+                self.release_probe()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'retry_in': round(max(0.0, self.reset_timeout - (now - self._opened_at)), 2) if state == OPEN else 0.0,
+                'negative_cache_size': sum(1 for v in self._negative.values() if v > now),
+                **self._counters,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a provider, configured from the environment"""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+                reset_timeout=float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30)),
+                half_open_max_calls=int(os.getenv('CIRCUIT_HALF_OPEN_CALLS', 1)),
+                negative_ttl=float(os.getenv('CIRCUIT_NEGATIVE_TTL', 60)),
+            )
+        return _breakers[name]
+
+
+def breaker_states() -> Dict[str, Dict]:
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
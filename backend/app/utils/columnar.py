@@ -0,0 +1,388 @@
+"""
+Columnar destination store
+Destinations kept as columns instead of one dict per row: strings and string
+lists are dictionary-encoded (each distinct value stored once, interned, with
+a small integer code per row) and numbers live in numpy arrays. Rows are read
+through lightweight ``__slots__`` views and only become dicts when a response
+is built.
+"""
+
+import json
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class _Missing:
+    """Marks a row without a given key (code 0 in dictionary columns); pickles as the singleton"""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return '_MISSING'
+
+    def __repr__(self):
+        return '<missing>'
+
+
+_MISSING = _Missing()
+
+
+def _code_dtype(size: int):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if size <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def _kind(value) -> str:
+    if isinstance(value, str):
+        return 'str'
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return 'strs'
+    if isinstance(value, int) and not isinstance(value, bool):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    return 'object'
+
+
+class PackedValues:
+    """
+    Values stored back to back in one UTF-8 buffer (e.g. a memory-mapped
+    file) with an offsets array, decoded on access. ``kind`` is 'str',
+    'strs' (JSON lists, returned as tuples) or 'json' (any value; an empty
+    entry means the row has no such key).
+    """
+
+    __slots__ = ('kind', 'buffer', 'offsets')
+
+    def __init__(self, kind: str, buffer, offsets: np.ndarray):
+        self.kind = kind
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def pack(cls, kind: str, values: Sequence) -> Tuple[bytes, np.ndarray]:
+        """Encode ``values`` into (buffer, offsets) for ``PackedValues(kind, ...)``"""
+        chunks = []
+        for value in values:
+            if kind == 'str':
+                chunks.append((value or '').encode('utf-8'))
+            elif value is _MISSING or (kind == 'strs' and value is None):
+                chunks.append(b'')
+            else:
+                chunks.append(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+        return b''.join(chunks), offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        raw = bytes(self.buffer[self.offsets.item(i):self.offsets.item(i + 1)])
+        if self.kind == 'str':
+            return raw.decode('utf-8')
+        if not raw:
+            return _MISSING if self.kind == 'json' else None
+        value = json.loads(raw)
+        return tuple(value) if self.kind == 'strs' else value
+
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes
+
+
+class DictColumn:
+    """Distinct values plus one code per row; lists are stored as interned tuples"""
+
+    __slots__ = ('kind', 'values', 'codes')
+
+    def __init__(self, kind: str, values: List, codes: np.ndarray):
+        self.kind = kind
+        self.values = values
+        self.codes = codes
+
+    def get(self, row: int):
+        code = self.codes.item(row)
+        if not code:
+            return _MISSING
+        value = self.values[code]
+        return list(value) if self.kind == 'strs' else value
+
+    def slice(self, start: int, stop: int) -> List:
+        values = self.values
+        if self.kind == 'strs':
+            return [list(values[code]) if code else _MISSING for code in self.codes[start:stop].tolist()]
+        return [values[code] if code else _MISSING for code in self.codes[start:stop].tolist()]
+
+    def nbytes(self) -> int:
+        if isinstance(self.values, PackedValues):
+            return self.codes.nbytes + self.values.nbytes()
+        size = self.codes.nbytes + sys.getsizeof(self.values)
+        size += sum(sys.getsizeof(value) for value in self.values[1:])
+        if self.kind == 'strs':
+            # Strings inside the tuples are interned, so each is counted once
+            size += sum(sys.getsizeof(s) for s in {s for value in self.values[1:] for s in value})
+        return size
+
+
+class NumericColumn:
+    """A numpy array, with a presence mask when some rows lack the key"""
+
+    __slots__ = ('kind', 'data', 'present')
+
+    def __init__(self, kind: str, data: np.ndarray, present: Optional[np.ndarray]):
+        self.kind = kind
+        self.data = data
+        self.present = present
+
+    def get(self, row: int):
+        if self.present is not None and not self.present.item(row):
+            return _MISSING
+        return self.data.item(row)
+
+    def slice(self, start: int, stop: int) -> List:
+        values = self.data[start:stop].tolist()
+        if self.present is None:
+            return values
+        return [v if ok else _MISSING for v, ok in zip(values, self.present[start:stop].tolist())]
+
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.present.nbytes if self.present is not None else 0)
+
+
+class ObjectColumn:
+    """Fallback for mixed or nested values: one Python object per row"""
+
+    __slots__ = ('kind', 'data')
+
+    def __init__(self, data: List):
+        self.kind = 'object'
+        self.data = data
+
+    def get(self, row: int):
+        return self.data[row]
+
+    def slice(self, start: int, stop: int) -> List:
+        return self.data[start:stop]
+
+    def nbytes(self) -> int:
+        if isinstance(self.data, PackedValues):
+            return self.data.nbytes()
+        return sys.getsizeof(self.data) + sum(sys.getsizeof(v) for v in self.data if v is not _MISSING)
+
+
+Column = Union[DictColumn, NumericColumn, ObjectColumn]
+
+
+class _ColumnBuilder:
+    """Accumulates one column row by row; falls back to objects on mixed types"""
+
+    def __init__(self, kind: str, size: int):
+        self.kind = kind
+        if kind in ('str', 'strs'):
+            self.lookup: Dict = {}
+            self.distinct: List = [None]
+            self.codes = array('I', bytes(size * 4))
+        elif kind in ('int', 'float'):
+            self.data = array('q' if kind == 'int' else 'd', bytes(size * 8))
+            self.present = bytearray(size)
+        else:
+            self.data = [_MISSING] * size
+
+    def append(self, value):
+        kind = self.kind
+        if value is _MISSING:
+            if kind in ('str', 'strs'):
+                self.codes.append(0)
+            elif kind in ('int', 'float'):
+                self.data.append(0)
+                self.present.append(0)
+            else:
+                self.data.append(_MISSING)
+            return
+        if kind != 'object' and _kind(value) != kind:
+            # Mixed types (even int and float) are kept as-is so output is unchanged
+            self._to_objects()
+        if self.kind in ('str', 'strs'):
+            key = sys.intern(value) if kind == 'str' else tuple(sys.intern(v) for v in value)
+            code = self.lookup.get(key)
+            if code is None:
+                code = self.lookup[key] = len(self.distinct)
+                self.distinct.append(key)
+            self.codes.append(code)
+        elif self.kind in ('int', 'float'):
+            try:
+                self.data.append(value)
+            except OverflowError:
+                self._to_objects()
+                self.data.append(value)
+                return
+            self.present.append(1)
+        else:
+            self.data.append(value)
+
+    def _to_objects(self):
+        column = self.finish()
+        self.data = column.slice(0, len(self.codes if self.kind in ('str', 'strs') else self.data))
+        self.kind = 'object'
+        self.lookup = self.distinct = self.codes = self.present = None
+
+    def finish(self) -> Column:
+        if self.kind in ('str', 'strs'):
+            codes = np.frombuffer(self.codes, dtype=np.dtype(f'u{self.codes.itemsize}'))
+            return DictColumn(self.kind, self.distinct, codes.astype(_code_dtype(len(self.distinct))))
+        if self.kind in ('int', 'float'):
+            data = np.frombuffer(self.data, dtype=np.int64 if self.kind == 'int' else np.float64).copy()
+            present = np.frombuffer(self.present, dtype=bool)
+            return NumericColumn(self.kind, data, None if present.all() else present.copy())
+        return ObjectColumn(self.data)
+
+
+class DestinationRow(Mapping):
+    """Read-only view of one row; behaves like the original dict"""
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: 'DestinationStore', row: int):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        column = self._store.columns.get(key)
+        value = column.get(self._row) if column is not None else _MISSING
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        row = self._row
+        return (name for name, column in self._store.columns.items() if column.get(row) is not _MISSING)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> Dict:
+        return self._store.row_dict(self._row, fields)
+
+    def __repr__(self):
+        return f"DestinationRow({self.to_dict()!r})"
+
+
+class DestinationStore:
+    """
+    Column-oriented, read-only table of destination records.
+
+    ``store[i]`` returns a ``DestinationRow`` view; ``row_dict`` / ``dicts``
+    materialize plain dicts (in the original key order) for responses.
+    """
+
+    def __init__(self, records: Iterable[Dict]):
+        # Rows are encoded as they stream in, so repeated values are shared
+        # (and the parsed dicts can be freed) before the whole input is read
+        builders: Dict[str, _ColumnBuilder] = {}
+        size = 0
+        for record in records:
+            for name, value in record.items():
+                if name not in builders:
+                    builders[name] = _ColumnBuilder(_kind(value), size)
+            for name, builder in builders.items():
+                builder.append(record.get(name, _MISSING))
+            size += 1
+
+        self.size = size
+        self.columns: Dict[str, Column] = {name: builder.finish() for name, builder in builders.items()}
+
+    @classmethod
+    def from_columns(cls, size: int, columns: Dict[str, Column]) -> 'DestinationStore':
+        """Assemble a store from already encoded columns (e.g. loaded from a compiled snapshot)"""
+        store = cls.__new__(cls)
+        store.size = size
+        store.columns = columns
+        return store
+
+    @classmethod
+    def of(cls, records) -> 'DestinationStore':
+        """Return ``records`` unchanged if it is already a store, otherwise encode it"""
+        return records if isinstance(records, cls) else cls(records)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [DestinationRow(self, i) for i in range(*row.indices(self.size))]
+        if row < 0:
+            row += self.size
+        if not 0 <= row < self.size:
+            raise IndexError(row)
+        return DestinationRow(self, row)
+
+    def __iter__(self) -> Iterator[DestinationRow]:
+        return (DestinationRow(self, i) for i in range(self.size))
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.columns)
+
+    def row_dict(self, row: int, fields: Optional[Sequence[str]] = None) -> Dict:
+        """Materialize one row as a dict, optionally limited to ``fields``"""
+        columns = self.columns
+        names = columns if fields is None else [name for name in fields if name in columns]
+        result = {}
+        for name in names:
+            value = columns[name].get(row)
+            if value is not _MISSING:
+                result[name] = value
+        return result
+
+    def dicts(self, start: int = 0, stop: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Materialize rows ``start:stop`` as dicts, decoding one column at a time"""
+        start, stop, _ = slice(start, stop).indices(self.size)
+        columns = self.columns
+        names = columns if fields is None else [name for name in fields if name in columns]
+        rows = [{} for _ in range(max(0, stop - start))]
+        for name in names:
+            for row, value in zip(rows, columns[name].slice(start, stop)):
+                if value is not _MISSING:
+                    row[name] = value
+        return rows
+
+    def float_column(self, name: str) -> np.ndarray:
+        """Column ``name`` as float64, with NaN where a row lacks it or holds a non-number"""
+        column = self.columns.get(name)
+        if column is None:
+            return np.full(self.size, np.nan)
+        if isinstance(column, NumericColumn):
+            values = column.data.astype(np.float64)
+            if column.present is not None:
+                values[~column.present] = np.nan
+            return values
+        values = np.full(self.size, np.nan)
+        for row, value in enumerate(column.slice(0, self.size)):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[row] = value
+            elif isinstance(value, str):
+                try:
+                    values[row] = float(value)
+                except ValueError:
+                    pass
+        return values
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes held by each column"""
+        return {name: column.nbytes() for name, column in self.columns.items()}
+
+    def describe(self) -> List[Tuple[str, str, int, int]]:
+        """(column, kind, distinct values, bytes) for each column"""
+        rows = []
+        for name, column in self.columns.items():
+            distinct = len(column.values) - 1 if isinstance(column, DictColumn) else self.size
+            rows.append((name, column.kind, distinct, column.nbytes()))
+        return rows
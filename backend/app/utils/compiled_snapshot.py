@@ -0,0 +1,442 @@
+"""
+Compiled snapshots
+Everything a worker builds at startup (the destination store, both TF-IDF
+vectorizers and matrices, the structured pre-filter, the dream ANN index and
+the rendered catalog) written once to a versioned directory of .npy arrays
+and raw buffers plus a manifest. Workers open the files with mmap, so every
+process shares the same physical pages and starts without parsing JSON or
+fitting anything.
+
+Layout:
+    <root>/CURRENT                   name of the live version directory
+    <root>/<version>/manifest.json   shapes, dtypes and metadata
+    <root>/<version>/*.npy, *.bin    arrays and raw buffers
+
+Usage:
+    python -m app.utils.compiled_snapshot compile --out snapshots [--keep 3]
+    python -m app.utils.compiled_snapshot info --out snapshots
+
+Then start the API with COMPILED_SNAPSHOT_DIR=snapshots.
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import shutil
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.utils.ann import IVFIndex, LSAProjector
+from app.utils.catalog import CatalogBody, CatalogCache
+from app.utils.columnar import DestinationStore, DictColumn, NumericColumn, ObjectColumn, PackedValues
+from app.utils.data_loader import DESTINATIONS_FILE
+from app.utils.dream_matcher import DATA_FILE as DREAM_DATA_FILE, DREAM_INDEX_MODE, DreamIndex
+from app.utils.logging_setup import configure_logging
+from app.utils.prefilter import CATEGORICAL_FIELDS, StructuredIndex
+from app.utils.recommender import RecommenderIndex
+
+logger = logging.getLogger(__name__)
+
+# Root directory of compiled snapshots; empty means build from the data files
+COMPILED_SNAPSHOT_DIR = os.getenv("COMPILED_SNAPSHOT_DIR", "")
+
+FORMAT = 1
+CURRENT = "CURRENT"
+
+# Dictionaries up to this size are decoded into interned Python strings at
+# load time; larger ones (names, URLs) stay in the mapped buffer
+MATERIALIZE_MAX_VALUES = 4096
+
+
+class _Writer:
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def array(self, name: str, values) -> str:
+        filename = f"{name}.npy"
+        np.save(os.path.join(self.directory, filename), np.ascontiguousarray(values), allow_pickle=False)
+        return filename
+
+    def blob(self, name: str, data: Optional[bytes]) -> Optional[str]:
+        if data is None:
+            return None
+        filename = f"{name}.bin"
+        with open(os.path.join(self.directory, filename), "wb") as f:
+            f.write(data)
+        return filename
+
+
+class _Reader:
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def array(self, filename: str) -> np.ndarray:
+        return np.load(os.path.join(self.directory, filename), allow_pickle=False, mmap_mode="r")
+
+    def blob(self, filename: Optional[str]):
+        """Read-only memoryview of a mapped file (bytes for empty files, None if absent)"""
+        if filename is None:
+            return None
+        with open(os.path.join(self.directory, filename), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _source(path: str) -> Dict:
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# --- writing -----------------------------------------------------------------
+
+def _save_store(writer: _Writer, prefix: str, store: DestinationStore) -> Dict:
+    columns = []
+    for position, (name, column) in enumerate(store.columns.items()):
+        key = f"{prefix}.{position}"
+        meta = {"name": name, "kind": column.kind}
+        if isinstance(column, DictColumn):
+            buffer, offsets = PackedValues.pack(column.kind, column.values)
+            meta.update(type="dict", codes=writer.array(f"{key}.codes", column.codes),
+                        values=writer.blob(f"{key}.values", buffer), offsets=writer.array(f"{key}.offsets", offsets))
+        elif isinstance(column, NumericColumn):
+            meta.update(type="numeric", data=writer.array(f"{key}.data", column.data),
+                        present=writer.array(f"{key}.present", column.present) if column.present is not None else None)
+        else:
+            buffer, offsets = PackedValues.pack("json", column.data)
+            meta.update(type="object", values=writer.blob(f"{key}.values", buffer),
+                        offsets=writer.array(f"{key}.offsets", offsets))
+        columns.append(meta)
+    return {"size": len(store), "columns": columns}
+
+
+def _save_vectorizer(writer: _Writer, prefix: str, vectorizer) -> Dict:
+    params = {}
+    for name, value in vectorizer.get_params().items():
+        if name == "dtype":
+            params[name] = np.dtype(value).name
+        elif value is None or isinstance(value, (str, int, float, bool, tuple)):
+            params[name] = value
+        else:
+            raise ValueError(f"Cannot compile a vectorizer with a custom {name}")
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    buffer, offsets = PackedValues.pack("str", terms)
+    return {
+        "params": params,
+        "terms": writer.blob(f"{prefix}.terms", buffer),
+        "term_offsets": writer.array(f"{prefix}.term_offsets", offsets),
+        "idf": writer.array(f"{prefix}.idf", vectorizer.idf_),
+    }
+
+
+def _save_csr(writer: _Writer, prefix: str, matrix) -> Dict:
+    matrix = matrix.tocsr()
+    return {
+        "shape": list(matrix.shape),
+        "data": writer.array(f"{prefix}.data", matrix.data),
+        "indices": writer.array(f"{prefix}.indices", matrix.indices),
+        "indptr": writer.array(f"{prefix}.indptr", matrix.indptr),
+    }
+
+
+def _save_filters(writer: _Writer, prefix: str, filters: StructuredIndex) -> Dict:
+    postings = {}
+    for field, terms in filters.postings.items():
+        names = list(terms)
+        buffer, offsets = PackedValues.pack("str", names)
+        lengths = [len(terms[name]) for name in names]
+        bounds = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=bounds[1:])
+        ids = np.concatenate([terms[name] for name in names]) if names else np.empty(0, dtype=np.int32)
+        postings[field] = {
+            "terms": writer.blob(f"{prefix}.{field}.terms", buffer),
+            "term_offsets": writer.array(f"{prefix}.{field}.term_offsets", offsets),
+            "bounds": writer.array(f"{prefix}.{field}.bounds", bounds),
+            "ids": writer.array(f"{prefix}.{field}.ids", ids),
+        }
+    return {
+        "budget_min": writer.array(f"{prefix}.budget_min", filters.budget_min),
+        "budget_max": writer.array(f"{prefix}.budget_max", filters.budget_max),
+        "months": writer.array(f"{prefix}.months", filters.months),
+        "postings": postings,
+    }
+
+
+def _save_dream(writer: _Writer, index: DreamIndex) -> Dict:
+    meta = {
+        "version": index.version,
+        "records": _save_store(writer, "dream.records", index.records),
+        "vectorizer": _save_vectorizer(writer, "dream.vectorizer", index.vectorizer),
+        "matrix": _save_csr(writer, "dream.matrix", index.matrix),
+        "lsa": None,
+        "ivf": None,
+    }
+    if index.ivf is not None:
+        meta["lsa"] = {"components": writer.array("dream.lsa.components", index.lsa.components)}
+        meta["ivf"] = {
+            "centroids": writer.array("dream.ivf.centroids", index.ivf.centroids),
+            "offsets": writer.array("dream.ivf.offsets", index.ivf.offsets),
+            "ids": writer.array("dream.ivf.ids", index.ivf.ids),
+            "vectors": writer.array("dream.ivf.vectors", index.ivf.vectors),
+            "nprobe": index.ivf.nprobe,
+        }
+    return meta
+
+
+def write_snapshot(directory: str, snapshot) -> Dict:
+    """Write a built DataSnapshot's parts into ``directory`` and return the manifest"""
+    writer = _Writer(directory)
+    index, catalog = snapshot.index, snapshot.catalog
+    full = catalog.full
+    manifest = {
+        "format": FORMAT,
+        "version": snapshot.version,
+        "dream_version": snapshot.dream_index.version,
+        "created_at": time.time(),
+        "sources": {"destinations": _source(DESTINATIONS_FILE), "dream_csv": _source(DREAM_DATA_FILE)},
+        "destinations": _save_store(writer, "destinations", snapshot.destinations),
+        "recommender": {
+            "vectorizer": _save_vectorizer(writer, "recommender.vectorizer", index.vectorizer),
+            "matrix": _save_csr(writer, "recommender.matrix", index.matrix),
+            "filters": _save_filters(writer, "recommender.filters", index.filters),
+        },
+        "dream": _save_dream(writer, snapshot.dream_index),
+        "catalog": {
+            "etag": full.etag,
+            "identity": writer.blob("catalog.identity", full.identity),
+            "gzip": writer.blob("catalog.gzip", full.gzip),
+            "br": writer.blob("catalog.br", full.br),
+            "msgpack": writer.blob("catalog.msgpack", full.msgpack),
+        },
+    }
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def compile_snapshot(root: str, mode: str = DREAM_INDEX_MODE, keep: int = 3) -> str:
+    """
+    Build everything from the data files, write it to a new version directory
+    under ``root`` and point CURRENT at it. Returns the directory path.
+    """
+    # Imported here: snapshot.py itself loads compiled snapshots from this module
+    from app.utils.snapshot import build_from_files
+
+    os.makedirs(root, exist_ok=True)
+    snapshot = build_from_files()
+    snapshot.dream_index.configure(mode)
+    name = f"{snapshot.version[:12]}-{snapshot.dream_index.version[:12]}"
+    target = os.path.join(root, name)
+
+    if os.path.exists(os.path.join(target, "manifest.json")):
+        logger.info("📁 Snapshot %s already compiled", name)
+    else:
+        tmp = os.path.join(root, f".{name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            write_snapshot(tmp, snapshot)
+            os.replace(tmp, target)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        logger.info("✅ Compiled snapshot %s (%d destinations)", name, len(snapshot.destinations))
+
+    # Swap the pointer atomically; watching workers pick it up on their next check
+    pointer = os.path.join(root, CURRENT)
+    with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+    os.replace(f"{pointer}.tmp", pointer)
+    _prune(root, name, keep)
+    return target
+
+
+def _prune(root: str, current: str, keep: int):
+    """Remove all but the ``keep`` newest version directories (never the current one)"""
+    versions = [entry for entry in os.scandir(root) if entry.is_dir() and not entry.name.startswith(".")]
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in versions[max(keep, 1):]:
+        if entry.name != current:
+            # Workers still mapping these files keep their pages until they unmap them
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+# --- loading -----------------------------------------------------------------
+
+def _interned(kind: str, value):
+    if kind == "str":
+        return sys.intern(value)
+    return tuple(sys.intern(v) for v in value)
+
+
+def _load_store(reader: _Reader, meta: Dict) -> DestinationStore:
+    columns = {}
+    for column in meta["columns"]:
+        kind = column["kind"]
+        if column["type"] == "dict":
+            values = PackedValues(kind, reader.blob(column["values"]), reader.array(column["offsets"]))
+            if len(values) <= MATERIALIZE_MAX_VALUES:
+                values = [None] + [_interned(kind, value) for value in values[1:]]
+            columns[column["name"]] = DictColumn(kind, values, reader.array(column["codes"]))
+        elif column["type"] == "numeric":
+            present = reader.array(column["present"]) if column["present"] else None
+            columns[column["name"]] = NumericColumn(kind, reader.array(column["data"]), present)
+        else:
+            values = PackedValues("json", reader.blob(column["values"]), reader.array(column["offsets"]))
+            columns[column["name"]] = ObjectColumn(values)
+    return DestinationStore.from_columns(meta["size"], columns)
+
+
+def _load_terms(reader: _Reader, buffer: str, offsets: str):
+    return PackedValues("str", reader.blob(buffer), reader.array(offsets))[:]
+
+
+def _load_vectorizer(reader: _Reader, meta: Dict):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(meta["params"])
+    params["dtype"] = np.dtype(params["dtype"]).type
+    if params.get("ngram_range") is not None:
+        params["ngram_range"] = tuple(params["ngram_range"])
+    vectorizer = TfidfVectorizer(**params)
+    terms = _load_terms(reader, meta["terms"], meta["term_offsets"])
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(terms)}
+    vectorizer.idf_ = np.asarray(reader.array(meta["idf"]))
+    return vectorizer
+
+
+def _load_csr(reader: _Reader, meta: Dict):
+    # Imported here, like the other ML modules, so importing the app stays light
+    from scipy import sparse
+
+    return sparse.csr_matrix(
+        (reader.array(meta["data"]), reader.array(meta["indices"]), reader.array(meta["indptr"])),
+        shape=tuple(meta["shape"]), copy=False,
+    )
+
+
+def _load_filters(reader: _Reader, meta: Dict) -> StructuredIndex:
+    postings = {}
+    for field in CATEGORICAL_FIELDS:
+        field_meta = meta["postings"].get(field)
+        if field_meta is None:
+            postings[field] = {}
+            continue
+        terms = _load_terms(reader, field_meta["terms"], field_meta["term_offsets"])
+        bounds = reader.array(field_meta["bounds"]).tolist()
+        ids = reader.array(field_meta["ids"])
+        postings[field] = {term: ids[bounds[i]:bounds[i + 1]] for i, term in enumerate(terms)}
+    return StructuredIndex.from_arrays(reader.array(meta["budget_min"]), reader.array(meta["budget_max"]),
+                                       reader.array(meta["months"]), postings)
+
+
+class CompiledSnapshot:
+    """One compiled version directory; parts are mapped on first use"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT:
+            raise ValueError(f"Unsupported compiled snapshot format in {path}")
+        self.version = self.manifest["version"]
+        self.dream_version = self.manifest["dream_version"]
+        self._reader = _Reader(path)
+        self._destinations: Optional[DestinationStore] = None
+
+    @classmethod
+    def current(cls, root: str = COMPILED_SNAPSHOT_DIR) -> "CompiledSnapshot":
+        """The version CURRENT points at"""
+        with open(os.path.join(root, CURRENT), "r", encoding="utf-8") as f:
+            return cls(os.path.join(root, f.read().strip()))
+
+    def stale_sources(self):
+        """Data files that changed (size or mtime) since this snapshot was compiled"""
+        stale = []
+        for source in self.manifest["sources"].values():
+            try:
+                if _source(source["path"]) != source:
+                    stale.append(source["path"])
+            except OSError:
+                continue
+        return stale
+
+    def destinations(self) -> DestinationStore:
+        if self._destinations is None:
+            self._destinations = _load_store(self._reader, self.manifest["destinations"])
+        return self._destinations
+
+    def recommender_index(self) -> RecommenderIndex:
+        meta = self.manifest["recommender"]
+        return RecommenderIndex.from_parts(
+            self.destinations(),
+            _load_vectorizer(self._reader, meta["vectorizer"]),
+            _load_csr(self._reader, meta["matrix"]),
+            _load_filters(self._reader, meta["filters"]),
+            version=self.version,
+        )
+
+    def dream_index(self, mode: str = DREAM_INDEX_MODE) -> DreamIndex:
+        meta = self.manifest["dream"]
+        lsa = ivf = None
+        if meta["ivf"] is not None:
+            lsa = LSAProjector(self._reader.array(meta["lsa"]["components"]))
+            ivf_meta = meta["ivf"]
+            ivf = IVFIndex(self._reader.array(ivf_meta["centroids"]), self._reader.array(ivf_meta["offsets"]),
+                           self._reader.array(ivf_meta["ids"]), self._reader.array(ivf_meta["vectors"]),
+                           nprobe=ivf_meta["nprobe"])
+        index = DreamIndex(_load_store(self._reader, meta["records"]),
+                           _load_vectorizer(self._reader, meta["vectorizer"]),
+                           _load_csr(self._reader, meta["matrix"]),
+                           version=meta["version"], lsa=lsa, ivf=ivf)
+        return index.configure(mode)
+
+    def catalog(self, max_age: int = 60) -> CatalogCache:
+        meta = self.manifest["catalog"]
+        full = CatalogBody(
+            etag=meta["etag"],
+            identity=self._reader.blob(meta["identity"]),
+            gzip=self._reader.blob(meta["gzip"]),
+            br=self._reader.blob(meta["br"]),
+            msgpack=self._reader.blob(meta["msgpack"]),
+        )
+        return CatalogCache(self.destinations(), self.version, max_age=max_age, full=full)
+
+    def info(self) -> Dict:
+        size = sum(entry.stat().st_size for entry in os.scandir(self.path) if entry.is_file())
+        return {
+            "path": self.path,
+            "version": self.version,
+            "dream_version": self.dream_version,
+            "destinations": self.manifest["destinations"]["size"],
+            "dream_ann": self.manifest["dream"]["ivf"] is not None,
+            "bytes": size,
+            "created_at": self.manifest["created_at"],
+            "stale_sources": self.stale_sources(),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compiled, memory-mapped data snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compile_parser = subparsers.add_parser("compile", help="Build indexes from the data files and write a snapshot")
+    compile_parser.add_argument("--out", default=COMPILED_SNAPSHOT_DIR or "snapshots")
+    compile_parser.add_argument("--mode", choices=["exact", "ann", "auto"], default=DREAM_INDEX_MODE,
+                                help="Dream index mode; ann also compiles the LSA projection and IVF index")
+    compile_parser.add_argument("--keep", type=int, default=3, help="Version directories to keep")
+    info_parser = subparsers.add_parser("info", help="Describe the current snapshot")
+    info_parser.add_argument("--out", default=COMPILED_SNAPSHOT_DIR or "snapshots")
+    args = parser.parse_args()
+    configure_logging()
+
+    if args.command == "compile":
+        start = time.perf_counter()
+        path = compile_snapshot(args.out, args.mode, args.keep)
+        print(f"✅ {path} ({time.perf_counter() - start:.1f}s)")
+    else:
+        print(json.dumps(CompiledSnapshot.current(args.out).info(), indent=2))
@@ -1,8 +1,9 @@
 import os
 import json
+import hashlib
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-DESTINATIONS_FILE = os.path.join(DATA_DIR, "destinations.json")
+DESTINATIONS_FILE = os.getenv("DESTINATIONS_PATH", os.path.join(DATA_DIR, "destinations.json"))
 
 def load_destinations():
     try:
@@ -11,4 +12,44 @@ def load_destinations():
     except FileNotFoundError:
         raise FileNotFoundError(f"Destinations file not found at {DESTINATIONS_FILE}")
     except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in destinations file: {e}")
\ No newline at end of file
+        raise ValueError(f"Invalid JSON in destinations file: {e}")
+
+def data_version(path=DESTINATIONS_FILE):
+    """Content hash of a data file, used to version indexes derived from it."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_signature(path):
+    """(mtime_ns, size) of a data file: a cheap check for changes on disk, None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class StaleWorkerIndex(Exception):
+    """A pool process's data files hold a different version than the parent snapshot asked for."""
+
+    def __init__(self, expected, found):
+        super().__init__(expected, found)
+        self.expected = expected
+        self.found = found
+
+    def __str__(self):
+        return f"worker data is version {self.found[:12]}, snapshot is {self.expected[:12]}"
+
+def load_destinations_versioned(path=DESTINATIONS_FILE):
+    """Load destinations and their content hash from a single read, so both describe the same file."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Destinations file not found at {path}")
+    try:
+        destinations = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in destinations file: {e}")
+    return destinations, hashlib.sha256(raw).hexdigest()
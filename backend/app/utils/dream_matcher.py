@@ -1,46 +1,321 @@
-import os
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+"""
+Dream matcher
+Matches a free-text "dream" description against destinations.csv using TF-IDF.
+
+The fitted index can be compiled offline into a binary artifact and is
+otherwise built lazily on first use (or from a warm-up hook), so importing
+this module stays cheap.
+
+Large catalogs can switch to a dense mode: LSA vectors searched through an
+IVF approximate nearest-neighbour index (see app.utils.ann). The exact
+TF-IDF scan stays available for small catalogs and for measuring recall.
+"""
 
-# Construct the absolute path to the CSV file
+import argparse
+import csv
+import logging
 import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from app.utils.ann import IVFIndex, LSAProjector, recall_at_k
+from app.utils.columnar import DestinationStore
+from app.utils.data_loader import StaleWorkerIndex, data_version, file_signature
+from app.utils.logging_setup import configure_logging
+from app.utils.metrics import stage
+
+logger = logging.getLogger(__name__)
 
 # Get current script directory
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_FILE = os.path.join(SCRIPT_DIR, "../data/destinations.csv")
-print("Looking for data file at:", DATA_FILE)
-# Load dataset
-try:
-    df = pd.read_csv(DATA_FILE, quotechar='"', skipinitialspace=True)
-except FileNotFoundError:
-    raise Exception(f"File not found: {DATA_FILE}")
+DATA_FILE = os.getenv("DREAM_CSV_PATH", os.path.join(SCRIPT_DIR, "../data/destinations.csv"))
+INDEX_FILE = os.getenv("DREAM_INDEX_PATH", os.path.join(SCRIPT_DIR, "../data/dream_index.pkl"))
+
+DEFAULT_TOP_K = 3
+ARTIFACT_FORMAT = 2
+
+# "exact" scans every TF-IDF row, "ann" uses LSA + IVF, "auto" picks ann from DREAM_ANN_MIN_ROWS rows up
+DREAM_INDEX_MODE = os.getenv("DREAM_INDEX_MODE", "auto").lower()
+ANN_MIN_ROWS = int(os.getenv("DREAM_ANN_MIN_ROWS", "50000"))
+LSA_DIMS = int(os.getenv("DREAM_LSA_DIMS", "256"))
+IVF_NLIST = int(os.getenv("DREAM_IVF_NLIST", "0"))  # 0 = about sqrt(rows)
+IVF_NPROBE = int(os.getenv("DREAM_IVF_NPROBE", "8"))
+
+
+def top_k_indices(scores, k):
+    """
+    Indices of the ``k`` highest scores, best first, via argpartition.
+    Ties go to the later row, matching the previous ``argsort()[-k:][::-1]``.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[::-1][:k - len(above)]
+    candidates = np.concatenate([above, ties])
+    return candidates[np.lexsort((-candidates, -scores[candidates]))]
+
+
+def format_match(destination):
+    """Shape a destination record the way /match-dream returns it."""
+    return {
+        "id": str(destination.get("id", "")),
+        "name": destination.get("name", ""),
+        "country": destination.get("country", ""),
+        "description": destination.get("description", ""),
+        "image": destination.get("image", ""),
+        "cost": destination.get("avg_budget", ""),
+        "weather": " ".join(destination.get("weather", [])),
+        "activities": destination.get("activities", []),
+        "bestFor": " ".join(destination.get("travel_with", [])),
+        "rating": destination.get("rating", 0),
+        "facts": destination.get("facts", []),
+        "tags": destination.get("tags", []),
+    }
+
+
+class DreamIndex:
+    """
+    TF-IDF index over destination descriptions and keywords. Records are kept
+    in a columnar ``DestinationStore`` and shaped for /match-dream only when
+    returned. ``lsa`` and ``ivf`` are set once the dense (approximate) mode
+    has been built.
+    """
+
+    def __init__(self, records, vectorizer, matrix, version=None, lsa=None, ivf=None):
+        self.records = DestinationStore.of(records)
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.version = version
+        self.lsa = lsa
+        self.ivf = ivf
+        self.use_ann = ivf is not None
+
+    @classmethod
+    def build(cls, csv_path=DATA_FILE):
+        """Read the CSV and fit the vectorizer."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import normalize
+
+        logger.info("📁 Building dream index from %s", csv_path)
+        try:
+            with open(csv_path, "r", encoding="utf-8", newline="") as f:
+                rows = list(csv.DictReader(f, quotechar='"', skipinitialspace=True))
+        except FileNotFoundError:
+            raise Exception(f"File not found: {csv_path}")
+
+        records = []
+        combined = []
+        for position, row in enumerate(rows):
+            record = dict(row)
+            # Ensure ID is present and string
+            record["id"] = str(record.get("id") or position)
+            records.append(record)
+            # Combine keywords and description for better matching
+            combined.append(f"{row.get('description') or ''} {row.get('keywords') or ''}")
+
+        vectorizer = TfidfVectorizer(dtype=np.float32)
+        matrix = normalize(vectorizer.fit_transform(combined), norm="l2", copy=False).tocsr()
+        return cls(records, vectorizer, matrix, version=data_version(csv_path))
+
+    def save(self, path=INDEX_FILE):
+        """Write the compiled index to a binary artifact."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({
+                "format": ARTIFACT_FORMAT,
+                "version": self.version,
+                "records": self.records,
+                "vectorizer": self.vectorizer,
+                "matrix": self.matrix,
+                "lsa": self.lsa,
+                "ivf": self.ivf,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        """Load a compiled index artifact (only trust artifacts you built yourself)."""
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported dream index format in {path}")
+        return cls(data["records"], data["vectorizer"], data["matrix"], version=data["version"],
+                   lsa=data.get("lsa"), ivf=data.get("ivf"))
 
-# Combine keywords and description for better matching
-df["combined"] = df["description"] + " " + df["keywords"]
+    def build_dense(self, dims=LSA_DIMS, nlist=IVF_NLIST, nprobe=IVF_NPROBE):
+        """Fit the LSA projection and cluster the reduced vectors into an IVF index."""
+        logger.info("📁 Building dense dream index (%d dims) for %d destinations", dims, len(self.records))
+        self.lsa = LSAProjector.fit(self.matrix, dims)
+        self.ivf = IVFIndex.build(self.lsa.transform(self.matrix), nlist=nlist or None, nprobe=nprobe)
+        self.use_ann = True
+
+    def configure(self, mode=DREAM_INDEX_MODE):
+        """Pick exact or approximate search for ``mode`` (exact / ann / auto), building the dense index if needed."""
+        self.use_ann = mode == "ann" or (mode == "auto" and len(self.records) >= ANN_MIN_ROWS)
+        if self.use_ann and self.ivf is None:
+            self.build_dense()
+        return self
+
+    def top_k(self, dream_input, k=DEFAULT_TOP_K, exact=False):
+        """Row ids of the ``k`` best matches, best first."""
+        with stage("dream", "vectorize"):
+            dream_vec = self.vectorizer.transform([dream_input])
+        if self.use_ann and not exact:
+            with stage("dream", "ann_search"):
+                ids, _ = self.ivf.search(self.lsa.transform(dream_vec)[0], k)
+            return ids
+        with stage("dream", "similarity"):
+            scores = (self.matrix @ dream_vec.T).toarray().ravel()
+        with stage("dream", "top_k"):
+            return top_k_indices(scores, k)
+
+    def measure_recall(self, queries, k=10, nprobe=None):
+        """
+        Recall@k and mean latency of the dense path for ``queries``: against
+        the exact TF-IDF scan (end to end) and against an exhaustive scan of
+        the LSA vectors (IVF probing loss alone).
+        """
+        if self.ivf is None:
+            self.build_dense()
+        vectors = self.lsa.transform(self.vectorizer.transform(queries))
+
+        start = time.perf_counter()
+        exact = [self.top_k(query, k, exact=True) for query in queries]
+        exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        start = time.perf_counter()
+        approx = [self.ivf.search(self.lsa.transform(self.vectorizer.transform([query]))[0], k, nprobe)[0]
+                  for query in queries]
+        ann_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        dense_exact = [self.ivf.search(vector, k, self.ivf.nlist)[0] for vector in vectors]
+        return {
+            "k": k,
+            "queries": len(queries),
+            "nlist": self.ivf.nlist,
+            "nprobe": min(nprobe or self.ivf.nprobe, self.ivf.nlist),
+            "dims": self.lsa.dims,
+            "recall_vs_exact": round(recall_at_k(exact, approx), 4),
+            "recall_vs_dense_scan": round(recall_at_k(dense_exact, approx), 4),
+            "exact_ms": round(exact_ms, 3),
+            "ann_ms": round(ann_ms, 3),
+        }
+
+    def match(self, dream_input, k=DEFAULT_TOP_K, formatted=False):
+        """
+        Return the ``k`` best matching destination records, best first, or
+        their precomputed response dicts when ``formatted`` is set.
+        """
+        rows = self.top_k(dream_input, k)
+        if formatted:
+            return [format_match(self.records[i]) for i in rows]
+        return [self.records.row_dict(i) for i in rows]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def load_dream_index(csv_path=DATA_FILE, index_path=INDEX_FILE, mode=DREAM_INDEX_MODE):
+    """
+    Load the compiled artifact if it matches the current CSV, otherwise
+    build the index from the CSV. ``mode`` selects exact or ANN search.
+    """
+    if os.path.exists(index_path):
+        try:
+            index = DreamIndex.load(index_path)
+            if index.version == data_version(csv_path):
+                return index.configure(mode)
+            logger.warning("⚠️  Dream index artifact is out of date; rebuilding from CSV")
+        except Exception as e:
+            logger.warning("⚠️  Could not load dream index artifact: %s", e)
+    return DreamIndex.build(csv_path).configure(mode)
+
+
+def get_dream_index():
+    """Return the process-wide dream index, loading it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = load_dream_index()
+    return _index
+
+
+def warm_up():
+    """Load the dream index ahead of the first request."""
+    return get_dream_index()
 
-# Vectorize using TF-IDF
-vectorizer = TfidfVectorizer()
-tfidf_matrix = vectorizer.fit_transform(df["combined"])
 
 # Function to match dream input
-def match_dream(dream_input):
-    dream_vec = vectorizer.transform([dream_input])
-    scores = cosine_similarity(dream_vec, tfidf_matrix).flatten()
-    top_indices = scores.argsort()[-3:][::-1]
-    results = df.iloc[top_indices]
-
-    matches = []
-    for _, row in results.iterrows():
-        # Convert row to dictionary and handle NaN values if necessary
-        destination = row.to_dict()
-        # Ensure ID is present and string
-        if 'id' not in destination:
-             destination['id'] = str(row.name) # Fallback to index if no ID
-        
-        matches.append(destination)
-    return matches
+def match_dream(dream_input, k=DEFAULT_TOP_K, formatted=False):
+    return get_dream_index().match(dream_input, k, formatted)
+
+
+# File signature the per-process index was loaded at (process-pool matching)
+_worker_signature = None
+
+
+def match_dream_in_worker(source, version, dream_input, k=DEFAULT_TOP_K, formatted=False):
+    """
+    Process-pool entry point: match against this process's index for the
+    parent snapshot's ``source`` and ``version``. Like recommender.worker_index,
+    the CSV is only re-read when it changes on disk, and StaleWorkerIndex is
+    raised when it no longer holds ``version``.
+    """
+    global _index, _worker_signature
+    with _index_lock:
+        if _index is None or _index.version != version:
+            if source != "files":
+                # Imported here: compiled_snapshot builds on this module
+                from app.utils.compiled_snapshot import CompiledSnapshot
+                _index = CompiledSnapshot(source).dream_index()
+            else:
+                signature = file_signature(DATA_FILE)
+                if _index is None or signature != _worker_signature:
+                    _index = load_dream_index()
+                    _worker_signature = signature
+            if _index.version != version:
+                raise StaleWorkerIndex(version, _index.version)
+    return _index.match(dream_input, k, formatted)
+
+
 # Example usage
 if __name__ == "__main__":
-    user_dream = input("Describe your dream (e.g., 'I saw red mountains and caves'): ")
-    match_dream(user_dream)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Dream matcher utilities")
+    subparsers = parser.add_subparsers(dest="command")
+    compile_parser = subparsers.add_parser("compile", help="Compile destinations.csv into a binary index artifact")
+    compile_parser.add_argument("--csv", default=DATA_FILE)
+    compile_parser.add_argument("--output", default=INDEX_FILE)
+    compile_parser.add_argument("--mode", choices=["exact", "ann", "auto"], default=DREAM_INDEX_MODE,
+                                help="ann also compiles the LSA projection and IVF index")
+    recall_parser = subparsers.add_parser("recall", help="Measure ANN recall@k and latency against the exact scan")
+    recall_parser.add_argument("--csv", default=DATA_FILE)
+    recall_parser.add_argument("--k", type=int, default=10)
+    recall_parser.add_argument("--queries", type=int, default=200, help="Sampled destination keyword queries")
+    recall_parser.add_argument("--nprobe", type=int, nargs="+", default=[IVF_NPROBE])
+    args = parser.parse_args()
+    configure_logging()
+
+    if args.command == "compile":
+        index = DreamIndex.build(args.csv).configure(args.mode)
+        index.save(args.output)
+        print(f"✅ Compiled {len(index.records)} destinations to {args.output}")
+    elif args.command == "recall":
+        index = DreamIndex.build(args.csv)
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(index.records), min(args.queries, len(index.records)), replace=False)
+        queries = [index.records[i].get("keywords") or index.records[i].get("description") or "" for i in sample]
+        for nprobe in args.nprobe:
+            print(index.measure_recall(queries, args.k, nprobe))
+    else:
+        user_dream = input("Describe your dream (e.g., 'I saw red mountains and caves'): ")
+        for match in match_dream(user_dream):
+            print(f"- {match['name']} ({match['country']})")
@@ -0,0 +1,156 @@
+"""
+Bounded execution layer for async endpoints
+Runs blocking I/O and CPU-bound scoring off the event loop, with admission limits and queue metrics
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.utils.metrics import EXECUTOR_WAIT_SECONDS, record_timing
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a pool already has ``max_pending`` tasks queued or running"""
+
+    def __init__(self, name: str, retry_after: float = 1.0):
+        super().__init__(f"{name} executor is saturated")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Wrap a concurrent.futures pool with an admission limit.
+
+    At most ``max_pending`` tasks may be queued or running at once; beyond
+    that ``run`` fails fast with ExecutorSaturated instead of growing an
+    unbounded backlog. Queue depth and wait times are tracked for /admin.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Executor], workers: int, max_pending: int):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._factory()
+        return self._executor
+
+    def _admit(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._counters['rejected'] += 1
+                raise ExecutorSaturated(self.name)
+            self._pending += 1
+            self._counters['submitted'] += 1
+
+    def _finished(self, waited: Optional[float], ok: bool):
+        with self._lock:
+            self._pending -= 1
+            self._counters['completed' if ok else 'failed'] += 1
+            if waited is not None:
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    async def run(self, fn: Callable, *args):
+        """Run ``fn(*args)`` on the pool and await its result"""
+        self._admit()
+        submitted_at = time.time()
+        waited = None
+        ok = False
+        try:
+            loop = asyncio.get_running_loop()
+            if isinstance(self.executor, ProcessPoolExecutor):
+                call = (_timed_call, fn, args)
+            else:
+                # Threads run in the caller's context so stage timings reach the request
+                call = (contextvars.copy_context().run, _timed_call, fn, args)
+            started_at, result = await loop.run_in_executor(self.executor, *call)
+            waited = max(0.0, started_at - submitted_at)
+            EXECUTOR_WAIT_SECONDS.observe(waited, executor=self.name)
+            record_timing(f'{self.name}_wait', waited)
+            ok = True
+            return result
+        finally:
+            self._finished(waited, ok)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            completed = counters['completed']
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'queue_depth': max(0, self._pending - self.workers),
+                'avg_wait_ms': round(1000 * self._wait_total / completed, 3) if completed else 0.0,
+                'max_wait_ms': round(1000 * self._wait_max, 3),
+                **counters,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _timed_call(fn: Callable, args: tuple):
+    """Run in the worker; returns the wall-clock start time so queue wait can be measured"""
+    return time.time(), fn(*args)
+
+
+def _thread_pool(name: str, workers: int) -> Callable[[], Executor]:
+    return lambda: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+
+IO_WORKERS = int(os.getenv('IO_WORKERS', 32))
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', os.cpu_count() or 2))
+# Set CPU_PROCESSES=true to score in worker processes instead of threads
+CPU_PROCESSES = os.getenv('CPU_PROCESSES', 'false').lower() == 'true'
+
+io_executor = BoundedExecutor(
+    'io', _thread_pool('io', IO_WORKERS), IO_WORKERS,
+    max_pending=int(os.getenv('IO_QUEUE_LIMIT', IO_WORKERS * 8))
+)
+cpu_executor = BoundedExecutor(
+    'cpu',
+    (lambda: ProcessPoolExecutor(max_workers=CPU_WORKERS)) if CPU_PROCESSES else _thread_pool('cpu', CPU_WORKERS),
+    CPU_WORKERS,
+    max_pending=int(os.getenv('CPU_QUEUE_LIMIT', CPU_WORKERS * 16))
+)
+# In-process scoring while the CPU worker processes hold an older snapshot
+# (CPU_PROCESSES only); kept apart from the I/O pool and bounded like the CPU pool
+CPU_LOCAL_WORKERS = int(os.getenv('CPU_LOCAL_WORKERS', 2))
+cpu_local_executor = BoundedExecutor(
+    'cpu_local', _thread_pool('cpu_local', CPU_LOCAL_WORKERS), CPU_LOCAL_WORKERS,
+    max_pending=int(os.getenv('CPU_LOCAL_QUEUE_LIMIT', CPU_LOCAL_WORKERS * 16))
+)
+
+
+def executor_stats() -> Dict[str, Dict]:
+    return {
+        'io': io_executor.stats(),
+        'cpu': {**cpu_executor.stats(), 'processes': CPU_PROCESSES},
+        'cpu_local': cpu_local_executor.stats(),
+    }
+
+
+def shutdown_executors():
+    io_executor.shutdown()
+    cpu_executor.shutdown()
+    cpu_local_executor.shutdown()
@@ -0,0 +1,249 @@
+"""
+Federated live search
+Queries every enabled provider (OpenTripMap, Geoapify, Amadeus) concurrently,
+each under its own deadline, and merges whatever came back in time. A
+provider that misses its deadline is cancelled; the places it had already
+delivered are kept. The same place reported twice (by one provider or
+several) is merged using coordinates and normalized names.
+
+Settings:
+    FEDERATION_PROVIDERS     providers to query, in merge priority order
+                             (default opentripmap,geoapify,amadeus; each is
+                             skipped unless its API is configured)
+    FEDERATION_DEADLINE_MS   per-provider deadline (default 2500)
+    <PROVIDER>_DEADLINE_MS   override for one provider, e.g. AMADEUS_DEADLINE_MS
+    FEDERATION_DEDUP_METERS  places with matching names closer than this are one place (default 250)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import aclosing
+from itertools import chain, zip_longest
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.utils.amadeus_client import get_amadeus_client, get_async_amadeus_client
+from app.utils.geoapify_client import get_async_geoapify_client, get_geoapify_client
+from app.utils.metrics import FEDERATION_CALLS, FEDERATION_DUPLICATES
+from app.utils.opentripmap_client import get_async_opentripmap_client, get_opentripmap_client
+from app.utils.places import coordinates, haversine_m, normalize_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDERS = 'opentripmap,geoapify,amadeus'
+DEADLINE_MS = float(os.getenv('FEDERATION_DEADLINE_MS', '2500'))
+DEDUP_METERS = float(os.getenv('FEDERATION_DEDUP_METERS', '250'))
+
+# Names shorter than this only match exactly ("Fort" must not swallow "Red Fort")
+_MIN_CONTAINED_NAME = 5
+
+
+async def _opentripmap_places(budget, weather, activities, limit) -> AsyncIterator[Dict]:
+    places = get_async_opentripmap_client().stream_places(
+        budget=budget, activities=activities, weather=weather, limit=limit
+    )
+    async with aclosing(places):
+        async for place in places:
+            yield place
+
+
+async def _geoapify_places(budget, weather, activities, limit) -> AsyncIterator[Dict]:
+    for place in await get_async_geoapify_client().search_places(
+        budget=budget, activities=activities, weather=weather, limit=limit
+    ):
+        yield place
+
+
+async def _amadeus_places(budget, weather, activities, limit) -> AsyncIterator[Dict]:
+    for place in await get_async_amadeus_client().search_destinations(
+        budget=budget, activities=activities, limit=limit
+    ):
+        yield place
+
+
+def _geoapify_enabled() -> bool:
+    client = get_geoapify_client()
+    return bool(client.use_api and client.api_key)
+
+
+class Provider:
+    """One live source: its places as an async iterator, and how long to wait for them"""
+
+    def __init__(self, name: str, places: Callable[..., AsyncIterator[Dict]],
+                 enabled: Callable[[], bool], deadline: float):
+        self.name = name
+        self.places = places
+        self.enabled = enabled
+        self.deadline = deadline
+
+
+PROVIDERS = {
+    'opentripmap': (_opentripmap_places, lambda: get_opentripmap_client()._is_configured()),
+    'geoapify': (_geoapify_places, _geoapify_enabled),
+    'amadeus': (_amadeus_places, lambda: get_amadeus_client()._is_configured()),
+}
+
+
+def providers_from_env() -> List[Provider]:
+    providers = []
+    for name in os.getenv('FEDERATION_PROVIDERS', DEFAULT_PROVIDERS).split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in PROVIDERS:
+            logger.warning("⚠️  Unknown federation provider %r ignored", name)
+            continue
+        places, enabled = PROVIDERS[name]
+        deadline = float(os.getenv(f'{name.upper()}_DEADLINE_MS', DEADLINE_MS)) / 1000
+        providers.append(Provider(name, places, enabled, deadline))
+    return providers
+
+
+class PlaceMerger:
+    """
+    Collects places in arrival order, folding duplicates into the first copy.
+
+    Two places are the same when both have coordinates within ``radius_m``
+    of each other and their normalized names match (or one contains the
+    other), or when neither has coordinates and name and country match.
+    A duplicate only fills in fields the kept copy is missing.
+    """
+
+    def __init__(self, radius_m: float = DEDUP_METERS):
+        self.radius_m = radius_m
+        self.places: List[Dict] = []
+        self._keys: List[Tuple[str, Optional[Tuple[float, float]], str]] = []
+
+    def add(self, place: Dict) -> bool:
+        """Keep ``place`` unless it duplicates one already kept; True if kept"""
+        key = (normalize_name(place.get('name', '')), coordinates(place), normalize_name(place.get('country', '')))
+        for kept, kept_key in zip(self.places, self._keys):
+            if self._same(key, kept_key):
+                for field, value in place.items():
+                    if value and not kept.get(field):
+                        kept[field] = value
+                FEDERATION_DUPLICATES.inc()
+                return False
+        self.places.append(place)
+        self._keys.append(key)
+        return True
+
+    def _same(self, a, b) -> bool:
+        (name_a, point_a, country_a), (name_b, point_b, country_b) = a, b
+        if not name_a or not name_b:
+            return False
+        if point_a is None or point_b is None:
+            return point_a is None and point_b is None and name_a == name_b and country_a == country_b
+        if haversine_m(point_a, point_b) > self.radius_m:
+            return False
+        if name_a == name_b:
+            return True
+        shorter, longer = sorted((name_a, name_b), key=len)
+        return len(shorter) >= _MIN_CONTAINED_NAME and f' {shorter} ' in f' {longer} '
+
+
+class FederatedSearch:
+    """Concurrent search across providers with per-provider deadlines"""
+
+    def __init__(self, providers: Sequence[Provider], dedup_meters: float = DEDUP_METERS):
+        self.providers = list(providers)
+        self.dedup_meters = dedup_meters
+
+    def enabled(self) -> List[Provider]:
+        return [provider for provider in self.providers if provider.enabled()]
+
+    async def search(self, budget, weather, activities, limit: int = 5) -> List[Dict]:
+        """
+        Up to ``limit`` merged places. Providers are interleaved in priority
+        order, so every provider that answered in time is represented.
+        """
+        providers = self.enabled()
+        if not providers:
+            return []
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            self._collect(provider, (budget, weather, activities, limit), []) for provider in providers
+        ))
+        merger = PlaceMerger(self.dedup_meters)
+        for place in chain.from_iterable(zip_longest(*results)):
+            if place is not None:
+                merger.add(place)
+
+        logger.debug("🔀 Federated search merged %d places in %.0f ms", len(merger.places),
+                     (time.perf_counter() - start) * 1000,
+                     extra={'providers': {p.name: len(r) for p, r in zip(providers, results)}})
+        return merger.places[:limit]
+
+    async def stream(self, budget, weather, activities, limit: int = 5) -> AsyncIterator[Dict]:
+        """
+        Yield up to ``limit`` merged places as soon as any provider delivers
+        them. Providers still running when the stream ends are cancelled.
+        """
+        providers = self.enabled()
+        if not providers:
+            return
+
+        arrivals: asyncio.Queue = asyncio.Queue()
+        tasks = [
+            asyncio.ensure_future(self._collect(provider, (budget, weather, activities, limit), arrivals))
+            for provider in providers
+        ]
+        for task in tasks:
+            # A None marks a finished provider
+            task.add_done_callback(lambda _: arrivals.put_nowait(None))
+
+        merger = PlaceMerger(self.dedup_meters)
+        running = len(tasks)
+        sent = 0
+        try:
+            while running and sent < limit:
+                place = await arrivals.get()
+                if place is None:
+                    running -= 1
+                elif merger.add(place):
+                    sent += 1
+                    yield place
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _collect(self, provider: Provider, query: Tuple, sink) -> List[Dict]:
+        """
+        Gather one provider's places into ``sink`` (a list, or a queue for
+        streaming) until it finishes or its deadline passes.
+        """
+        add = sink.put_nowait if isinstance(sink, asyncio.Queue) else sink.append
+        count = 0
+
+        async def drain():
+            nonlocal count
+            async with aclosing(provider.places(*query)) as places:
+                async for place in places:
+                    count += 1
+                    add(place)
+
+        try:
+            await asyncio.wait_for(drain(), provider.deadline)
+            outcome = 'ok' if count else 'empty'
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            logger.debug("⏱️  %s missed its %.0f ms deadline; keeping %d places",
+                         provider.name, provider.deadline * 1000, count)
+        except Exception as e:
+            outcome = 'error'
+            logger.warning("⚠️  %s search failed: %s", provider.name, e)
+        FEDERATION_CALLS.inc(provider=provider.name, outcome=outcome)
+        return sink
+
+
+# Created on first use, like the provider clients
+_federated_search = None
+
+
+def get_federated_search() -> FederatedSearch:
+    global _federated_search
+    if _federated_search is None:
+        _federated_search = FederatedSearch(providers_from_env())
+    return _federated_search
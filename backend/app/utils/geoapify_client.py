@@ -3,21 +3,33 @@ Geoapify Places API Client
 Fetches real destination data from Geoapify API
 """
 
+import asyncio
+import logging
 import os
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
+import httpx
 import requests
 
+from app.utils.http_client import get_async_http_client
+from app.utils.circuit_breaker import CircuitOpenError, get_breaker
+from app.utils.response_cache import ResponseCache
+from app.utils.metrics import track_upstream
+from app.utils.places import stable_place_id
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class GeoapifyClient:
     """Client for Geoapify Places API"""
     
     def __init__(self):
         self.api_key = os.getenv('GEOAPIFY_API_KEY')
-        self.base_url = 'https://api.geoapify.com/v2'
+        self.base_url = os.getenv('GEOAPIFY_BASE_URL', 'https://api.geoapify.com/v2').rstrip('/')
         self.use_api = os.getenv('USE_GEOAPIFY_API', 'false').lower() == 'true'
+        self.breaker = get_breaker('geoapify')
         
     def search_places(self, 
                      budget: str = None,
@@ -40,6 +52,35 @@ class GeoapifyClient:
             # Return empty list to use fallback destinations.json
             return []
         
+        url, params = self._search_request(activities, limit)
+        key = ResponseCache.make_key(url, params)
+        if not self.breaker.allow(key):
+            # Provider is failing; skip straight to local data
+            return []
+        
+        try:
+            with track_upstream('geoapify', 'places') as call:
+                call.response = response = requests.get(url, params=params, timeout=10)
+            
+            # Check for errors
+            if response.status_code == 400:
+                self.breaker.record_failure(key)
+                return self._bad_request(response.json() if response.text else {})
+            
+            response.raise_for_status()
+            self.breaker.record_success()
+            return self._handle_response(response.json(), budget)
+        except requests.exceptions.Timeout:
+            self.breaker.record_failure(key)
+            logger.warning("⚠️  Geoapify API timeout. Using fallback data.")
+            return []
+        except Exception as e:
+            self.breaker.record_failure(key)
+            logger.warning("⚠️  Error fetching places from Geoapify: %s", e)
+            return []
+
+    def _search_request(self, activities: List[str], limit: int):
+        """Build the /places URL and params for an India-wide search"""
         # Map activities to Geoapify categories
         categories = self._map_activities_to_categories(activities or [])
         
@@ -62,34 +103,22 @@ class GeoapifyClient:
             'limit': limit,
             'apiKey': self.api_key
         }
-        
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            
-            # Check for errors
-            if response.status_code == 400:
-                error_data = response.json() if response.text else {}
-                print(f"⚠️  Geoapify API returned 400 error. Using fallback data.")
-                print(f"   Error: {error_data.get('message', 'Unknown error')}")
-                return []
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            # Transform API response to our format
-            features = data.get('features', [])
-            if not features:
-                print("⚠️  Geoapify API returned no features. Using fallback data.")
-                return []
-            
-            print(f"✅ Fetched {len(features)} places from Geoapify API")
-            return self._transform_api_response(features, budget)
-        except requests.exceptions.Timeout:
-            print(f"⚠️  Geoapify API timeout. Using fallback data.")
-            return []
-        except Exception as e:
-            print(f"⚠️  Error fetching places from Geoapify: {e}")
+        return url, params
+
+    def _bad_request(self, error_data: Dict) -> List[Dict]:
+        logger.warning("⚠️  Geoapify API returned 400 error. Using fallback data.",
+                       extra={'error': error_data.get('message', 'Unknown error')})
+        return []
+
+    def _handle_response(self, data: Dict, budget: str) -> List[Dict]:
+        # Transform API response to our format
+        features = data.get('features', [])
+        if not features:
+            logger.warning("⚠️  Geoapify API returned no features. Using fallback data.")
             return []
+        
+        logger.debug("✅ Fetched %d places from Geoapify API", len(features))
+        return self._transform_api_response(features, budget)
     
     def _map_activities_to_categories(self, activities: List[str]) -> List[str]:
         """Map user activities to Geoapify categories"""
@@ -119,7 +148,7 @@ class GeoapifyClient:
         """Transform Geoapify API response to our destination format"""
         destinations = []
         
-        for idx, feature in enumerate(features):
+        for feature in features:
             props = feature.get('properties', {})
             
             # Get place details
@@ -141,7 +170,7 @@ class GeoapifyClient:
             image_url = self._get_image_for_place(name, props.get('categories', []))
             
             destination = {
-                'id': idx + 1,
+                'id': stable_place_id('geoapify', props.get('place_id') or f"{name}@{lat},{lon}"),
                 'name': name,
                 'country': country,
                 'description': description,
@@ -152,7 +181,9 @@ class GeoapifyClient:
                 'best_season': ['Year-round'],
                 'image': image_url,
                 'googlemap_link': f"https://maps.google.com/?q={lat},{lon}",
-                'tags': props.get('categories', [])[:3]
+                'tags': props.get('categories', [])[:3],
+                'latitude': lat,
+                'longitude': lon
             }
             destinations.append(destination)
         
@@ -208,5 +239,78 @@ class GeoapifyClient:
         return 'https://images.unsplash.com/photo-1524492412937-b28074a5d7da?w=800'
 
 
-# Create singleton instance
-geoapify_client = GeoapifyClient()
+class AsyncGeoapifyClient:
+    """Async counterpart of GeoapifyClient using the shared pooled HTTP client"""
+
+    def __init__(self, base: GeoapifyClient):
+        self.base = base
+
+    async def search_places(self,
+                            budget: str = None,
+                            activities: List[str] = None,
+                            weather: List[str] = None,
+                            limit: int = 10) -> List[Dict]:
+        """Async version of GeoapifyClient.search_places"""
+        base = self.base
+        if not base.use_api or not base.api_key:
+            return []
+
+        url, params = base._search_request(activities, limit)
+        key = ResponseCache.make_key(url, params)
+        try:
+            probe = base.breaker.before_call(key)
+        except CircuitOpenError:
+            return []
+
+        try:
+            with track_upstream('geoapify', 'places') as call:
+                call.response = response = await get_async_http_client().get(url, params=params, timeout=10)
+
+            if response.status_code == 400:
+                base.breaker.record_failure(key)
+                return base._bad_request(response.json() if response.text else {})
+
+            response.raise_for_status()
+            base.breaker.record_success()
+            return base._handle_response(response.json(), budget)
+        except httpx.TimeoutException:
+            base.breaker.record_failure(key)
+            logger.warning("⚠️  Geoapify API timeout. Using fallback data.")
+            return []
+        except Exception as e:
+            base.breaker.record_failure(key)
+            logger.warning("⚠️  Error fetching places from Geoapify: %s", e)
+            return []
+        except asyncio.CancelledError:
+            # Cut off by a caller's deadline: no verdict on the provider
+            if probe:
+                base.breaker.release_probe()
+            raise
+
+
+# Singleton instances are created on first use so importing this module stays cheap
+_geoapify_client = None
+_async_geoapify_client = None
+
+
+def get_geoapify_client() -> GeoapifyClient:
+    global _geoapify_client
+    if _geoapify_client is None:
+        _geoapify_client = GeoapifyClient()
+    return _geoapify_client
+
+
+def get_async_geoapify_client() -> AsyncGeoapifyClient:
+    global _async_geoapify_client
+    if _async_geoapify_client is None:
+        _async_geoapify_client = AsyncGeoapifyClient(get_geoapify_client())
+    return _async_geoapify_client
+
+
+def __getattr__(name):
+    # Keep `from app.utils.geoapify_client import geoapify_client` working for scripts
+    if name == 'geoapify_client':
+        return get_geoapify_client()
+    if name == 'async_geoapify_client':
+        return get_async_geoapify_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
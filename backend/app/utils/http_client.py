@@ -0,0 +1,33 @@
+"""
+Shared async HTTP client
+One pooled httpx.AsyncClient per process, reused by all async upstream clients
+"""
+
+import os
+from typing import Optional
+
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(float(os.getenv('HTTP_TIMEOUT', 10))),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', 100)),
+                max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE', 20)),
+            ),
+        )
+    return _client
+
+
+async def close_async_http_client():
+    """Close the shared client and its connection pool (call on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
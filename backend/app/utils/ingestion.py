@@ -0,0 +1,510 @@
+"""
+Offline OpenTripMap ingestion
+Crawls OpenTripMap ahead of time into the local catalog, so live mode
+(USE_API) can be switched off and every request served from the local index.
+
+The India box searched by OpenTripMapClient is cut into a grid and /bbox is
+queried per tile for every kind in ACTIVITY_KINDS. /bbox has no paging beyond
+``limit``, so a tile that comes back full is split into quarters until every
+tile fits in one page. Listed xids get their /xid details fetched concurrently
+under a shared rate limit and are transformed with the live client's
+_transform_place_to_destination, so ids and fields match live results;
+budget, weather, group and season are left empty rather than invented.
+
+Progress lives in a SQLite file: tiles and place details fetched within
+their TTL are skipped, so an interrupted crawl resumes where it stopped and
+a rerun only refreshes what went stale. The export streams the crawled
+places into destinations.json / destinations.csv (atomically replaced).
+
+Usage:
+    python -m app.utils.ingestion crawl [--kinds natural,beaches] [--bbox 74,14,76,16]
+    python -m app.utils.ingestion export [--out-dir ingested] [--include-base]
+    python -m app.utils.ingestion status
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.utils.data_loader import DESTINATIONS_FILE
+from app.utils.dream_matcher import DATA_FILE as DREAM_CSV_FILE
+from app.utils.http_client import close_async_http_client
+from app.utils.logging_setup import configure_logging
+from app.utils.opentripmap_client import (ACTIVITY_KINDS, DEFAULT_KINDS, INDIA_BBOX, OpenTripMapClient,
+                                          get_async_opentripmap_client)
+from app.utils.response_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv('INGEST_DB_PATH', os.path.join(CACHE_DIR, 'ingest_opentripmap.sqlite3'))
+OUT_DIR = os.getenv('INGEST_OUT_DIR', 'ingested')
+RATE = float(os.getenv('INGEST_RATE', 8))
+CONCURRENCY = int(os.getenv('INGEST_CONCURRENCY', 8))
+TILE_DEG = float(os.getenv('INGEST_TILE_DEG', 1.0))
+MIN_TILE_DEG = float(os.getenv('INGEST_MIN_TILE_DEG', 0.0625))
+PAGE_SIZE = int(os.getenv('INGEST_PAGE_SIZE', 500))
+TILE_TTL = float(os.getenv('INGEST_TILE_TTL_DAYS', 7)) * 86400
+DETAILS_TTL = float(os.getenv('INGEST_DETAILS_TTL_DAYS', 30)) * 86400
+RETRIES = 4
+
+# (lon_min, lat_min, lon_max, lat_max)
+Box = Tuple[float, float, float, float]
+
+
+def crawl_kinds() -> List[str]:
+    """Every single kind the live search can ask for"""
+    kinds = set(DEFAULT_KINDS.split(','))
+    for value in ACTIVITY_KINDS.values():
+        kinds.update(value.split(','))
+    return sorted(kinds)
+
+
+def grid(box: Box, tile_deg: float) -> Iterator[Box]:
+    """Tiles of ``tile_deg`` covering ``box``; the last row and column are clipped to it"""
+    lon_min, lat_min, lon_max, lat_max = box
+    for row in range(math.ceil((lat_max - lat_min) / tile_deg)):
+        for col in range(math.ceil((lon_max - lon_min) / tile_deg)):
+            west, south = lon_min + col * tile_deg, lat_min + row * tile_deg
+            yield (round(west, 6), round(south, 6),
+                   round(min(west + tile_deg, lon_max), 6), round(min(south + tile_deg, lat_max), 6))
+
+
+def quarters(box: Box) -> List[Box]:
+    lon_min, lat_min, lon_max, lat_max = box
+    lon_mid, lat_mid = round((lon_min + lon_max) / 2, 6), round((lat_min + lat_max) / 2, 6)
+    return [(lon_min, lat_min, lon_mid, lat_mid), (lon_mid, lat_min, lon_max, lat_mid),
+            (lon_min, lat_mid, lon_mid, lat_max), (lon_mid, lat_mid, lon_max, lat_max)]
+
+
+def tile_key(kind: str, box: Box) -> str:
+    return f"{kind}|" + ','.join(f'{value:.6f}' for value in box)
+
+
+def to_destination(client: OpenTripMapClient, place: Dict) -> Optional[Dict]:
+    """
+    Transform /xid details like a live result, minus the placeholders the live
+    client fills in for a user's query: OpenTripMap knows nothing about budget,
+    season or who a place suits, so those stay empty (unknown to the pre-filter).
+    """
+    destination = client._transform_place_to_destination(place, None)
+    if destination:
+        destination.update(avg_budget='', weather=[], travel_with=[], best_season=[])
+    return destination
+
+
+class IngestStore:
+    """
+    Crawl state: which tiles were searched (and split) when, and each
+    listed place with its transformed destination once details are in.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS tiles ('
+            ' key TEXT PRIMARY KEY,'
+            ' fetched_at REAL NOT NULL,'
+            ' features INTEGER NOT NULL,'
+            ' split INTEGER NOT NULL)'
+        )
+        # fetched_at stays NULL until details arrive; destination is NULL for places
+        # that have none worth keeping (unnamed, or gone upstream)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS places ('
+            ' xid TEXT PRIMARY KEY,'
+            ' listed_at REAL NOT NULL,'
+            ' fetched_at REAL,'
+            ' destination TEXT,'
+            ' failures INTEGER NOT NULL DEFAULT 0)'
+        )
+
+    def tile(self, key: str) -> Optional[Tuple[float, bool]]:
+        """(fetched_at, split) of a searched tile, or None"""
+        row = self._conn.execute('SELECT fetched_at, split FROM tiles WHERE key = ?', (key,)).fetchone()
+        return (row[0], bool(row[1])) if row else None
+
+    def record_tile(self, key: str, xids: Sequence[str], features: int, split: bool,
+                    stale_before: float) -> List[str]:
+        """
+        Store a tile's search result and the places it listed, in one
+        transaction; returns the listed xids whose details need fetching.
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.execute('BEGIN')
+            self._conn.executemany(
+                'INSERT INTO places (xid, listed_at) VALUES (?, ?)'
+                ' ON CONFLICT(xid) DO UPDATE SET listed_at = excluded.listed_at',
+                [(xid, now) for xid in xids]
+            )
+            self._conn.execute('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)', (key, now, features, int(split)))
+        return [xid for xid in xids if not self._fresh(xid, stale_before)]
+
+    def _fresh(self, xid: str, stale_before: float) -> bool:
+        row = self._conn.execute('SELECT fetched_at FROM places WHERE xid = ?', (xid,)).fetchone()
+        return bool(row and row[0] is not None and row[0] >= stale_before)
+
+    def pending(self, stale_before: float) -> List[str]:
+        """Listed places still without fresh details (new, stale or failed last time)"""
+        return [row[0] for row in self._conn.execute(
+            'SELECT xid FROM places WHERE fetched_at IS NULL OR fetched_at < ? ORDER BY rowid', (stale_before,)
+        )]
+
+    def record_details(self, xid: str, destination: Optional[Dict]):
+        self._conn.execute(
+            'UPDATE places SET fetched_at = ?, destination = ?, failures = 0 WHERE xid = ?',
+            (time.time(), json.dumps(destination) if destination else None, xid)
+        )
+
+    def record_failure(self, xid: str):
+        self._conn.execute('UPDATE places SET failures = failures + 1 WHERE xid = ?', (xid,))
+
+    def destinations(self) -> Iterator[Dict]:
+        """Crawled destinations in discovery order"""
+        for (value,) in self._conn.execute(
+            'SELECT destination FROM places WHERE destination IS NOT NULL ORDER BY rowid'
+        ):
+            yield json.loads(value)
+
+    def stats(self, tile_stale_before: float, details_stale_before: float) -> Dict:
+        tiles = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(fetched_at >= ?), 0), COALESCE(SUM(split), 0) FROM tiles',
+            (tile_stale_before,)
+        ).fetchone()
+        places = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(destination IS NOT NULL), 0),'
+            ' COALESCE(SUM(fetched_at IS NOT NULL AND destination IS NULL), 0),'
+            ' COALESCE(SUM(fetched_at IS NULL OR fetched_at < ?), 0), COALESCE(SUM(failures > 0), 0)'
+            ' FROM places',
+            (details_stale_before,)
+        ).fetchone()
+        return {
+            'path': self.path,
+            'tiles': {'searched': tiles[0], 'fresh': tiles[1], 'split': tiles[2]},
+            'places': {'listed': places[0], 'destinations': places[1], 'skipped': places[2],
+                       'pending': places[3], 'failing': places[4]},
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+class RateLimiter:
+    """Spaces requests evenly at ``rate`` per second across all workers"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + 1 / self.rate
+        await asyncio.sleep(slot - now)
+
+    def pause(self, seconds: float):
+        """Hold every worker back, e.g. after a 429"""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class Crawler:
+    """One crawl over ``kinds`` x the tiles of ``box``"""
+
+    def __init__(self, store: IngestStore,
+                 kinds: Sequence[str],
+                 box: Box = tuple(INDIA_BBOX.values()),
+                 tile_deg: float = TILE_DEG,
+                 min_tile_deg: float = MIN_TILE_DEG,
+                 page_size: int = PAGE_SIZE,
+                 rate: float = RATE,
+                 concurrency: int = CONCURRENCY,
+                 tile_ttl: float = TILE_TTL,
+                 details_ttl: float = DETAILS_TTL):
+        self.store = store
+        self.kinds = list(kinds)
+        self.box = box
+        self.tile_deg = tile_deg
+        self.min_tile_deg = min_tile_deg
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.tile_ttl = tile_ttl
+        self.details_ttl = details_ttl
+        self.limiter = RateLimiter(rate)
+        self.client = get_async_opentripmap_client()
+        self.counters = {'tiles_searched': 0, 'tiles_fresh': 0, 'tiles_split': 0, 'tiles_failed': 0,
+                         'details_fetched': 0, 'details_fresh': 0, 'details_failed': 0, 'destinations': 0}
+        self._queued = set()
+
+    async def run(self) -> Dict:
+        try:
+            return await self._run()
+        finally:
+            await close_async_http_client()
+
+    async def _run(self) -> Dict:
+        now = time.time()
+        self._tile_stale_before = now - self.tile_ttl
+        self._details_stale_before = now - self.details_ttl
+        tiles: asyncio.Queue = asyncio.Queue()
+        details: asyncio.Queue = asyncio.Queue()
+
+        # Details left over from an interrupted run go first
+        for xid in self.store.pending(self._details_stale_before):
+            self._enqueue(details, xid)
+        for kind in self.kinds:
+            for box in grid(self.box, self.tile_deg):
+                tiles.put_nowait((kind, box))
+
+        workers = [asyncio.ensure_future(self._tile_worker(tiles, details)) for _ in range(min(4, self.concurrency))]
+        workers += [asyncio.ensure_future(self._details_worker(details)) for _ in range(self.concurrency)]
+        reporter = asyncio.ensure_future(self._report())
+        try:
+            await tiles.join()
+            await details.join()
+        finally:
+            for task in workers + [reporter]:
+                task.cancel()
+            await asyncio.gather(*workers, reporter, return_exceptions=True)
+        return self.counters
+
+    def _enqueue(self, details: asyncio.Queue, xid: str):
+        if xid in self._queued:
+            return
+        self._queued.add(xid)
+        details.put_nowait(xid)
+
+    async def _tile_worker(self, tiles: asyncio.Queue, details: asyncio.Queue):
+        while True:
+            kind, box = await tiles.get()
+            try:
+                await self._search_tile(kind, box, tiles, details)
+            except Exception as e:
+                # Left unrecorded, so the next run searches it again
+                self.counters['tiles_failed'] += 1
+                logger.warning("⚠️  Search of %s tile %s failed: %s", kind, box, e)
+            finally:
+                tiles.task_done()
+
+    async def _search_tile(self, kind: str, box: Box, tiles: asyncio.Queue, details: asyncio.Queue):
+        key = tile_key(kind, box)
+        state = self.store.tile(key)
+        if state is not None and state[0] >= self._tile_stale_before:
+            if state[1]:
+                for quarter in quarters(box):
+                    tiles.put_nowait((kind, quarter))
+            else:
+                self.counters['tiles_fresh'] += 1
+            return
+
+        lon_min, lat_min, lon_max, lat_max = box
+        params = {'lon_min': lon_min, 'lat_min': lat_min, 'lon_max': lon_max, 'lat_max': lat_max,
+                  'kinds': kind, 'limit': self.page_size, 'apikey': self.client.base.api_key}
+        places = await self._get(f'{self.client.base.base_url}/bbox', params, timeout=10)
+        features = places.get('features', []) if places else []
+        self.counters['tiles_searched'] += 1
+
+        full = len(features) >= self.page_size
+        if full and (lon_max - lon_min) / 2 >= self.min_tile_deg:
+            # More places than one page holds: search the quarters instead
+            self.store.record_tile(key, [], len(features), True, self._details_stale_before)
+            self.counters['tiles_split'] += 1
+            for quarter in quarters(box):
+                tiles.put_nowait((kind, quarter))
+            return
+        if full:
+            logger.warning("⚠️  %s tile %s is full at the minimum tile size; some places are missed", kind, box)
+
+        xids = list(dict.fromkeys(
+            feature['properties']['xid'] for feature in features if feature.get('properties', {}).get('xid')
+        ))
+        stale = self.store.record_tile(key, xids, len(features), False, self._details_stale_before)
+        self.counters['details_fresh'] += len(xids) - len(stale)
+        for xid in stale:
+            self._enqueue(details, xid)
+
+    async def _details_worker(self, details: asyncio.Queue):
+        base = self.client.base
+        while True:
+            xid = await details.get()
+            try:
+                try:
+                    place = await self._get(f'{base.base_url}/xid/{xid}', {'apikey': base.api_key}, timeout=5)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code != 404:
+                        raise
+                    place = None  # Gone upstream
+                destination = to_destination(base, place) if place else None
+                self.store.record_details(xid, destination)
+                self.counters['details_fetched'] += 1
+                self.counters['destinations'] += destination is not None
+            except Exception as e:
+                self.store.record_failure(xid)
+                self.counters['details_failed'] += 1
+                logger.warning("⚠️  Details for %s failed: %s", xid, e)
+            finally:
+                details.task_done()
+
+    async def _get(self, url: str, params: Dict, timeout: float):
+        """
+        GET under the rate limit, retrying 429s, 5xx and transport errors with
+        backoff. This bypasses the live client's cache and circuit breaker: a
+        batch job should wait out an upstream problem, not fail fast.
+        """
+        for attempt in range(RETRIES + 1):
+            await self.limiter.acquire()
+            try:
+                return await self.client._request_json(url, params, timeout)
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if attempt == RETRIES or (status != 429 and status < 500):
+                    raise
+                delay = 2 ** attempt
+                if status == 429:
+                    try:
+                        delay = max(delay, float(e.response.headers.get('Retry-After', 0)))
+                    except ValueError:
+                        pass
+                    self.limiter.pause(delay)
+            except httpx.TransportError:
+                if attempt == RETRIES:
+                    raise
+                delay = 2 ** attempt
+            await asyncio.sleep(delay)
+
+    async def _report(self, interval: float = 10.0):
+        while True:
+            await asyncio.sleep(interval)
+            logger.info("🔄 Ingestion: %s", ', '.join(f'{name} {value}' for name, value in self.counters.items()))
+
+
+def keywords(destination: Dict) -> str:
+    """Dream-matcher keywords for a crawled place: its kinds and activities as words"""
+    words = []
+    for value in destination.get('tags', []) + destination.get('activities', []):
+        words.extend(value.lower().replace('_', ' ').split())
+    return ' '.join(dict.fromkeys(words))
+
+
+def export_catalog(store: IngestStore, out_dir: str = OUT_DIR, include_base: bool = False) -> int:
+    """
+    Stream the crawled destinations to ``out_dir``/destinations.json and
+    destinations.csv (optionally after the hand-written catalog's rows).
+    Both files are written beside their targets and swapped in atomically.
+    Returns the number of destinations written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    json_path = os.path.join(out_dir, 'destinations.json')
+    csv_path = os.path.join(out_dir, 'destinations.csv')
+    base_json, base_csv = os.path.abspath(DESTINATIONS_FILE), os.path.abspath(DREAM_CSV_FILE)
+    if base_json == os.path.abspath(json_path) or base_csv == os.path.abspath(csv_path):
+        raise ValueError('Export next to the hand-written catalog, not over it')
+
+    json_file = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=out_dir, suffix='.tmp', delete=False)
+    csv_file = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', dir=out_dir, suffix='.tmp', delete=False)
+    count = 0
+    try:
+        with json_file, csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['name', 'country', 'description', 'keywords'])
+            json_file.write('[')
+
+            if include_base:
+                with open(base_json, 'r', encoding='utf-8') as f:
+                    base = json.load(f)
+                for record in base:
+                    json_file.write(',\n  ' if count else '\n  ')
+                    json_file.write(json.dumps(record, ensure_ascii=False))
+                    count += 1
+                with open(base_csv, 'r', encoding='utf-8', newline='') as f:
+                    rows = csv.reader(f)
+                    next(rows, None)
+                    writer.writerows(rows)
+
+            for destination in store.destinations():
+                json_file.write(',\n  ' if count else '\n  ')
+                json_file.write(json.dumps(destination, ensure_ascii=False))
+                writer.writerow([destination['name'], destination['country'], destination['description'],
+                                 keywords(destination)])
+                count += 1
+            json_file.write('\n]\n')
+        os.replace(json_file.name, json_path)
+        os.replace(csv_file.name, csv_path)
+    except BaseException:
+        for path in (json_file.name, csv_file.name):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return count
+
+
+def _box(value: str) -> Box:
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4 or parts[0] >= parts[2] or parts[1] >= parts[3]:
+        raise argparse.ArgumentTypeError('expected lon_min,lat_min,lon_max,lat_max')
+    return tuple(parts)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Crawl OpenTripMap into the local catalog')
+    parser.add_argument('--db', default=DB_PATH, help='Crawl state file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    crawl_parser = subparsers.add_parser('crawl', help='Search tiles, fetch details, then export')
+    crawl_parser.add_argument('--kinds', help=f"Comma-separated kinds (default: {','.join(crawl_kinds())})")
+    crawl_parser.add_argument('--bbox', type=_box, default=tuple(INDIA_BBOX.values()),
+                              help='lon_min,lat_min,lon_max,lat_max (default: India)')
+    crawl_parser.add_argument('--tile-deg', type=float, default=TILE_DEG)
+    crawl_parser.add_argument('--min-tile-deg', type=float, default=MIN_TILE_DEG)
+    crawl_parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='/bbox limit per tile')
+    crawl_parser.add_argument('--rate', type=float, default=RATE,
+                              help='Requests per second (OpenTripMap free tier allows 10)')
+    crawl_parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    crawl_parser.add_argument('--tile-ttl-days', type=float, default=TILE_TTL / 86400)
+    crawl_parser.add_argument('--details-ttl-days', type=float, default=DETAILS_TTL / 86400)
+    crawl_parser.add_argument('--no-export', action='store_true')
+    for command_parser in (crawl_parser, subparsers.add_parser('export', help='Write the catalog files')):
+        command_parser.add_argument('--out-dir', default=OUT_DIR)
+        command_parser.add_argument('--include-base', action='store_true',
+                                    help='Write the hand-written catalog first')
+    subparsers.add_parser('status', help='Describe the crawl state')
+    args = parser.parse_args()
+    configure_logging()
+    # One INFO line per request drowns the progress reports
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    store = IngestStore(args.db)
+    if args.command == 'crawl':
+        if not get_async_opentripmap_client().base.api_key:
+            parser.error('OPENTRIPMAP_API_KEY is not set')
+        kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()] if args.kinds else crawl_kinds()
+        crawler = Crawler(store, kinds, args.bbox, args.tile_deg, args.min_tile_deg, args.page_size, args.rate,
+                          args.concurrency, args.tile_ttl_days * 86400, args.details_ttl_days * 86400)
+        start = time.perf_counter()
+        counters = asyncio.run(crawler.run())
+        print(json.dumps(counters, indent=2))
+        print(f"✅ Crawl finished in {time.perf_counter() - start:.1f}s")
+    if args.command in ('crawl', 'export') and not getattr(args, 'no_export', False):
+        count = export_catalog(store, args.out_dir, args.include_base)
+        print(f"✅ Wrote {count:,} destinations to {args.out_dir}/destinations.json and destinations.csv")
+    if args.command == 'status':
+        now = time.time()
+        print(json.dumps(store.stats(now - TILE_TTL, now - DETAILS_TTL), indent=2))
+    store.close()
@@ -0,0 +1,170 @@
+"""
+Logging setup
+Structured, non-blocking logging: records are queued by the caller and written
+to stdout by a background listener thread, so a slow pipe never blocks the
+event loop. Repeated messages can be sampled to keep per-request logs cheap.
+
+Settings:
+    LOG_LEVEL        DEBUG / INFO / WARNING / ERROR (default INFO)
+    LOG_FORMAT       text or json (default text)
+    LOG_SAMPLE_RATE  fraction of repeats of each message kept below ERROR (default 1.0)
+    LOG_QUEUE_SIZE   records buffered before new ones are dropped (default 10000)
+
+A call can override its own sampling with ``extra={'sample_rate': 0.01}``.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Attributes every LogRecord has; anything else came from ``extra=`` and is logged as a field
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'sample_rate'}
+
+
+def record_fields(record: logging.LogRecord) -> Dict:
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            **record_fields(record),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines, with extra fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep 1 in every round(1/rate) occurrences of each message template below
+    ERROR (the first occurrence always passes). Errors are never sampled.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+        self.dropped = 0
+        self._seen: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, 'sample_rate', self.rate)
+        if record.levelno >= logging.ERROR or rate >= 1:
+            return True
+        every = max(1, round(1 / rate)) if rate > 0 else 0
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._seen.get(key, 0)
+            self._seen[key] = count + 1
+            if every and count % every == 0:
+                return True
+            self.dropped += 1
+            return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler over a bounded queue that drops (and counts) records when the
+    writer falls behind, instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve %-args now (they may change after the call), but leave the
+        # formatting itself to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_sampler: Optional[SamplingFilter] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None, sample_rate: Optional[float] = None):
+    """Install the queue-backed handler on the root logger (once per process)"""
+    global _handler, _sampler, _listener
+    if _listener is not None:
+        return
+
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+    if sample_rate is None:
+        sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JSONFormatter() if fmt == 'json' else TextFormatter())
+
+    _handler = NonBlockingQueueHandler(queue.Queue(int(os.getenv('LOG_QUEUE_SIZE', '10000'))))
+    _sampler = SamplingFilter(sample_rate)
+    _handler.addFilter(_sampler)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_handler)
+
+    _listener = QueueListener(_handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger().removeHandler(_handler)
+
+
+def logging_stats() -> Dict:
+    return {
+        'dropped': _handler.dropped if _handler else 0,
+        'sampled_out': _sampler.dropped if _sampler else 0,
+        'queued': _handler.queue.qsize() if _handler else 0,
+    }
@@ -0,0 +1,278 @@
+"""
+Metrics and request timing
+A small Prometheus-compatible registry (counters, gauges, histograms) rendered in the
+text exposition format, per-stage timers, and Server-Timing headers for each request
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'wanderlust_'
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}']
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, key, state) -> List[str]:
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+# A collector returns (name, type, help, [(labels, value), ...]) tuples read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Collector] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning("⚠️  Metrics collector failed: %s", e)
+                continue
+            for name, metric_type, help, samples in families:
+                full_name = PREFIX + name
+                lines.append(f'# HELP {full_name} {help}')
+                lines.append(f'# TYPE {full_name} {metric_type}')
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f'{full_name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'stage_seconds', 'Time spent in each processing stage', ('pipeline', 'stage'))
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    'upstream_request_seconds', 'Upstream API request latency', ('provider', 'endpoint'))
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    'upstream_requests_total', 'Upstream API requests by response status', ('provider', 'endpoint', 'status'))
+UPSTREAM_BYTES = REGISTRY.counter(
+    'upstream_response_bytes_total', 'Bytes received from upstream APIs', ('provider', 'endpoint'))
+EXECUTOR_WAIT_SECONDS = REGISTRY.histogram(
+    'executor_wait_seconds', 'Time tasks spend queued before a worker picks them up', ('executor',))
+FEDERATION_CALLS = REGISTRY.counter(
+    'federation_provider_calls_total', 'Federated search provider calls by outcome (ok, empty, timeout, error)',
+    ('provider', 'outcome'))
+FEDERATION_DUPLICATES = REGISTRY.counter(
+    'federation_duplicates_total', 'Places dropped as duplicates of another provider\'s place')
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+HTTP_SECONDS = REGISTRY.histogram(
+    'http_request_seconds', 'HTTP request latency (time to response headers)', ('method', 'route'))
+
+
+# Per-request stage timings, reported in the Server-Timing header
+_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar('server_timings', default=None)
+
+
+def record_timing(name: str, seconds: float):
+    """Add a duration to the current request's Server-Timing entry ``name`` (no-op outside a request)"""
+    timings = _timings.get()
+    if timings is not None:
+        timings.setdefault(name, []).append(seconds)
+
+
+@contextmanager
+def stage(pipeline: str, name: str):
+    """Time a block as one stage of ``pipeline``, for /metrics and Server-Timing"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, pipeline=pipeline, stage=name)
+        record_timing(f'{pipeline}_{name}', elapsed)
+
+
+class UpstreamCall:
+    response = None
+
+
+@contextmanager
+def track_upstream(provider: str, endpoint: str):
+    """
+    Time one upstream HTTP call. Set ``.response`` on the yielded object
+    (requests or httpx) so status and size are recorded too.
+    """
+    call = UpstreamCall()
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        yield call
+    finally:
+        elapsed = time.perf_counter() - start
+        if call.response is not None:
+            status = str(call.response.status_code)
+            UPSTREAM_BYTES.inc(len(call.response.content), provider=provider, endpoint=endpoint)
+        UPSTREAM_SECONDS.observe(elapsed, provider=provider, endpoint=endpoint)
+        UPSTREAM_REQUESTS.inc(provider=provider, endpoint=endpoint, status=status)
+        record_timing(f'upstream_{provider}', elapsed)
+
+
+def format_server_timing(timings: Dict[str, List[float]], total: float) -> str:
+    entries = []
+    for name, durations in timings.items():
+        entry = f'{name};dur={sum(durations) * 1000:.2f}'
+        if len(durations) > 1:
+            entry += f';desc="{len(durations)} calls"'
+        entries.append(entry)
+    entries.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(entries)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: collects stage timings for each request into a
+    Server-Timing header and records request counts and latency by route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, List[float]] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        state = {'status': 500, 'headers_at': None}
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                state['status'] = message['status']
+                state['headers_at'] = time.perf_counter()
+                MutableHeaders(scope=message).append('Server-Timing', format_server_timing(timings, state['headers_at'] - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            route = scope.get('route')
+            route_path = getattr(route, 'path', None) or 'unmatched'
+            elapsed = (state['headers_at'] or time.perf_counter()) - start
+            HTTP_REQUESTS.inc(method=scope['method'], route=route_path, status=str(state['status']))
+            HTTP_SECONDS.observe(elapsed, method=scope['method'], route=route_path)
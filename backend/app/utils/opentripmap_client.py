@@ -4,22 +4,111 @@ Fetches real tourist attractions and places from OpenTripMap API
 Completely free with excellent tourist destination data
 """
 
+import logging
 import os
-from typing import List, Dict, Optional
+import asyncio
+import threading
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import requests
 
+from app.utils.response_cache import ResponseCache, CACHE_DIR
+from app.utils.metrics import track_upstream
+from app.utils.http_client import get_async_http_client
+from app.utils.circuit_breaker import get_breaker
+from app.utils.executor import io_executor
+from app.utils.places import stable_place_id
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# India bounding box searched by /bbox (also the area crawled by app.utils.ingestion)
+INDIA_BBOX = {'lon_min': 68.1766, 'lat_min': 7.9668, 'lon_max': 97.4025, 'lat_max': 35.4940}
+
+# User activities mapped to OpenTripMap kinds
+ACTIVITY_KINDS = {
+    'beach': 'beaches',
+    'adventure': 'sport,climbing',
+    'culture': 'cultural,museums,theatres_and_entertainments',
+    'food': 'foods',
+    'nightlife': 'theatres_and_entertainments',
+    'sightseeing': 'interesting_places,tourist_facilities',
+    'shopping': 'shops',
+    'nature': 'natural',
+    'hiking': 'natural,sport',
+    'water sports': 'sport,beaches'
+}
+DEFAULT_KINDS = 'interesting_places,tourist_facilities'
+
+def _endpoint(url: str) -> str:
+    """Metrics label for an OpenTripMap URL (place ids collapsed)"""
+    return 'xid' if '/xid/' in url else url.rsplit('/', 1)[-1]
+
+
 class OpenTripMapClient:
     """Client for OpenTripMap API - Free tourist attractions API"""
     
     def __init__(self):
         self.api_key = os.getenv('OPENTRIPMAP_API_KEY')
-        self.base_url = 'https://api.opentripmap.com/0.1/en/places'
+        self.base_url = os.getenv('OPENTRIPMAP_BASE_URL', 'https://api.opentripmap.com/0.1/en/places').rstrip('/')
         self.use_api = os.getenv('USE_API', 'false').lower() == 'true'
-        
+        self.breaker = get_breaker('opentripmap')
+
+        # Persistent response cache, shared across restarts
+        self.bbox_ttl = float(os.getenv('OPENTRIPMAP_BBOX_TTL', 6 * 3600))
+        self.details_ttl = float(os.getenv('OPENTRIPMAP_DETAILS_TTL', 7 * 24 * 3600))
+        self.cache = None
+        if os.getenv('OPENTRIPMAP_CACHE', 'true').lower() == 'true':
+            self.cache = ResponseCache(
+                os.getenv('OPENTRIPMAP_CACHE_PATH', os.path.join(CACHE_DIR, 'opentripmap.sqlite3')),
+                max_entries=int(os.getenv('OPENTRIPMAP_CACHE_MAX_ENTRIES', 5000)),
+                stale_while_revalidate=os.getenv('OPENTRIPMAP_CACHE_SWR', 'true').lower() == 'true'
+            )
+
+    def _fetch_json(self, url: str, params: Dict, timeout: float):
+        """GET a JSON endpoint through the provider's circuit breaker"""
+        key = ResponseCache.make_key(url, params)
+        return self.breaker.call(key, self._request_json, url, params, timeout)
+
+    def _request_json(self, url: str, params: Dict, timeout: float):
+        with track_upstream('opentripmap', _endpoint(url)) as call:
+            call.response = response = requests.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _cached_get(self, url: str, params: Dict, ttl: float, timeout: float):
+        """
+        GET a JSON endpoint through the response cache.
+
+        Fresh entries are returned directly. Stale entries are returned
+        immediately while a background thread refreshes them.
+        """
+        if self.cache is None:
+            return self._fetch_json(url, params, timeout)
+
+        key = ResponseCache.make_key(url, params)
+        entry = self.cache.get(key)
+        if entry is not None:
+            if entry.stale and self.cache.start_refresh(key):
+                threading.Thread(
+                    target=self._refresh, args=(key, url, params, ttl, timeout), daemon=True
+                ).start()
+            return entry.value
+
+        value = self._fetch_json(url, params, timeout)
+        self.cache.set(key, value, ttl)
+        return value
+
+    def _refresh(self, key: str, url: str, params: Dict, ttl: float, timeout: float):
+        try:
+            self.cache.set(key, self._fetch_json(url, params, timeout), ttl)
+        except Exception as e:
+            logger.warning("⚠️  Background refresh failed for %s: %s", url, e)
+        finally:
+            self.cache.finish_refresh(key)
+
     def search_places(self, 
                      budget: str = None,
                      activities: List[str] = None,
@@ -37,50 +126,23 @@ class OpenTripMapClient:
         Returns:
             List of destination dictionaries
         """
-        if not self.use_api or not self.api_key or self.api_key == 'your_api_key_here':
+        if not self._is_configured():
             # Return empty list to use fallback destinations.json
             return []
         
-        # Map activities to OpenTripMap kinds
-        kinds = self._map_activities_to_kinds(activities or [])
-        
-        # Search for places in India (using bounding box)
-        # India bounding box: [68.1766, 7.9668, 97.4025, 35.4940]
-        india_bbox = {
-            'lon_min': 68.1766,
-            'lat_min': 7.9668,
-            'lon_max': 97.4025,
-            'lat_max': 35.4940
-        }
-        
         try:
             # First, get a list of place IDs
-            bbox_url = f'{self.base_url}/bbox'
-            params = {
-                'lon_min': india_bbox['lon_min'],
-                'lat_min': india_bbox['lat_min'],
-                'lon_max': india_bbox['lon_max'],
-                'lat_max': india_bbox['lat_max'],
-                'kinds': kinds,
-                'limit': limit * 2,  # Get more to filter
-                'apikey': self.api_key
-            }
+            bbox_url, params = self._bbox_request(activities, limit)
+            places = self._cached_get(bbox_url, params, self.bbox_ttl, timeout=10)
             
-            response = requests.get(bbox_url, params=params, timeout=10)
-            response.raise_for_status()
-            places = response.json()
-            
-            if not places or 'features' not in places:
-                print("⚠️  OpenTripMap returned no places. Using fallback data.")
+            place_ids = self._place_ids(places, limit)
+            if place_ids is None:
+                logger.warning("⚠️  OpenTripMap returned no places. Using fallback data.")
                 return []
             
             # Get detailed information for each place
             destinations = []
-            for feature in places['features'][:limit]:
-                place_id = feature['properties'].get('xid')
-                if not place_id:
-                    continue
-                
+            for place_id in place_ids:
                 # Get place details
                 details = self._get_place_details(place_id)
                 if details:
@@ -88,16 +150,45 @@ class OpenTripMapClient:
                     if destination:
                         destinations.append(destination)
             
-            if destinations:
-                print(f"✅ Fetched {len(destinations)} real places from OpenTripMap API")
-                return destinations
-            else:
-                print("⚠️  No valid destinations found. Using fallback data.")
-                return []
+            return self._report(destinations)
                 
         except Exception as e:
-            print(f"⚠️  Error fetching from OpenTripMap: {e}")
+            logger.warning("⚠️  Error fetching from OpenTripMap: %s", e)
             return []
+
+    def _is_configured(self) -> bool:
+        return bool(self.use_api and self.api_key and self.api_key != 'your_api_key_here')
+
+    def _bbox_request(self, activities: List[str], limit: int):
+        """Build the /bbox URL and params for an India-wide search"""
+        # Map activities to OpenTripMap kinds
+        kinds = self._map_activities_to_kinds(activities or [])
+        
+        # Search for places in India (using bounding box)
+        params = {
+            **INDIA_BBOX,
+            'kinds': kinds,
+            'limit': limit * 2,  # Get more to filter
+            'apikey': self.api_key
+        }
+        return f'{self.base_url}/bbox', params
+
+    def _place_ids(self, places: Dict, limit: int) -> Optional[List[str]]:
+        """Extract up to ``limit`` xids from a /bbox response (None if empty)"""
+        if not places or 'features' not in places:
+            return None
+        return [
+            feature['properties']['xid']
+            for feature in places['features'][:limit]
+            if feature['properties'].get('xid')
+        ]
+
+    def _report(self, destinations: List[Dict]) -> List[Dict]:
+        if destinations:
+            logger.debug("✅ Fetched %d real places from OpenTripMap API", len(destinations))
+            return destinations
+        logger.warning("⚠️  No valid destinations found. Using fallback data.")
+        return []
     
     def _get_place_details(self, xid: str) -> Optional[Dict]:
         """Get detailed information for a specific place"""
@@ -105,37 +196,51 @@ class OpenTripMapClient:
             url = f'{self.base_url}/xid/{xid}'
             params = {'apikey': self.api_key}
             
-            response = requests.get(url, params=params, timeout=5)
-            response.raise_for_status()
-            return response.json()
+            return self._cached_get(url, params, self.details_ttl, timeout=5)
+        except Exception as e:
+            logger.warning("⚠️  Error fetching place details for %s: %s", xid, e)
+            return None
+    
+    def geocode(self, name: str, country: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """(lat, lon) of a named place via /geoname, or None if it is unknown"""
+        url = f'{self.base_url}/geoname'
+        params = {'name': name, 'apikey': self.api_key}
+        if country:
+            params['country'] = country
+        key = ResponseCache.make_key(url, params)
+        entry = self.cache.get(key) if self.cache is not None else None
+        try:
+            data = entry.value if entry is not None else self.breaker.call(key, self._request_geoname, url, params)
         except Exception as e:
-            print(f"⚠️  Error fetching place details for {xid}: {e}")
+            logger.warning("⚠️  Error geocoding %s: %s", name, e)
             return None
+        if entry is None and self.cache is not None:
+            # Misses are cached too, so reruns don't ask again
+            self.cache.set(key, data, self.details_ttl)
+        if data.get('status') != 'OK' or 'lat' not in data or 'lon' not in data:
+            return None
+        return float(data['lat']), float(data['lon'])
+
+    def _request_geoname(self, url: str, params: Dict):
+        with track_upstream('opentripmap', 'geoname') as call:
+            call.response = response = requests.get(url, params=params, timeout=10)
+        if response.status_code == 404:
+            # An unknown name is an answer, not an upstream failure
+            return {'status': 'NOT_FOUND'}
+        response.raise_for_status()
+        return response.json()
     
     def _map_activities_to_kinds(self, activities: List[str]) -> str:
         """Map user activities to OpenTripMap kinds"""
-        activity_mapping = {
-            'beach': 'beaches',
-            'adventure': 'sport,climbing',
-            'culture': 'cultural,museums,theatres_and_entertainments',
-            'food': 'foods',
-            'nightlife': 'theatres_and_entertainments',
-            'sightseeing': 'interesting_places,tourist_facilities',
-            'shopping': 'shops',
-            'nature': 'natural',
-            'hiking': 'natural,sport',
-            'water sports': 'sport,beaches'
-        }
-        
         kinds = set()
         for activity in activities:
             activity_lower = activity.lower()
-            for key, kind in activity_mapping.items():
+            for key, kind in ACTIVITY_KINDS.items():
                 if key in activity_lower:
                     kinds.update(kind.split(','))
         
         # Default to interesting places if no match
-        return ','.join(kinds) if kinds else 'interesting_places,tourist_facilities'
+        return ','.join(sorted(kinds)) if kinds else DEFAULT_KINDS
     
     def _transform_place_to_destination(self, place: Dict, budget: str) -> Optional[Dict]:
         """Transform OpenTripMap place to our destination format"""
@@ -175,7 +280,8 @@ class OpenTripMapClient:
             activities = self._get_activities_from_kinds(kinds)
             
             destination = {
-                'id': abs(hash(name)) % 1000000,  # Generate numeric ID from name
+                # Same ID in every worker and on every run, so cached results line up
+                'id': stable_place_id('opentripmap', place.get('xid') or name),
                 'name': name,
                 'country': country,
                 'description': description,
@@ -186,12 +292,14 @@ class OpenTripMapClient:
                 'best_season': ['Year-round'],
                 'image': image_url,
                 'googlemap_link': f"https://maps.google.com/?q={lat},{lon}",
-                'tags': kinds[:5]
+                'tags': kinds[:5],
+                'latitude': lat,
+                'longitude': lon
             }
             
             return destination
         except Exception as e:
-            print(f"⚠️  Error transforming place: {e}")
+            logger.warning("⚠️  Error transforming place: %s", e)
             return None
     
     def _get_image_url(self, place: Dict) -> str:
@@ -253,5 +361,176 @@ class OpenTripMapClient:
         return activities if activities else ['Sightseeing']
 
 
-# Create singleton instance
-opentripmap_client = OpenTripMapClient()
+class AsyncOpenTripMapClient:
+    """
+    Async counterpart of OpenTripMapClient.
+
+    Shares the sync client's configuration, response cache and transforms,
+    but issues requests on the pooled async HTTP client and fetches place
+    details concurrently (capped by ``concurrency``).
+    """
+
+    def __init__(self, base: OpenTripMapClient):
+        self.base = base
+        self.concurrency = int(os.getenv('OPENTRIPMAP_CONCURRENCY', 8))
+        # The event loop only keeps weak references to tasks, so hold background refreshes here
+        self._refreshes = set()
+
+    async def search_places(self,
+                            budget: str = None,
+                            activities: List[str] = None,
+                            weather: List[str] = None,
+                            limit: int = 10) -> List[Dict]:
+        """Async version of OpenTripMapClient.search_places"""
+        base = self.base
+        if not base._is_configured():
+            return []
+
+        try:
+            place_ids = await self._search_place_ids(activities, limit)
+            if place_ids is None:
+                return []
+
+            # Detail fetches run concurrently; results keep the listing order
+            destinations = []
+            for details in await asyncio.gather(*self._detail_tasks(place_ids)):
+                if details:
+                    destination = base._transform_place_to_destination(details, budget)
+                    if destination:
+                        destinations.append(destination)
+
+            return base._report(destinations)
+
+        except Exception as e:
+            logger.warning("⚠️  Error fetching from OpenTripMap: %s", e)
+            return []
+
+    async def stream_places(self,
+                            budget: str = None,
+                            activities: List[str] = None,
+                            weather: List[str] = None,
+                            limit: int = 10) -> AsyncIterator[Dict]:
+        """
+        Like ``search_places``, but yields each destination as soon as its
+        detail fetch completes (completion order, not listing order).
+        Closing the generator early cancels the fetches still in flight.
+        """
+        base = self.base
+        if not base._is_configured():
+            return
+
+        try:
+            place_ids = await self._search_place_ids(activities, limit)
+        except Exception as e:
+            logger.warning("⚠️  Error fetching from OpenTripMap: %s", e)
+            return
+        if place_ids is None:
+            return
+
+        tasks = self._detail_tasks(place_ids)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                details = await next_done
+                if details:
+                    destination = base._transform_place_to_destination(details, budget)
+                    if destination:
+                        yield destination
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _search_place_ids(self, activities: List[str], limit: int) -> Optional[List[str]]:
+        """Run the /bbox search and return its xids (None, logged, if there are none)"""
+        base = self.base
+        bbox_url, params = base._bbox_request(activities, limit)
+        places = await self._cached_get(bbox_url, params, base.bbox_ttl, timeout=10)
+
+        place_ids = base._place_ids(places, limit)
+        if place_ids is None:
+            logger.warning("⚠️  OpenTripMap returned no places. Using fallback data.")
+        return place_ids
+
+    def _detail_tasks(self, place_ids: List[str]) -> List[asyncio.Task]:
+        """Start one detail fetch per xid, at most ``concurrency`` in flight"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(place_id):
+            async with semaphore:
+                return await self._get_place_details(place_id)
+
+        return [asyncio.ensure_future(fetch(place_id)) for place_id in place_ids]
+
+    async def _get_place_details(self, xid: str) -> Optional[Dict]:
+        try:
+            url = f'{self.base.base_url}/xid/{xid}'
+            params = {'apikey': self.base.api_key}
+            return await self._cached_get(url, params, self.base.details_ttl, timeout=5)
+        except Exception as e:
+            logger.warning("⚠️  Error fetching place details for %s: %s", xid, e)
+            return None
+
+    async def _fetch_json(self, url: str, params: Dict, timeout: float):
+        key = ResponseCache.make_key(url, params)
+        return await self.base.breaker.call_async(key, self._request_json, url, params, timeout)
+
+    async def _request_json(self, url: str, params: Dict, timeout: float):
+        with track_upstream('opentripmap', _endpoint(url)) as call:
+            call.response = response = await get_async_http_client().get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def _cached_get(self, url: str, params: Dict, ttl: float, timeout: float):
+        cache = self.base.cache
+        if cache is None:
+            return await self._fetch_json(url, params, timeout)
+
+        # SQLite reads/writes are disk I/O, so keep them off the event loop
+        key = ResponseCache.make_key(url, params)
+        entry = await io_executor.run(cache.get, key)
+        if entry is not None:
+            if entry.stale and cache.start_refresh(key):
+                task = asyncio.create_task(self._refresh(key, url, params, ttl, timeout))
+                self._refreshes.add(task)
+                task.add_done_callback(self._refreshes.discard)
+            return entry.value
+
+        value = await self._fetch_json(url, params, timeout)
+        await io_executor.run(cache.set, key, value, ttl)
+        return value
+
+    async def _refresh(self, key: str, url: str, params: Dict, ttl: float, timeout: float):
+        try:
+            value = await self._fetch_json(url, params, timeout)
+            await io_executor.run(self.base.cache.set, key, value, ttl)
+        except Exception as e:
+            logger.warning("⚠️  Background refresh failed for %s: %s", url, e)
+        finally:
+            self.base.cache.finish_refresh(key)
+
+
+# Singleton instances are created on first use so importing this module stays cheap
+_opentripmap_client = None
+_async_opentripmap_client = None
+
+
+def get_opentripmap_client() -> OpenTripMapClient:
+    global _opentripmap_client
+    if _opentripmap_client is None:
+        _opentripmap_client = OpenTripMapClient()
+    return _opentripmap_client
+
+
+def get_async_opentripmap_client() -> AsyncOpenTripMapClient:
+    global _async_opentripmap_client
+    if _async_opentripmap_client is None:
+        _async_opentripmap_client = AsyncOpenTripMapClient(get_opentripmap_client())
+    return _async_opentripmap_client
+
+
+def __getattr__(name):
+    # Keep `from app.utils.opentripmap_client import opentripmap_client` working for scripts
+    if name == 'opentripmap_client':
+        return get_opentripmap_client()
+    if name == 'async_opentripmap_client':
+        return get_async_opentripmap_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
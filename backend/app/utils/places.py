@@ -0,0 +1,56 @@
+"""
+Place identity helpers
+Stable IDs, name normalization and distances shared by the provider clients
+and the federated search that merges their results.
+"""
+
+import hashlib
+import math
+import re
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+EARTH_RADIUS_M = 6_371_000
+
+# Below 2**53 so the IDs survive JavaScript number parsing unchanged
+_ID_BITS = 48
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_LEADING_ARTICLE = re.compile(r'^(the|la|le|el) ')
+
+
+def stable_place_id(provider: str, key) -> int:
+    """
+    Numeric ID for a provider place that is the same in every process and
+    on every run (unlike ``hash()``, which is salted per process).
+    """
+    digest = hashlib.blake2b(f'{provider}:{key}'.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') >> (64 - _ID_BITS)
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase ASCII words only: 'The Taj Mahal ' and 'taj-mahal' both become 'taj mahal'"""
+    folded = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii').lower()
+    return _LEADING_ARTICLE.sub('', _NON_WORD.sub(' ', folded).strip())
+
+
+def coordinates(place: Dict) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) of a destination dict, or None when unknown"""
+    lat, lon = place.get('latitude'), place.get('longitude')
+    if lat is None or lon is None:
+        return None
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    # Providers report 0,0 when they have no location
+    if lat == 0 and lon == 0:
+        return None
+    return lat, lon
+
+
+def haversine_m(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance in meters between two (lat, lon) points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
@@ -0,0 +1,198 @@
+"""
+Structured pre-filter index over destination budget, season and categorical fields.
+
+Free-text fields like "₹10,000 - ₹20,000" and "Oct-Mar" are parsed once at
+load time into numeric budget ranges and month bitmasks, and weather,
+travel_with and activities values are interned into inverted indexes. A
+query is narrowed to the rows that can satisfy it before any text scoring.
+"""
+
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+ALL_MONTHS = (1 << 12) - 1
+
+# Indian travel seasons, expressed as month ranges
+SEASON_RANGES = {
+    'winter': 'Oct-Feb',
+    'spring': 'Feb-Apr',
+    'summer': 'Mar-Jun',
+    'monsoon': 'Jul-Sep',
+    'autumn': 'Sep-Nov',
+}
+
+# Per-trip budget bounds in ₹ for each UI budget level
+BUDGET_LEVELS = {
+    'low': (0.0, 10000.0),
+    'medium': (10000.0, 20000.0),
+    'high': (20000.0, float('inf')),
+}
+
+CATEGORICAL_FIELDS = ('weather', 'travel_with', 'activities')
+
+_NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+
+def parse_budget_range(text: str) -> Tuple[float, float]:
+    """Parse a budget string like "₹10,000 - ₹20,000" into (min, max); NaN if unknown."""
+    numbers = [float(n.replace(',', '')) for n in _NUMBER.findall(text or '')]
+    if not numbers:
+        return float('nan'), float('nan')
+    return min(numbers), max(numbers)
+
+
+def _month_index(token: str) -> Optional[int]:
+    token = token.strip().lower()[:3]
+    return MONTHS.index(token) if token in MONTHS else None
+
+
+def parse_months(text: str) -> int:
+    """
+    Parse a season like "Oct-Mar", "June", "winter" or "Year-round" into a
+    12-bit month mask (bit 0 = January). Ranges wrap around the year end.
+    Returns 0 when nothing is recognized.
+    """
+    text = (text or '').strip().lower()
+    if not text:
+        return 0
+    if 'year' in text or text in ('all', 'any'):
+        return ALL_MONTHS
+    if text in SEASON_RANGES:
+        return parse_months(SEASON_RANGES[text])
+
+    mask = 0
+    for part in re.split(r'[,/]| and ', text):
+        bounds = [_month_index(b) for b in re.split(r'\s*(?:-|–|to)\s*', part.strip())]
+        bounds = [b for b in bounds if b is not None]
+        if not bounds:
+            continue
+        start, end = bounds[0], bounds[-1]
+        month = start
+        while True:
+            mask |= 1 << month
+            if month == end:
+                break
+            month = (month + 1) % 12
+    return mask
+
+
+class StructuredIndex:
+    """Numeric and inverted indexes used to narrow the candidate set of a query."""
+
+    def __init__(self, destinations: List[Dict]):
+        self.size = len(destinations)
+        self.budget_min = np.full(self.size, np.nan)
+        self.budget_max = np.full(self.size, np.nan)
+        self.months = np.zeros(self.size, dtype=np.uint16)
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+
+        rows: Dict[str, Dict[str, List[int]]] = {field: {} for field in CATEGORICAL_FIELDS}
+        for i, dest in enumerate(destinations):
+            self.budget_min[i], self.budget_max[i] = parse_budget_range(dest.get('avg_budget', ''))
+
+            mask = 0
+            for season in dest.get('best_season', []):
+                mask |= parse_months(season)
+            # Rows without a parseable season are treated as available all year
+            self.months[i] = mask or ALL_MONTHS
+
+            for field in CATEGORICAL_FIELDS:
+                for value in dest.get(field, []):
+                    term = sys.intern(value.strip().lower())
+                    rows[field].setdefault(term, []).append(i)
+
+        for field, terms in rows.items():
+            self.postings[field] = {
+                term: np.unique(np.asarray(ids, dtype=np.int32)) for term, ids in terms.items()
+            }
+
+    @classmethod
+    def from_arrays(cls, budget_min: np.ndarray, budget_max: np.ndarray, months: np.ndarray,
+                    postings: Dict[str, Dict[str, np.ndarray]]) -> 'StructuredIndex':
+        """Restore an index from its arrays (e.g. memory-mapped from a compiled snapshot)"""
+        index = cls.__new__(cls)
+        index.size = len(budget_min)
+        index.budget_min = budget_min
+        index.budget_max = budget_max
+        index.months = months
+        index.postings = postings
+        return index
+
+    def _budget_mask(self, budget: Optional[str], rows: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        bounds = BUDGET_LEVELS.get((budget or '').strip().lower())
+        if bounds is None:
+            return None
+        low, high = bounds
+        budget_min = self.budget_min if rows is None else self.budget_min[rows]
+        budget_max = self.budget_max if rows is None else self.budget_max[rows]
+        # Keep rows whose range overlaps the level; unknown budgets always pass
+        unknown = np.isnan(budget_min)
+        return unknown | ((budget_min <= high) & (budget_max >= low))
+
+    def _season_mask(self, season: Optional[str], rows: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        wanted = parse_months(season)
+        if not wanted:
+            return None
+        months = self.months if rows is None else self.months[rows]
+        return (months & wanted) != 0
+
+    def _term_mask(self, field: str, values: List[str], rows: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        postings = self.postings.get(field, {})
+        hits = [postings[v.strip().lower()] for v in values if v and v.strip().lower() in postings]
+        if not hits:
+            # Values outside the catalog vocabulary don't constrain the query
+            return None
+        if rows is not None:
+            # Membership of a few rows in sorted postings, without touching every row
+            mask = np.zeros(len(rows), dtype=bool)
+            for ids in hits:
+                positions = np.minimum(np.searchsorted(ids, rows), len(ids) - 1)
+                mask |= ids[positions] == rows
+            return mask
+        mask = np.zeros(self.size, dtype=bool)
+        for ids in hits:
+            mask[ids] = True
+        return mask
+
+    def candidates(self,
+                   budget: str = None,
+                   weather: List[str] = None,
+                   activities: List[str] = None,
+                   group_type: str = None,
+                   season: str = None,
+                   min_candidates: int = 1,
+                   rows: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Return sorted row ids that can satisfy the query, or None to score every row.
+
+        Budget and season are hard constraints. Weather, group and activity
+        values only constrain the query when they exist in the catalog, and
+        are dropped again if they would leave fewer than ``min_candidates``.
+
+        ``rows`` restricts the query to those row ids (e.g. a spatial
+        neighbourhood); the result is then always an array, in ``rows`` order.
+        """
+        hard = [m for m in (self._budget_mask(budget, rows), self._season_mask(season, rows)) if m is not None]
+        soft = [m for m in (self._term_mask('weather', weather or [], rows),
+                            self._term_mask('travel_with', [group_type] if group_type else [], rows),
+                            self._term_mask('activities', activities or [], rows)) if m is not None]
+        if not hard and not soft:
+            return None if rows is None else rows
+
+        base = np.ones(self.size if rows is None else len(rows), dtype=bool)
+        for mask in hard:
+            base &= mask
+
+        narrowed = base.copy()
+        for mask in soft:
+            narrowed &= mask
+
+        if np.count_nonzero(narrowed) >= min_candidates:
+            return np.flatnonzero(narrowed) if rows is None else rows[narrowed]
+        if hard and base.any():
+            return np.flatnonzero(base) if rows is None else rows[base]
+        return None if rows is None else rows
@@ -1,17 +1,27 @@
-import os
 import json
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import logging
+from contextlib import aclosing
+import numpy as np
+from app.utils.columnar import DestinationStore
+from app.utils.data_loader import DESTINATIONS_FILE, StaleWorkerIndex, file_signature, load_destinations_versioned
+from app.utils.metrics import stage
+from app.utils.prefilter import StructuredIndex
 
-# Import OpenTripMap client
+# Import the live providers (clients themselves are constructed on first use)
 try:
-    from app.utils.opentripmap_client import opentripmap_client
+    from app.utils.opentripmap_client import get_opentripmap_client
+    from app.utils.federation import get_federated_search
     API_AVAILABLE = True
 except ImportError:
     API_AVAILABLE = False
 
+# scikit-learn is slow to import, so it is only loaded when an index is built
+# (see import_ml_modules) rather than when this module is imported.
+
+logger = logging.getLogger(__name__)
+
 # Path to your destinations data
-DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "destinations.json")
+DATA_FILE = DESTINATIONS_FILE
 
 
 def load_destinations():
@@ -39,59 +49,328 @@ def prepare_features(destination):
     return f"{budget} {weather} {activities} {season} {group}"
 
 
+def import_ml_modules():
+    """Import the scikit-learn pieces used for indexing (cached after the first call)."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.preprocessing import normalize
+    return TfidfVectorizer, normalize
+
+
 def build_tfidf_matrix(destinations):
     """
     Build TF-IDF matrix from all destination features.
     """
+    TfidfVectorizer, _ = import_ml_modules()
     features = [prepare_features(d) for d in destinations]
-    vectorizer = TfidfVectorizer()
+    vectorizer = TfidfVectorizer(dtype=np.float32)
     tfidf_matrix = vectorizer.fit_transform(features)
     return tfidf_matrix, vectorizer
 
 
-def recommend_destinations_ml(destinations, budget, weather, activities, group_type=None, season=None, top_n=5):
+def build_user_input(budget, weather, activities, group_type=None, season=None):
+    """
+    Combine user preferences into a single query string for TF-IDF.
+    """
+    user_input = f"{budget} {' '.join(weather)} {' '.join(activities)}"
+    if group_type:
+        user_input += f" {group_type}"
+    if season:
+        user_input += f" {season}"
+    return user_input
+
+
+class RecommenderIndex:
+    """
+    TF-IDF index over destination features, fitted once and reused per query.
+
+    Rows are stored as L2-normalized float32 CSR vectors, so cosine similarity
+    against a (normalized) query is a single sparse dot product. A
+    ``StructuredIndex`` over budget, season and categorical fields is built
+    alongside it to narrow candidates before scoring. Destinations are kept
+    in a columnar ``DestinationStore``; results are materialized as dicts.
+    """
+
+    def __init__(self, destinations, version=None):
+        self.destinations = DestinationStore.of(destinations)
+        self.version = version
+        tfidf_matrix, self.vectorizer = build_tfidf_matrix(destinations)
+        _, normalize = import_ml_modules()
+        self.matrix = normalize(tfidf_matrix, norm="l2", copy=False).astype(np.float32).tocsr()
+        self.filters = StructuredIndex(destinations)
+
+    @classmethod
+    def from_parts(cls, destinations, vectorizer, matrix, filters, version=None):
+        """Assemble an already fitted index (e.g. from a compiled snapshot) without refitting."""
+        index = cls.__new__(cls)
+        index.destinations = DestinationStore.of(destinations)
+        index.version = version
+        index.vectorizer = vectorizer
+        index.matrix = matrix
+        index.filters = filters
+        return index
+
+    @classmethod
+    def from_file(cls, path=DATA_FILE):
+        """Load destinations from disk and fit an index versioned by file hash."""
+        destinations, version = load_destinations_versioned(path)
+        return cls(destinations, version=version)
+
+    def __len__(self):
+        return len(self.destinations)
+
+    def transform(self, user_inputs):
+        """Vectorize query strings into L2-normalized float32 CSR rows."""
+        _, normalize = import_ml_modules()
+        with stage("recommend", "vectorize"):
+            return normalize(self.vectorizer.transform(user_inputs), norm="l2", copy=False)
+
+    def score(self, user_input, candidates=None):
+        """
+        Cosine similarity of the query against every destination, or only
+        against the rows in ``candidates`` (in that order) when given.
+        """
+        query = self.transform([user_input])
+        with stage("recommend", "similarity"):
+            matrix = self.matrix if candidates is None else self.matrix[candidates]
+            return (matrix @ query.T).toarray().ravel()
+
+    def score_many(self, user_inputs):
+        """Score a batch of queries with one sparse matrix product (queries x destinations)."""
+        queries = self.transform(user_inputs)
+        with stage("recommend", "similarity"):
+            return (queries @ self.matrix.T).toarray()
+
+    def top_n(self, user_input, n, candidates=None):
+        """Return the top ``n`` destinations for a query, best first."""
+        if candidates is None:
+            return self.top_n_many([user_input], n)[0]
+        return [self.destinations.row_dict(row) for row in self.top_n_rows(user_input, n, candidates)]
+
+    def top_n_rows(self, user_input, n, candidates):
+        """Row ids of the top ``n`` rows among ``candidates`` for a query, best first."""
+        candidates = np.asarray(candidates)
+        scores = self.score(user_input, candidates)
+        with stage("recommend", "top_k"):
+            return candidates[top_k_rows(scores[None, :], n)[0]]
+
+    def top_n_many(self, user_inputs, n, candidates=None):
+        """
+        Return the top ``n`` destinations for each query in a batch.
+
+        ``candidates`` optionally holds one pre-filtered row id array (or
+        None for all rows) per query; excluded rows are never returned.
+        """
+        if not user_inputs:
+            return []
+        scores = self.score_many(user_inputs)
+        with stage("recommend", "top_k"):
+            if candidates is not None:
+                for row, ids in zip(scores, candidates):
+                    if ids is not None:
+                        keep = np.zeros(len(row), dtype=bool)
+                        keep[ids] = True
+                        row[~keep] = -np.inf
+            rows = top_k_rows(scores, n)
+            return [
+                [self.destinations.row_dict(i) for i in row if np.isfinite(scores[q, i])]
+                for q, row in enumerate(rows)
+            ]
+
+    def candidates(self, budget, weather, activities, group_type=None, season=None, min_candidates=1, rows=None):
+        """Row ids that pass the structured pre-filter (among ``rows`` if given), or None for all rows."""
+        with stage("recommend", "prefilter"):
+            return self.filters.candidates(budget=budget, weather=weather, activities=activities,
+                                           group_type=group_type, season=season,
+                                           min_candidates=min_candidates, rows=rows)
+
+
+def top_k_rows(scores, k):
+    """
+    Per-row top-k over a 2-D score array, best first.
+
+    Uses argpartition instead of a full sort; ties are broken by column
+    order so results match a stable descending sort.
+    """
+    n_cols = scores.shape[1]
+    k = min(k, n_cols)
+    if k <= 0:
+        return [np.empty(0, dtype=np.intp) for _ in range(scores.shape[0])]
+
+    kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1]
+    rows = []
+    for row, threshold in zip(scores, kth):
+        above = np.flatnonzero(row > threshold)
+        ties = np.flatnonzero(row == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+        rows.append(candidates[np.lexsort((candidates, -row[candidates]))])
+    return rows
+
+
+def recommend_destinations_ml(destinations, budget, weather, activities, group_type=None, season=None, top_n=5, index=None):
     """
     Recommend destinations using TF-IDF + Cosine Similarity (ML-based).
     Optionally fetches live data from OpenTripMap API if enabled.
+
+    Pass a prebuilt ``RecommenderIndex`` as ``index`` to skip refitting the
+    vectorizer on every call.
     """
     # Try to fetch from OpenTripMap API first
     if API_AVAILABLE:
-        api_destinations = opentripmap_client.search_places(
-            budget=budget,
-            activities=activities,
-            weather=weather,
-            limit=top_n
-        )
+        with stage("recommend", "api"):
+            api_destinations = get_opentripmap_client().search_places(
+                budget=budget,
+                activities=activities,
+                weather=weather,
+                limit=top_n
+            )
         
         # If API returned results, use them
         if api_destinations:
-            print(f"✅ Using {len(api_destinations)} destinations from OpenTripMap API")
+            logger.debug("✅ Using %d destinations from OpenTripMap API", len(api_destinations))
             return api_destinations
     
     # Fallback to local JSON file
-    print("📁 Using local destinations.json file")
-    
-    # Prepare user input as a combined feature string
-    user_input = f"{budget} {' '.join(weather)} {' '.join(activities)}"
-    if group_type:
-        user_input += f" {group_type}"
-    if season:
-        user_input += f" {season}"
+    logger.debug("📁 Using local destinations.json file")
+
+    # Reuse the prebuilt index when given; otherwise fit one for this call
+    if index is None:
+        index = RecommenderIndex(destinations)
+
+    return recommend_local(index, budget, weather, activities, group_type, season)
 
-    # Build TF-IDF model using destinations
-    tfidf_matrix, vectorizer = build_tfidf_matrix(destinations)
 
-    # Transform user input using the same vectorizer
-    user_vec = vectorizer.transform([user_input])
+async def fetch_live_destinations(budget, weather, activities, limit=5):
+    """
+    Fetch live results from every configured provider concurrently, merged
+    and de-duplicated (see ``federation``). Returns an empty list when the
+    APIs are disabled or nothing came back before the deadlines.
+    """
+    if not API_AVAILABLE:
+        return []
+
+    with stage("recommend", "api"):
+        api_destinations = await get_federated_search().search(budget, weather, activities, limit=limit)
+    if api_destinations:
+        logger.debug("✅ Using %d destinations from live providers", len(api_destinations))
+    return api_destinations
 
-    # Compute cosine similarity between user input and all destinations
-    cosine_scores = cosine_similarity(user_vec, tfidf_matrix).flatten()
 
-    # Attach score to each destination
-    scored = [{"destination": dest, "score": score} for dest, score in zip(destinations, cosine_scores)]
+def live_search_enabled():
+    """True when live results are expected, i.e. local results would only be a fallback"""
+    return API_AVAILABLE and bool(get_federated_search().enabled())
+
+
+async def stream_live_destinations(budget, weather, activities, limit=5):
+    """
+    Yield live destinations one at a time, from whichever provider delivers
+    first, skipping duplicates. Yields nothing when the APIs are disabled.
+    """
+    if not API_AVAILABLE:
+        return
+
+    places = get_federated_search().stream(budget, weather, activities, limit=limit)
+    # Close the generator explicitly so abandoned provider calls are cancelled
+    async with aclosing(places):
+        async for destination in places:
+            yield destination
+
+
+async def recommend_destinations_async(index, budget, weather, activities, group_type=None, season=None, top_n=5):
+    """
+    Async variant of ``recommend_destinations_ml`` for use from async endpoints.
+    Live lookups go to all configured providers concurrently without blocking
+    the event loop.
+    """
+    api_destinations = await fetch_live_destinations(budget, weather, activities, limit=top_n)
+    if api_destinations:
+        return api_destinations
+
+    logger.debug("📁 Using local destinations.json file")
+    return recommend_local(index, budget, weather, activities, group_type, season)
+
+
+def recommend_local(index, budget, weather, activities, group_type=None, season=None, top_n=3):
+    """
+    Score a preference set against a prebuilt ``RecommenderIndex``.
+    """
+    # Prepare user input as a combined feature string
+    with stage("recommend", "features"):
+        user_input = build_user_input(budget, weather, activities, group_type, season)
 
-    # Sort by score descending
-    scored.sort(key=lambda x: x["score"], reverse=True)
+    # Narrow to destinations that can satisfy budget/season/group before scoring
+    candidates = index.candidates(budget, weather, activities, group_type, season, min_candidates=top_n)
 
     # Return top N destinations
-    return [item["destination"] for item in scored[:3]]
\ No newline at end of file
+    return index.top_n(user_input, top_n, candidates)
+
+
+def recommend_batch(index, queries, top_n=3):
+    """
+    Score many preference sets in one pass.
+
+    ``queries`` is a list of ``(budget, weather, activities, group_type, season)``
+    tuples; all of them are vectorized together and scored with one matrix product.
+    """
+    with stage("recommend", "features"):
+        user_inputs = [build_user_input(*query) for query in queries]
+    candidates = [index.candidates(*query, min_candidates=top_n) for query in queries]
+    return index.top_n_many(user_inputs, top_n, candidates)
+
+
+def rank_rows(index, rows, budget, weather, activities, group_type=None, season=None, top_n=10):
+    """
+    Rank a given set of rows (e.g. a spatial neighbourhood) by preference
+    score. Returns row ids, best first, so callers can attach their own
+    per-row data such as distances.
+    """
+    with stage("recommend", "features"):
+        user_input = build_user_input(budget, weather, activities, group_type, season)
+    candidates = index.candidates(budget, weather, activities, group_type, season, min_candidates=top_n, rows=rows)
+    if len(candidates) == 0:
+        return candidates
+    return index.top_n_rows(user_input, top_n, candidates)
+
+
+# Per-process index for process-pool scoring, and the file signature it was read at
+_worker_index = None
+_worker_signature = None
+
+
+def worker_index(source, version):
+    """
+    This process's index for the parent snapshot's ``source`` (a compiled
+    snapshot path, or "files") and ``version``. Data files are only re-read
+    when they change on disk; if they no longer hold ``version`` (the parent
+    has not reloaded yet) StaleWorkerIndex is raised rather than scoring a
+    different generation than the parent's row ids refer to.
+    """
+    global _worker_index, _worker_signature
+    if _worker_index is not None and _worker_index.version == version:
+        return _worker_index
+    if source != "files":
+        # Imported here: compiled_snapshot builds on this module
+        from app.utils.compiled_snapshot import CompiledSnapshot
+        _worker_index = CompiledSnapshot(source).recommender_index()
+    else:
+        signature = file_signature(DATA_FILE)
+        if _worker_index is None or signature != _worker_signature:
+            _worker_index = RecommenderIndex.from_file()
+            _worker_signature = signature
+    if _worker_index.version != version:
+        raise StaleWorkerIndex(version, _worker_index.version)
+    return _worker_index
+
+
+def recommend_local_in_worker(source, version, *args):
+    """Process-pool entry point for ``recommend_local``"""
+    return recommend_local(worker_index(source, version), *args)
+
+
+def recommend_batch_in_worker(source, version, *args):
+    """Process-pool entry point for ``recommend_batch``"""
+    return recommend_batch(worker_index(source, version), *args)
+
+
+def rank_rows_in_worker(source, version, *args):
+    """Process-pool entry point for ``rank_rows``"""
+    return rank_rows(worker_index(source, version), *args)
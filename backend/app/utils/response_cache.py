@@ -0,0 +1,159 @@
+"""
+Disk-backed upstream response cache
+SQLite store with per-entry TTLs, LRU eviction and stale-while-revalidate support
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+# Query parameters that identify the caller rather than the request
+SECRET_PARAMS = {'apikey', 'apiKey', 'api_key', 'client_secret'}
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.cache')
+
+
+class CacheEntry(NamedTuple):
+    value: object
+    stale: bool
+    expires_at: float  # Unix time
+
+
+class ResponseCache:
+    """
+    Persistent key/value cache for upstream JSON responses.
+
+    Entries carry their own expiry. Expired entries are still returned (marked
+    stale) for up to ``max_stale`` seconds so callers can serve them while a
+    refresh runs in the background. Once ``max_entries`` is exceeded the least
+    recently used entries are evicted, a tenth of the capacity at a time, so
+    a full cache is not recounted on every insert. Processes sharing the file
+    each recount at least every tenth of the capacity of their own writes, so
+    the limit may be overshot by about that much per extra writer.
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_entries: int = 5000,
+                 stale_while_revalidate: bool = True,
+                 max_stale: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_stale = max_stale
+
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL,'
+            ' last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)')
+
+        # Entry count kept up to date on insert instead of scanning the table each time.
+        # Other processes may share the file, so it is recounted every so often.
+        self._size = self._count()
+        self._recount_every = max(100, max_entries // 10)
+        self._writes_since_count = 0
+
+    def _count(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        """Build a cache key from an endpoint and its params, ignoring order and API keys"""
+        normalized = {
+            str(k): v.strip() if isinstance(v, str) else v
+            for k, v in (params or {}).items()
+            if k not in SECRET_PARAMS and v is not None
+        }
+        return f"{endpoint}?{json.dumps(normalized, sort_keys=True, separators=(',', ':'))}"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the cached entry for ``key``, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (now > row[1] and (not self.stale_while_revalidate
+                                                 or now - row[1] > self.max_stale)):
+                self._counters['misses'] += 1
+                return None
+
+            self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+            stale = now > row[1]
+            self._counters['stale_hits' if stale else 'hits'] += 1
+        return CacheEntry(json.loads(row[0]), stale, row[1])
+
+    def set(self, key: str, value: object, ttl: float):
+        """Store ``value`` under ``key`` for ``ttl`` seconds, evicting LRU entries if full"""
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            exists = self._conn.execute('SELECT 1 FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, payload, now + ttl, now)
+            )
+            self._counters['stores'] += 1
+            self._size += exists is None
+            self._writes_since_count += 1
+
+            if self._size > self.max_entries or self._writes_since_count >= self._recount_every:
+                self._size = self._count()
+                self._writes_since_count = 0
+            if self._size > self.max_entries:
+                # Make room for the next few inserts too
+                overflow = self._size - self.max_entries + self.max_entries // 10
+                evicted = self._conn.execute(
+                    'DELETE FROM responses WHERE key IN '
+                    '(SELECT key FROM responses ORDER BY last_access LIMIT ?)', (overflow,)
+                ).rowcount
+                self._size -= evicted
+                self._counters['evictions'] += evicted
+
+    def start_refresh(self, key: str) -> bool:
+        """Claim the background refresh for ``key``; False if one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def finish_refresh(self, key: str):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._size = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size, for tuning TTLs and capacity"""
+        with self._lock:
+            size = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            counters = dict(self._counters)
+            refreshing = len(self._refreshing)
+        lookups = counters['hits'] + counters['stale_hits'] + counters['misses']
+        return {
+            **counters,
+            'refreshing': refreshing,
+            'entries': size,
+            'max_entries': self.max_entries,
+            'hit_ratio': round((counters['hits'] + counters['stale_hits']) / lookups, 4) if lookups else 0.0,
+        }
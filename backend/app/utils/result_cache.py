@@ -0,0 +1,197 @@
+"""
+Recommendation result cache
+In-process LRU+TTL cache of /recommend results keyed by canonicalized preferences,
+with an optional shared SQLite tier so every worker benefits from a computed result
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from app.utils.response_cache import CACHE_DIR, ResponseCache
+from app.utils.serialization import dumps
+
+
+class Preferences(NamedTuple):
+    """Canonical preference set: lowercased, lists sorted and deduped, blanks as None"""
+    budget: str
+    weather: Tuple[str, ...]
+    activities: Tuple[str, ...]
+    group_type: Optional[str]
+    season: Optional[str]
+
+
+def _canonical_term(value: Optional[str]) -> Optional[str]:
+    value = ' '.join(value.split()).lower() if value else ''
+    return value or None
+
+
+def _canonical_terms(values: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    return tuple(sorted({term for term in map(_canonical_term, values or []) if term}))
+
+
+def canonical_preferences(budget, weather, activities, group_type=None, season=None) -> Preferences:
+    """Normalize a preference set so equivalent requests share one cache entry"""
+    return Preferences(
+        budget=_canonical_term(budget) or '',
+        weather=_canonical_terms(weather),
+        activities=_canonical_terms(activities),
+        group_type=_canonical_term(group_type),
+        season=_canonical_term(season),
+    )
+
+
+class ResultCache:
+    """
+    LRU+TTL cache for recommendation results.
+
+    Entries belong to one data version; when ``version`` changes (see
+    ``set_version``) the local tier is dropped and shared-tier keys change,
+    so stale results are never served. Memory use is estimated from the
+    serialized size of each cached value. Local results that stood in for
+    failed live providers are stored for the shorter ``fallback_ttl``.
+
+    Callers pass the version their result was computed from; a result for
+    any other version is neither served nor stored, so a request that
+    straddles a reload cannot cache old data under the new version.
+    """
+
+    def __init__(self,
+                 max_entries: int = 2048,
+                 ttl: float = 300,
+                 version: str = '',
+                 shared: Optional[ResponseCache] = None,
+                 fallback_ttl: float = 15):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self.version = version
+        self.shared = shared
+
+        self._entries: "OrderedDict[Tuple, Tuple[object, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0,
+                          'stale_writes': 0}
+
+    def set_version(self, version: str):
+        """Switch to a new data version, invalidating everything cached for the old one"""
+        with self._lock:
+            if version == self.version:
+                return
+            if self._entries:
+                self._counters['invalidations'] += 1
+            self.version = version
+            self._entries.clear()
+            self._bytes = 0
+
+    @staticmethod
+    def _shared_key(key: Tuple, version: str) -> str:
+        return ResponseCache.make_key('recommend', {'version': version, 'key': list(key)})
+
+    def get(self, key: Tuple, version: Optional[str] = None):
+        """Return the cached value for ``key`` at ``version`` (default: current), or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            if version is None:
+                version = self.version
+            elif version != self.version:
+                self._counters['misses'] += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return entry[0]
+                self._drop(key)
+
+        if self.shared is not None:
+            cached = self.shared.get(self._shared_key(key, version))
+            if cached is not None and not cached.stale:
+                with self._lock:
+                    self._counters['shared_hits'] += 1
+                # Keep the shared entry's expiry, which may be a short fallback TTL
+                self._store(key, cached.value, cached.expires_at - time.time(), version)
+                return cached.value
+
+        with self._lock:
+            self._counters['misses'] += 1
+        return None
+
+    def set(self, key: Tuple, value: object, ttl: Optional[float] = None, version: Optional[str] = None):
+        """
+        Cache ``value``, computed from data ``version`` (default: current), for
+        ``ttl`` seconds (default ``self.ttl``) in the local and shared tiers.
+        Dropped if the data has moved on to another version since.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        version = self.version if version is None else version
+        if self._store(key, value, ttl, version) and self.shared is not None:
+            self.shared.set(self._shared_key(key, version), value, ttl)
+
+    def _store(self, key: Tuple, value: object, ttl: float, version: str) -> bool:
+        size = len(dumps(value))
+        with self._lock:
+            if version != self.version:
+                self._counters['stale_writes'] += 1
+                return False
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            self._counters['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._counters['evictions'] += 1
+        return True
+
+    def _drop(self, key: Tuple):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit ratio, size and approximate memory use"""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+            size = self._bytes
+        lookups = counters['hits'] + counters['shared_hits'] + counters['misses']
+        return {
+            **counters,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'fallback_ttl': self.fallback_ttl,
+            'version': self.version[:12],
+            'memory_bytes': size,
+            'hit_ratio': round((counters['hits'] + counters['shared_hits']) / lookups, 4) if lookups else 0.0,
+            'shared': self.shared.stats() if self.shared is not None else None,
+        }
+
+
+def result_cache_from_env() -> Optional[ResultCache]:
+    """Build the /recommend result cache from RESULT_CACHE_* settings (None if disabled)"""
+    if os.getenv('RESULT_CACHE', 'true').lower() != 'true':
+        return None
+    shared = None
+    if os.getenv('RESULT_CACHE_SHARED', 'false').lower() == 'true':
+        shared = ResponseCache(
+            os.getenv('RESULT_CACHE_SHARED_PATH', os.path.join(CACHE_DIR, 'results.sqlite3')),
+            max_entries=int(os.getenv('RESULT_CACHE_SHARED_MAX_ENTRIES', 20000)),
+            stale_while_revalidate=False
+        )
+    return ResultCache(
+        max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 2048)),
+        ttl=float(os.getenv('RESULT_CACHE_TTL', 300)),
+        shared=shared,
+        fallback_ttl=float(os.getenv('RESULT_CACHE_FALLBACK_TTL', 15))
+    )
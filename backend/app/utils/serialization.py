@@ -0,0 +1,84 @@
+"""
+Response serialization
+orjson-backed JSON responses, with MessagePack for internal callers that ask for it via Accept,
+and newline-delimited JSON for streamed responses
+"""
+
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes (numpy scalars and arrays included)"""
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def ndjson_line(content: Any) -> bytes:
+    """One NDJSON record: compact JSON followed by a newline"""
+    return dumps(content) + b'\n'
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, use_bin_type=True)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True if the client's Accept header prefers MessagePack over JSON"""
+    if msgpack is None:
+        return False
+    best_type, best_q = None, -1.0
+    for part in request.headers.get('accept', '').split(','):
+        media_type, _, params = part.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q and media_type.strip():
+            best_type, best_q = media_type.strip().lower(), q
+    return best_type in MSGPACK_MEDIA_TYPES and best_q > 0
+
+
+def negotiated_response(request: Request,
+                        content: Any,
+                        status_code: int = 200,
+                        headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serialize ``content`` as MessagePack or JSON depending on Accept.
+    Returning a Response directly also skips FastAPI's jsonable_encoder pass.
+    """
+    response_class = MsgPackResponse if wants_msgpack(request) else ORJSONResponse
+    response = response_class(content, status_code=status_code, headers=headers)
+    response.headers['Vary'] = 'Accept'
+    return response
@@ -0,0 +1,260 @@
+"""
+Data snapshots and hot reload
+Everything derived from destinations.json / destinations.csv lives in one immutable
+snapshot that is rebuilt in the background and published with a single reference swap.
+With COMPILED_SNAPSHOT_DIR set, snapshots are mapped from a compiled directory instead
+(see app.utils.compiled_snapshot) and a reload follows its CURRENT pointer.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple
+
+from app.utils.catalog import CatalogCache
+from app.utils.columnar import DestinationStore
+from app.utils.compiled_snapshot import COMPILED_SNAPSHOT_DIR, CURRENT, CompiledSnapshot
+from app.utils.data_loader import DESTINATIONS_FILE, data_version, load_destinations_versioned
+from app.utils.dream_matcher import DATA_FILE as DREAM_DATA_FILE, DreamIndex, load_dream_index
+from app.utils.recommender import RecommenderIndex
+from app.utils.spatial import SpatialIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+class DataSnapshot:
+    """
+    One consistent generation of loaded data and indexes.
+
+    Snapshots are never mutated after publication: a request grabs the
+    current snapshot once and keeps using it even if a reload publishes a
+    newer one meanwhile.
+    """
+
+    __slots__ = ('destinations', 'index', 'dream_index', 'catalog', 'spatial', 'version', 'source', 'loaded_at')
+
+    def __init__(self,
+                 destinations: DestinationStore,
+                 index: RecommenderIndex,
+                 dream_index: DreamIndex,
+                 catalog: CatalogCache,
+                 spatial: SpatialIndex,
+                 version: str,
+                 source: str = "files"):
+        self.destinations = destinations
+        self.index = index
+        self.dream_index = dream_index
+        self.catalog = catalog
+        self.spatial = spatial
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+
+
+def _phase(report, name):
+    return report.phase(name) if report is not None else nullcontext()
+
+
+def build_snapshot(catalog_max_age: int = 60, report=None, previous: Optional[DataSnapshot] = None) -> DataSnapshot:
+    """
+    Build the snapshot the API serves: mapped from the compiled snapshot when
+    COMPILED_SNAPSHOT_DIR is set, otherwise built from the data files.
+    ``report`` (a StartupReport) optionally times the loading phases.
+    """
+    if COMPILED_SNAPSHOT_DIR:
+        return load_compiled(COMPILED_SNAPSHOT_DIR, catalog_max_age, report, previous)
+    return build_from_files(catalog_max_age, report, previous)
+
+
+def load_compiled(root: str, catalog_max_age: int = 60, report=None,
+                  previous: Optional[DataSnapshot] = None) -> DataSnapshot:
+    """Map the version CURRENT points at; returns ``previous`` if that is already it"""
+    with _phase(report, "data_load"):
+        compiled = CompiledSnapshot.current(root)
+    if previous is not None and previous.source == compiled.path:
+        return previous
+    for path in compiled.stale_sources():
+        logger.warning("⚠️  %s changed since snapshot %s was compiled", path, os.path.basename(compiled.path))
+
+    with _phase(report, "index_build"):
+        destinations = compiled.destinations()
+        # The KD-tree is rebuilt from the mapped coordinate columns (about 1s per million rows)
+        snapshot = DataSnapshot(destinations, compiled.recommender_index(), compiled.dream_index(),
+                                compiled.catalog(catalog_max_age), SpatialIndex.from_store(destinations),
+                                compiled.version, source=compiled.path)
+    logger.info("✅ Mapped compiled snapshot %s (%d destinations).", os.path.basename(compiled.path), len(destinations))
+    return snapshot
+
+
+def build_from_files(catalog_max_age: int = 60, report=None, previous: Optional[DataSnapshot] = None) -> DataSnapshot:
+    """
+    Load both data files and build every index. Indexes for a file that has
+    not changed since ``previous`` are reused.
+    """
+    phase = partial(_phase, report)
+
+    with phase("data_load"):
+        try:
+            destinations, version = load_destinations_versioned()
+        except Exception as e:
+            raise RuntimeError(f"Failed to load destinations: {e}")
+    logger.info("✅ Loaded %d destinations.", len(destinations))
+
+    with phase("index_build"):
+        if previous is not None and previous.version == version:
+            destinations, index, catalog, spatial = (previous.destinations, previous.index,
+                                                     previous.catalog, previous.spatial)
+        else:
+            # Encode once (dropping the parsed dicts) and share the store between indexes
+            destinations = DestinationStore(destinations)
+            index = RecommenderIndex(destinations, version=version)
+            catalog = CatalogCache(destinations, version, max_age=catalog_max_age)
+            spatial = SpatialIndex.from_store(destinations)
+            logger.info("✅ Built recommender index (version %s, %d with coordinates).", version[:12], len(spatial))
+
+        if previous is not None and previous.dream_index.version == data_version(DREAM_DATA_FILE):
+            dream_index = previous.dream_index
+        else:
+            dream_index = load_dream_index()
+
+    return DataSnapshot(destinations, index, dream_index, catalog, spatial, version)
+
+
+# Files whose changes trigger a reload
+if COMPILED_SNAPSHOT_DIR:
+    WATCH_PATHS = (os.path.join(COMPILED_SNAPSHOT_DIR, CURRENT),)
+else:
+    WATCH_PATHS = (DESTINATIONS_FILE, DREAM_DATA_FILE)
+
+
+def _file_signature(paths: Tuple[str, ...]) -> Tuple:
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class SnapshotStore:
+    """
+    Holds the published snapshot and rebuilds it on demand or when the data files change.
+
+    Readers only ever read ``current`` (a plain attribute, so a single atomic
+    reference read); they never take a lock. Rebuilds run on a background
+    thread, one at a time, and publish by swapping that reference.
+    """
+
+    def __init__(self,
+                 builder: Callable[..., DataSnapshot],
+                 watch_paths: Tuple[str, ...] = WATCH_PATHS,
+                 on_publish: Optional[Callable[[DataSnapshot], None]] = None):
+        self.builder = builder
+        self.watch_paths = watch_paths
+        self.on_publish = on_publish
+        self.current: Optional[DataSnapshot] = None
+
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self.last_reload_ms: Optional[float] = None
+        self._signature = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def publish(self, snapshot: DataSnapshot):
+        """Make ``snapshot`` the one new requests see, then tell ``on_publish``"""
+        # Swap first: anything keyed on the new version must never be paired with the old data
+        self.current = snapshot
+        if self.on_publish is not None:
+            self.on_publish(snapshot)
+
+    def load(self, **kwargs) -> DataSnapshot:
+        """Build and publish a snapshot in the calling thread (used at startup); kwargs go to the builder"""
+        signature = _file_signature(self.watch_paths)
+        snapshot = self.builder(**kwargs)
+        self._signature = signature
+        self.publish(snapshot)
+        return snapshot
+
+    def reload(self) -> bool:
+        """
+        Rebuild in the calling thread and publish if the data changed.
+        Returns False without waiting if another reload is already running.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        start = time.perf_counter()
+        signature = _file_signature(self.watch_paths)
+        try:
+            previous = self.current
+            snapshot = self.builder(previous=previous)
+            if (previous is not None and snapshot.index is previous.index
+                    and snapshot.dream_index is previous.dream_index):
+                logger.info("📁 Data unchanged; keeping the current snapshot")
+            else:
+                self.publish(snapshot)
+                self.reloads += 1
+                logger.info("🔄 Published data snapshot %s", snapshot.version[:12])
+            self._signature = signature
+            self.last_error = None
+            self.last_reload_ms = round((time.perf_counter() - start) * 1000, 2)
+            return True
+        except Exception as e:
+            # Keep serving the previous snapshot; the watcher retries on the next file change
+            self._signature = signature
+            self.last_error = str(e)
+            logger.error("⚠️  Data reload failed, keeping the current snapshot: %s", e)
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def reload_in_background(self) -> bool:
+        """Start a reload thread; False if one is already running"""
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, name="data-reload", daemon=True).start()
+        return True
+
+    @property
+    def reloading(self) -> bool:
+        return self._reload_lock.locked()
+
+    def watch(self, interval: float):
+        """Poll the data files every ``interval`` seconds and reload when they change"""
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                if self._signature is not None and _file_signature(self.watch_paths) != self._signature:
+                    self.reload()
+
+        self._watcher = threading.Thread(target=run, name="data-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        self._watcher = None
+
+    def status(self) -> Dict:
+        snapshot = self.current
+        return {
+            'version': snapshot.version if snapshot else None,
+            'dream_version': snapshot.dream_index.version if snapshot else None,
+            'source': snapshot.source if snapshot else None,
+            'destinations': len(snapshot.destinations) if snapshot else 0,
+            'with_coordinates': len(snapshot.spatial) if snapshot else 0,
+            'loaded_at': snapshot.loaded_at if snapshot else None,
+            'reloads': self.reloads,
+            'reloading': self.reloading,
+            'last_reload_ms': self.last_reload_ms,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,119 @@
+"""
+Spatial index over destination coordinates
+Points are stored as unit vectors on the sphere in a KD-tree (scipy's cKDTree),
+so nearest-neighbour and radius queries use exact great-circle distances with
+no special cases at the poles or the antimeridian. A bounding box is answered
+from the circle around it and then filtered exactly.
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.utils.columnar import DestinationStore
+from app.utils.places import EARTH_RADIUS_M
+
+EARTH_RADIUS_KM = EARTH_RADIUS_M / 1000
+# Half the circumference: every point on Earth is within this distance
+MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM
+
+
+def _unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def _chord(radius_km: float) -> float:
+    """Straight-line distance between unit vectors ``radius_km`` apart along the surface"""
+    return 2 * math.sin(min(radius_km, MAX_RADIUS_KM) / EARTH_RADIUS_KM / 2)
+
+
+def _arc_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * np.arcsin(np.clip(chord / 2, 0, 1)) * EARTH_RADIUS_KM
+
+
+class SpatialIndex:
+    """
+    Nearest, radius and bounding-box queries over rows with coordinates.
+
+    Queries return ``(rows, distances_km)``: store row ids and their
+    great-circle distance from the query point, nearest first. Rows without
+    valid coordinates are simply not indexed.
+    """
+
+    def __init__(self, latitude: np.ndarray, longitude: np.ndarray):
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        valid = (np.isfinite(latitude) & np.isfinite(longitude)
+                 & (np.abs(latitude) <= 90) & (np.abs(longitude) <= 180)
+                 & ~((latitude == 0) & (longitude == 0)))
+        # Tree point i is store row self.rows[i]
+        self.rows = np.flatnonzero(valid)
+        self.latitude = latitude[self.rows]
+        self.longitude = longitude[self.rows]
+        # Imported here so importing the app does not load scipy before warm-up
+        from scipy.spatial import cKDTree
+        self.tree = cKDTree(_unit_vectors(self.latitude, self.longitude)) if len(self.rows) else None
+
+    @classmethod
+    def from_store(cls, store: DestinationStore) -> 'SpatialIndex':
+        return cls(store.float_column('latitude'), store.float_column('longitude'))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def nearest(self, lat: float, lon: float, k: int,
+                radius_km: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Up to ``k`` rows closest to (lat, lon), optionally only those within ``radius_km``"""
+        if self.tree is None or k < 1:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        k = min(k, len(self.rows))
+        bound = np.inf if radius_km is None else _chord(radius_km) * (1 + 1e-9)
+        chords, points = self.tree.query(_unit_vectors(np.array([lat]), np.array([lon]))[0], k=k,
+                                         distance_upper_bound=bound)
+        chords, points = np.atleast_1d(chords), np.atleast_1d(points)
+        # Missing neighbours come back as infinite distance
+        found = np.isfinite(chords)
+        return self.rows[points[found]], _arc_km(chords[found])
+
+    def in_bbox(self, lat_min: float, lon_min: float, lat_max: float, lon_max: float,
+                limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Up to ``limit`` rows inside the box, nearest to its centre first.
+        ``lon_min > lon_max`` means the box crosses the antimeridian.
+        """
+        if self.tree is None or limit < 1 or lat_min > lat_max:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        width = (lon_max - lon_min) % 360 or (360.0 if lon_max != lon_min else 0.0)
+        center_lat = (lat_min + lat_max) / 2
+        center_lon = (lon_min + width / 2 + 180) % 360 - 180
+
+        # Circle through the farthest point of the box outline
+        edge_lats = np.linspace(lat_min, lat_max, 9)
+        edge_lons = lon_min + np.linspace(0, width, 9)
+        outline_lat = np.concatenate([edge_lats, edge_lats, np.full(9, lat_min), np.full(9, lat_max)])
+        outline_lon = np.concatenate([np.full(9, lon_min), np.full(9, lon_min + width), edge_lons, edge_lons])
+        outline = _unit_vectors(outline_lat, outline_lon)
+        center = _unit_vectors(np.array([center_lat]), np.array([center_lon]))[0]
+        radius_km = float(_arc_km(np.linalg.norm(outline - center, axis=1)).max())
+
+        # The outline is sampled, so pad the circle; very large boxes just use the whole sphere
+        bound = np.inf if max(width, lat_max - lat_min) > 90 else _chord(radius_km * 1.05)
+
+        # The k nearest points in the circle, filtered to the box, are exactly the box's
+        # nearest points; widen k until enough of them fall inside the box
+        k = min(max(limit * 2, 16), len(self.rows))
+        while True:
+            chords, points = self.tree.query(center, k=k, distance_upper_bound=bound)
+            chords, points = np.atleast_1d(chords), np.atleast_1d(points)
+            found = np.isfinite(chords)
+            chords, points = chords[found], points[found]
+            lat, lon = self.latitude[points], self.longitude[points]
+            inside = (lat >= lat_min) & (lat <= lat_max) & ((lon - lon_min) % 360 <= width)
+            if np.count_nonzero(inside) >= limit or len(points) < k or k == len(self.rows):
+                break
+            k = min(k * 4, len(self.rows))
+        points, chords = points[inside][:limit], chords[inside][:limit]
+        return self.rows[points], _arc_km(chords)
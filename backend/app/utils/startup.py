@@ -0,0 +1,56 @@
+"""
+Startup timing and readiness
+Records how long each warm-up phase takes and whether the worker is ready for traffic
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Per-phase timings for worker boot, plus a ready flag for /ready"""
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self._ready = threading.Event()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block and add it to the report under ``name``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def mark_ready(self):
+        self.record('total', time.perf_counter() - self.started_at)
+        self._ready.set()
+        summary = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        logger.info("🚀 Ready: %s", summary)
+
+    def mark_failed(self, error: Exception):
+        self.error = str(error)
+        logger.error("❌ Warm-up failed: %s", error)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def as_dict(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'error': self.error,
+            'phases_ms': {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+        }
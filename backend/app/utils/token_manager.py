@@ -0,0 +1,265 @@
+"""
+OAuth token manager
+Expiry-aware access tokens with single-flight, proactive background refresh and cross-worker sharing
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, NamedTuple, Optional, Tuple
+
+from app.utils.executor import io_executor
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, workers refresh independently
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class Token(NamedTuple):
+    value: str
+    expires_at: float  # Unix time
+
+
+class FileTokenStore:
+    """
+    Share a token between worker processes through a small JSON file.
+
+    An exclusive ``flock`` on a sibling lock file makes the refresh
+    single-flight across processes: whoever holds it fetches the token,
+    the others wait and then read the freshly written file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f'{path}.lock'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def load(self) -> Optional[Token]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return Token(data['access_token'], float(data['expires_at']))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, token: Token):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'access_token': token.value, 'expires_at': token.expires_at}, f)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def lock(self):
+        fd = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(fd)
+
+    def acquire(self) -> Optional[int]:
+        """Block until the lock is held; pass the result to ``release``"""
+        if fcntl is None:
+            return None
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def release(self, fd: Optional[int]):
+        if fd is None:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+class TokenManager:
+    """
+    Keep an OAuth access token fresh without putting the refresh on the request path.
+
+    ``fetch`` returns ``(access_token, expires_in_seconds)``. Tokens are
+    refreshed ``refresh_margin`` seconds before they expire, by a background
+    timer and by any caller that sees the token inside that window. Only one
+    refresh runs at a time; concurrent callers wait for it instead of
+    fetching their own (single-flight). With a ``store`` the token is shared
+    between worker processes as well.
+    """
+
+    def __init__(self,
+                 fetch: Callable[[], Tuple[str, float]],
+                 store: Optional[FileTokenStore] = None,
+                 refresh_margin: float = 60.0,
+                 name: str = 'token'):
+        self.fetch = fetch
+        self.store = store
+        self.refresh_margin = refresh_margin
+        self.name = name
+
+        self._token: Optional[Token] = None
+        # Last token the provider rejected; never reused, even from the shared store
+        self._rejected: Optional[str] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._timer: Optional[threading.Timer] = None
+        self._async_refresh: Optional[asyncio.Task] = None
+
+    def _is_usable(self, token: Optional[Token], now: float) -> bool:
+        return token is not None and now < token.expires_at
+
+    def _is_fresh(self, token: Optional[Token], now: float) -> bool:
+        return token is not None and now < token.expires_at - self.refresh_margin
+
+    def _is_reusable(self, shared: Optional[Token]) -> bool:
+        return self._is_fresh(shared, time.time()) and shared.value != self._rejected
+
+    def get_token(self) -> Optional[str]:
+        """Return a valid token, refreshing synchronously only if none is usable"""
+        now = time.time()
+        token = self._token
+        if self._is_fresh(token, now):
+            return token.value
+        if self._is_usable(token, now):
+            # Still valid: serve it and refresh in the background
+            self._refresh_in_background()
+            return token.value
+        return self.refresh()
+
+    def refresh(self, force: bool = False) -> Optional[str]:
+        """Fetch a new token unless another thread or worker just did (single-flight)"""
+        with self._lock:
+            if not force and self._is_fresh(self._token, time.time()):
+                return self._token.value
+            try:
+                token = self._refresh_locked(force)
+            except Exception as e:
+                logger.warning("Error refreshing %s: %s", self.name, e)
+                token = self._token
+            return token.value if self._is_usable(token, time.time()) else None
+
+    def _refresh_locked(self, force: bool) -> Token:
+        if self.store is None:
+            return self._set_token(self._fetch_token())
+
+        with self.store.lock():
+            shared = self.store.load()
+            if not force and self._is_reusable(shared):
+                # Another worker refreshed while we waited for the lock
+                return self._set_token(shared)
+            token = self._fetch_token()
+            self.store.save(token)
+            return self._set_token(token)
+
+    def _fetch_token(self) -> Token:
+        value, expires_in = self.fetch()
+        return Token(value, time.time() + float(expires_in))
+
+    def _set_token(self, token: Token) -> Token:
+        self._token = token
+        self._schedule_refresh(token)
+        return token
+
+    def _schedule_refresh(self, token: Token):
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = max(1.0, token.expires_at - self.refresh_margin - time.time())
+        self._timer = threading.Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    async def get_token_async(self, fetch_async: Callable[[], Awaitable[Tuple[str, float]]]) -> Optional[str]:
+        """
+        Async variant of ``get_token``. Refreshes use ``fetch_async`` and are
+        shared between concurrent coroutines through a single task.
+        """
+        now = time.time()
+        token = self._token
+        if self._is_fresh(token, now):
+            return token.value
+
+        if self._async_refresh is None or self._async_refresh.done():
+            self._async_refresh = asyncio.create_task(self._refresh_async(fetch_async))
+            self._async_refresh.add_done_callback(self._async_refresh_done)
+        if self._is_usable(token, now):
+            return token.value
+
+        try:
+            return await asyncio.shield(self._async_refresh)
+        except Exception:
+            # Logged once by _async_refresh_done, however many callers were waiting
+            return None
+
+    def _async_refresh_done(self, task: asyncio.Task):
+        """Log a failed refresh even if nobody awaited it (served the old token meanwhile)"""
+        if self._async_refresh is task:
+            self._async_refresh = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Error refreshing %s: %s", self.name, task.exception())
+
+    async def _refresh_async(self, fetch_async) -> Optional[str]:
+        if self.store is None:
+            return self._set_token(await self._fetch_token_async(fetch_async)).value
+
+        # Same single-flight as the sync path: the cross-worker lock is held for
+        # the whole fetch, and the blocking lock and file I/O run on the I/O pool
+        fd, shared = await io_executor.run(self._lock_and_load)
+        try:
+            if self._is_reusable(shared):
+                # Another worker refreshed while we waited for the lock
+                return self._set_token(shared).value
+            token = await self._fetch_token_async(fetch_async)
+            await io_executor.run(self.store.save, token)
+            return self._set_token(token).value
+        finally:
+            await io_executor.run(self.store.release, fd)
+
+    def _lock_and_load(self) -> Tuple[Optional[int], Optional[Token]]:
+        fd = self.store.acquire()
+        try:
+            return fd, self.store.load()
+        except BaseException:
+            self.store.release(fd)
+            raise
+
+    async def _fetch_token_async(self, fetch_async) -> Token:
+        value, expires_in = await fetch_async()
+        return Token(value, time.time() + float(expires_in))
+
+    def invalidate(self, token: Optional[str] = None):
+        """
+        Drop ``token`` (default: the cached one) after the provider rejects it
+        with a 401. The next call fetches a new token unless another worker
+        already stored a different one.
+        """
+        current = self._token
+        rejected = token or (current.value if current else None)
+        if rejected is not None:
+            self._rejected = rejected
+        if current is None or current.value == rejected:
+            self._token = None
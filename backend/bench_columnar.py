@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Measure destination memory: a list of dicts (what json.load returns) versus
+the columnar DestinationStore used by the indexes.
+
+Rows come from generate_catalog.py, so the value distribution (repeated
+countries, weather labels, travel_with lists, image URLs) matches the
+synthetic scaling catalogs. Memory is measured with tracemalloc and
+reported per 1M destinations, along with the cost of reading rows back.
+
+Usage: python bench_columnar.py [--rows 100000] [--seed 7]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.columnar import DestinationStore
+from generate_catalog import generate
+
+
+def measure(build):
+    """(result, bytes still allocated after build, peak bytes during build)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def per_million(size, rows):
+    return size / rows * 1_000_000 / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    def parsed_rows():
+        # Round-trip through JSON so every row owns its strings, as after json.load
+        return (json.loads(json.dumps(record)) for record, _ in generate(args.rows, args.seed))
+
+    print(f"Measuring {args.rows:,} destinations...")
+    records, dict_bytes, _ = measure(lambda: list(parsed_rows()))
+    del records
+    store, store_bytes, store_peak = measure(lambda: DestinationStore(parsed_rows()))
+    assert store.row_dict(0) == next(parsed_rows())
+
+    print(f"\n{'layout':<20}{'MB':>10}{'MB per 1M':>12}{'bytes/row':>11}")
+    for name, size in (("list of dicts", dict_bytes), ("DestinationStore", store_bytes)):
+        print(f"{name:<20}{size / 2 ** 20:>10.1f}{per_million(size, args.rows):>12.1f}{size / args.rows:>11.0f}")
+    print(f"{dict_bytes / store_bytes:.1f}x smaller; peak while encoding {per_million(store_peak, args.rows):.0f} MB per 1M")
+
+    print(f"\n{'column':<16}{'kind':<8}{'distinct':>10}{'MB per 1M':>12}")
+    for name, kind, distinct, size in store.describe():
+        print(f"{name:<16}{kind:<8}{distinct:>10,}{per_million(size, args.rows):>12.1f}")
+
+    ids = range(0, args.rows, max(1, args.rows // 10_000))
+    start = time.perf_counter()
+    for i in ids:
+        store.row_dict(i)
+    row_us = (time.perf_counter() - start) / len(ids) * 1e6
+    start = time.perf_counter()
+    for i in ids:
+        store[i].get("avg_budget")
+    get_us = (time.perf_counter() - start) / len(ids) * 1e6
+    start = time.perf_counter()
+    store.dicts(0, 10_000)
+    bulk_us = (time.perf_counter() - start) / min(10_000, args.rows) * 1e6
+    print(f"\nrow_dict: {row_us:.2f} µs/row   dicts(): {bulk_us:.2f} µs/row   row view .get(): {get_us:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
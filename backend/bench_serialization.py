@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the response serialization stage on its own.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib json, as
+JSONResponse renders it) with the orjson and MessagePack paths used by
+app.utils.serialization, for the catalog, /recommend and /match-dream
+payload shapes.
+
+Usage: python bench_serialization.py [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.utils.data_loader import load_destinations
+from app.utils.dream_matcher import format_match, get_dream_index
+from app.utils.serialization import dumps, msgpack, packb
+
+
+def fastapi_default(payload):
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def time_per_call(fn, payload, repeat):
+    fn(payload)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    destinations = load_destinations()
+    dream_index = get_dream_index()
+    payloads = {
+        "catalog (GET /)": {"success": "success", "destinations": destinations},
+        "recommend (3 results)": {"status": "success", "recommendations": destinations[:3]},
+        "match-dream (3 results)": {"matches": [format_match(row) for row in dream_index.records[:3]]},
+    }
+
+    serializers = [("fastapi default", fastapi_default), ("orjson", dumps)]
+    if msgpack is not None:
+        serializers.append(("msgpack", packb))
+    else:
+        print("(msgpack not installed; skipping MessagePack)")
+
+    print(f"{'payload':<26}{'serializer':<18}{'µs/op':>10}{'bytes':>10}{'speedup':>10}")
+    for name, payload in payloads.items():
+        baseline = None
+        for label, fn in serializers:
+            micros = time_per_call(fn, payload, args.repeat)
+            baseline = baseline or micros
+            print(f"{name:<26}{label:<18}{micros:>10.1f}{len(fn(payload)):>10}{baseline / micros:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
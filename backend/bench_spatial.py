@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Measure SpatialIndex build time and query latency at catalog scale, and check
+its answers against a brute-force haversine scan.
+
+Points are spread uniformly over the globe (a small share without
+coordinates, as in a partly geocoded catalog). Queries are single-threaded
+and reported in microseconds.
+
+Usage: python bench_spatial.py [--points 2000000] [--queries 2000] [--seed 1]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.spatial import EARTH_RADIUS_KM, SpatialIndex
+
+
+def brute_force_km(lat, lon, q_lat, q_lon):
+    lat, lon, q_lat, q_lon = np.radians(lat), np.radians(lon), np.radians(q_lat), np.radians(q_lon)
+    h = np.sin((lat - q_lat) / 2) ** 2 + np.cos(lat) * np.cos(q_lat) * np.sin((lon - q_lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=2_000_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, args.points)))
+    lon = rng.uniform(-180, 180, args.points)
+    lat[::1000] = np.nan
+
+    start = time.perf_counter()
+    index = SpatialIndex(lat, lon)
+    print(f"Built index over {len(index):,} points in {time.perf_counter() - start:.2f}s")
+
+    queries = np.column_stack((rng.uniform(-80, 80, args.queries), rng.uniform(-180, 180, args.queries)))
+    cases = (
+        ("nearest, k=10", lambda q: index.nearest(q[0], q[1], 10)),
+        ("within 50 km, k=10", lambda q: index.nearest(q[0], q[1], 10, 50)),
+        ("within 500 km, k=1000", lambda q: index.nearest(q[0], q[1], 1000, 500)),
+        ("bbox 2x2 deg, limit 50", lambda q: index.in_bbox(q[0] - 1, q[1] - 1, q[0] + 1, q[1] + 1, 50)),
+        ("bbox 20x40 deg, limit 50", lambda q: index.in_bbox(q[0] - 10, q[1] - 20, q[0] + 10, q[1] + 20, 50)),
+    )
+    print(f"\n{'query':<28}{'µs/query':>10}")
+    for name, run in cases:
+        start = time.perf_counter()
+        for q in queries:
+            run(q)
+        print(f"{name:<28}{(time.perf_counter() - start) / len(queries) * 1e6:>10.1f}")
+
+    valid = np.isfinite(lat)
+    for q_lat, q_lon in queries[:20]:
+        distances = brute_force_km(lat, lon, q_lat, q_lon)
+        distances[~valid] = np.inf
+        expected = np.argsort(distances, kind='stable')[:10]
+        expected = expected[distances[expected] <= 300]
+        rows, found = index.nearest(q_lat, q_lon, 10, 300)
+        assert list(rows) == list(expected) and np.allclose(found, distances[expected])
+
+        inside = valid & (lat >= q_lat - 2) & (lat <= q_lat + 2) & ((lon - (q_lon - 3)) % 360 <= 6)
+        rows, _ = index.in_bbox(q_lat - 2, q_lon - 3, q_lat + 2, q_lon + 3, 25)
+        assert set(rows) <= set(np.flatnonzero(inside)) and len(rows) == min(25, np.count_nonzero(inside))
+    print("\nResults match a brute-force scan")
+
+
+if __name__ == "__main__":
+    main()
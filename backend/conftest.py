@@ -0,0 +1,2 @@
+# test_geoapify.py and test_opentripmap.py are manual scripts against the live APIs
+collect_ignore = ['test_geoapify.py', 'test_opentripmap.py']
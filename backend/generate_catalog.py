@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic destination catalogs of any size for load and scaling tests.
+
+Records follow the schema written by generate_destinations_part1.py's add_dest
+(the JSON read by recommender.py) plus latitude/longitude, and the same rows are
+written in the name,country,description,keywords CSV schema read by dream_matcher.py.
+Output is streamed row by row, so 10M-row catalogs don't need to fit in memory.
+
+Usage:
+    python generate_catalog.py --rows 100000 --seed 7 --out-dir generated
+    python generate_catalog.py --rows 10000000 --only csv
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import time
+
+# Each theme mirrors a section of the hand-written catalog: its weather mix,
+# activity and tag vocabulary, typical seasons and where its budget centres.
+THEMES = {
+    'beach': {
+        'weight': 15,
+        'weather': {'Tropical': 6, 'Hot': 3, 'Pleasant': 1},
+        'activities': ['Beach', 'Water Sports', 'Snorkeling', 'Scuba Diving', 'Swimming', 'Nightlife', 'Yoga', 'Ayurveda', 'Boat Ride', 'Surfing'],
+        'tags': ['beach', 'diving', 'island', 'party', 'peaceful', 'lighthouse', 'coral', 'sunset'],
+        'seasons': {'Oct-Mar': 8, 'Nov-Apr': 2, 'Sep-Mar': 1},
+        'budget': 10000,
+        'nouns': ['Beach', 'Bay', 'Island', 'Cove', 'Shore', 'Lagoon'],
+        'descriptions': ['Pristine {adj} beaches with {feature}', '{adj} coastline known for {feature}', 'Island escape with {feature}'],
+        'features': ['crystal-clear waters', 'coral reefs', 'vibrant nightlife', 'quiet fishing villages', 'golden sand', 'cliff-side views'],
+        'scenery': 'sea sand waves blue water sunshine palm',
+    },
+    'mountain': {
+        'weight': 20,
+        'weather': {'Cold': 3, 'Pleasant': 6},
+        'activities': ['Trekking', 'Skiing', 'Paragliding', 'Camping', 'Cable Car', 'Toy Train', 'Nature Walks', 'Photography', 'Bike Trip', 'River Rafting'],
+        'tags': ['mountains', 'hill-station', 'adventure', 'skiing', 'valley', 'backpacking', 'tea', 'colonial', 'remote'],
+        'seasons': {'Mar-Jun': 5, 'May-Sep': 2, 'Apr-Jun': 2, 'Dec-Mar': 1, 'May-Oct': 1},
+        'budget': 12000,
+        'nouns': ['Hills', 'Valley', 'Peak', 'Pass', 'Heights', 'Ridge'],
+        'descriptions': ['Himalayan {adj} town with {feature}', '{adj} hill station with {feature}', 'High-altitude valley with {feature}'],
+        'features': ['snow-capped peaks', 'tea gardens', 'misty forests', 'alpine meadows', 'glacier views', 'pine trails'],
+        'scenery': 'snow peaks mountains clouds pine cold',
+    },
+    'heritage': {
+        'weight': 25,
+        'weather': {'Hot': 4, 'Pleasant': 6},
+        'activities': ['History', 'Architecture', 'Palace Tours', 'Historical Tours', 'Forts', 'Photography', 'Shopping', 'Art', 'Sculpture', 'Food'],
+        'tags': ['heritage', 'unesco', 'palace', 'fort', 'ruins', 'culture', 'colonial', 'islamic'],
+        'seasons': {'Oct-Mar': 9, 'Nov-Feb': 1},
+        'budget': 8000,
+        'nouns': ['Fort', 'Palace', 'Old Town', 'Ruins', 'Citadel', 'Bazaar'],
+        'descriptions': ['{adj} city of {feature}', 'UNESCO site with {feature}', 'Historic capital known for {feature}'],
+        'features': ['carved temples', 'royal palaces', 'ancient ruins', 'stepwells', 'colonial mansions', 'busy bazaars'],
+        'scenery': 'stone ancient walls domes history old',
+    },
+    'spiritual': {
+        'weight': 20,
+        'weather': {'Pleasant': 6, 'Hot': 3},
+        'activities': ['Temple Tours', 'Temple Visits', 'Pilgrimage', 'Meditation', 'Yoga', 'Ganga Aarti', 'Darshan', 'Monastery Visits', 'Boat Ride'],
+        'tags': ['spiritual', 'temples', 'pilgrimage', 'buddhist', 'sikh', 'peaceful', 'river'],
+        'seasons': {'Oct-Mar': 8, 'Sep-Mar': 1, 'Oct-May': 1},
+        'budget': 6000,
+        'nouns': ['Temple Town', 'Ghats', 'Monastery', 'Shrine', 'Ashram'],
+        'descriptions': ['Sacred town with {feature}', '{adj} pilgrimage centre with {feature}', 'Spiritual retreat known for {feature}'],
+        'features': ['riverside ghats', 'ancient temples', 'evening aarti', 'hilltop monasteries', 'meditation centres'],
+        'scenery': 'temple river bells incense calm prayer',
+    },
+    'nature': {
+        'weight': 15,
+        'weather': {'Pleasant': 6, 'Tropical': 3},
+        'activities': ['Waterfalls', 'Waterfall', 'Wildlife', 'Wildlife Safari', 'Boating', 'Coffee Tours', 'Nature Walks', 'Cave Exploration', 'Bouldering', 'Lakes'],
+        'tags': ['nature', 'waterfall', 'waterfalls', 'wildlife', 'lake', 'eco', 'caves', 'coffee', 'backwaters'],
+        'seasons': {'Oct-Mar': 5, 'Sep-Mar': 2, 'Oct-Jun': 1, 'Feb-May': 1},
+        'budget': 9000,
+        'nouns': ['Falls', 'Forest', 'Lake', 'Reserve', 'Backwaters', 'Caves'],
+        'descriptions': ['{adj} forests with {feature}', 'Green escape known for {feature}', 'National park with {feature}'],
+        'features': ['roaring waterfalls', 'tiger reserves', 'coffee plantations', 'limestone caves', 'houseboats', 'living root bridges'],
+        'scenery': 'green forest waterfall lake mist wildlife',
+    },
+    'desert': {
+        'weight': 5,
+        'weather': {'Hot': 8, 'Cold': 1},
+        'activities': ['Camel Safari', 'Camping', 'Photography', 'Forts', 'Folk Music', 'Stargazing'],
+        'tags': ['desert', 'fort', 'culture', 'unique', 'offbeat'],
+        'seasons': {'Oct-Mar': 9, 'Nov-Feb': 2},
+        'budget': 9000,
+        'nouns': ['Dunes', 'Desert', 'Oasis', 'Salt Flats'],
+        'descriptions': ['Golden desert with {feature}', '{adj} dunes known for {feature}'],
+        'features': ['camel safaris', 'starlit camps', 'sandstone forts', 'white salt flats'],
+        'scenery': 'sand dunes desert stars red orange canyon',
+    },
+}
+
+ADJECTIVES = ['Serene', 'Vibrant', 'Quiet', 'Majestic', 'Colourful', 'Remote', 'Charming', 'Lush', 'Ancient', 'Scenic']
+
+GROUPS = {'Couples': 0.97, 'Family': 0.95, 'Friends': 0.9, 'Solo': 0.35}
+
+# Country weights and rough bounding boxes (lat_min, lat_max, lon_min, lon_max)
+COUNTRIES = {
+    'India': (70, (8.0, 34.0, 69.0, 89.0)),
+    'Nepal': (4, (26.5, 30.3, 80.1, 88.2)),
+    'Sri Lanka': (4, (6.0, 9.8, 79.7, 81.9)),
+    'Indonesia': (4, (-8.8, 5.5, 95.0, 141.0)),
+    'Thailand': (4, (5.6, 20.4, 97.4, 105.6)),
+    'Italy': (3, (37.0, 46.5, 7.0, 18.5)),
+    'USA': (4, (25.0, 48.5, -124.0, -67.0)),
+    'Peru': (2, (-18.3, -0.1, -81.3, -68.7)),
+    'Morocco': (2, (27.7, 35.9, -13.2, -1.0)),
+    'Iceland': (1, (63.4, 66.5, -24.5, -13.5)),
+    'Croatia': (2, (42.4, 46.5, 13.5, 19.4)),
+}
+
+SYLLABLES = ['ka', 'ra', 'ma', 'li', 'dha', 'pur', 'van', 'shi', 'no', 'ta', 'gar', 'lo', 'mu', 'sa', 'ni',
+             'bha', 'ko', 've', 'ri', 'an', 'del', 'jha', 'tu', 'mar', 'ya', 'chi', 'so', 'pa', 'ha', 'en']
+
+IMAGES = [
+    'https://images.unsplash.com/photo-1512343879784-a960bf40e7f2?w=800',
+    'https://images.unsplash.com/photo-1559827260-dc66d52bef19?w=800',
+    'https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=800',
+    'https://images.unsplash.com/photo-1626621341517-bbf3d9990a23?w=800',
+    'https://images.unsplash.com/photo-1590856642302-a6b63b63b29e?w=800',
+    'https://images.unsplash.com/photo-1571847028735-a7f2c86f6c9c?w=800',
+    'https://images.unsplash.com/photo-1605649487212-47bdab064df7?w=800',
+]
+
+
+def weighted(rng, choices):
+    """Pick a key from a {value: weight} dict"""
+    return rng.choices(list(choices), weights=list(choices.values()))[0]
+
+
+def place_name(rng):
+    name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    return name.capitalize()
+
+
+def budget_range(rng, centre):
+    """
+    A '₹low - ₹high' string like the hand-written catalog: lognormal lower
+    bound around the theme's centre, upper bound about twice that.
+    """
+    low = max(2000, int(round(rng.lognormvariate(math.log(centre), 0.45) / 1000)) * 1000)
+    high = int(round(low * rng.uniform(1.8, 2.2) / 1000)) * 1000
+    return f'₹{low:,} - ₹{high:,}'
+
+
+def make_dest(rng, dest_id, countries, themes):
+    """One destination in add_dest's schema, plus coordinates and the CSV keywords"""
+    theme = THEMES[weighted(rng, themes)]
+    country = weighted(rng, countries)
+    lat_min, lat_max, lon_min, lon_max = COUNTRIES[country][1]
+
+    base = place_name(rng)
+    name = f"{base} {rng.choice(theme['nouns'])}" if rng.random() < 0.6 else base
+    adjective = rng.choice(ADJECTIVES)
+    description = rng.choice(theme['descriptions']).format(adj=adjective.lower(), feature=rng.choice(theme['features']))
+    description = description[0].upper() + description[1:]
+    activities = rng.sample(theme['activities'], rng.randint(2, 4))
+    tags = rng.sample(theme['tags'], 2)
+    location = f'{base} {country}'
+
+    record = {
+        'id': dest_id,
+        'name': name,
+        'country': country,
+        'description': description,
+        'avg_budget': budget_range(rng, theme['budget']),
+        'weather': [weighted(rng, theme['weather'])],
+        'activities': activities,
+        'travel_with': [group for group, p in GROUPS.items() if rng.random() < p] or ['Couples'],
+        'best_season': [weighted(rng, theme['seasons'])],
+        'image': rng.choice(IMAGES),
+        'googlemap_link': f'https://maps.google.com/?q={location.replace(" ", "+")}',
+        'tags': tags,
+        'latitude': round(rng.uniform(lat_min, lat_max), 5),
+        'longitude': round(rng.uniform(lon_min, lon_max), 5),
+    }
+    keywords = ' '.join(dict.fromkeys(
+        tags + [a.lower() for a in activities] + rng.sample(theme['scenery'].split(), 3) + [adjective.lower()]
+    ))
+    return record, keywords
+
+
+def generate(rows, seed):
+    """Yield (record, keywords) pairs; the same seed always yields the same catalog"""
+    rng = random.Random(seed)
+    countries = {country: weight for country, (weight, _) in COUNTRIES.items()}
+    themes = {name: theme['weight'] for name, theme in THEMES.items()}
+    for dest_id in range(1, rows + 1):
+        yield make_dest(rng, dest_id, countries, themes)
+
+
+def write_catalog(rows, seed, json_path=None, csv_path=None, progress_every=100000):
+    """Stream a generated catalog to a JSON array file and/or a dream-matcher CSV"""
+    json_file = open(json_path, 'w', encoding='utf-8') if json_path else None
+    csv_file = open(csv_path, 'w', encoding='utf-8', newline='') if csv_path else None
+    try:
+        writer = None
+        if csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['name', 'country', 'description', 'keywords'])
+        if json_file:
+            json_file.write('[')
+
+        start = time.perf_counter()
+        for count, (record, keywords) in enumerate(generate(rows, seed), 1):
+            if json_file:
+                json_file.write(',\n  ' if count > 1 else '\n  ')
+                json_file.write(json.dumps(record))
+            if writer:
+                writer.writerow([record['name'], record['country'], record['description'], keywords])
+            if progress_every and count % progress_every == 0:
+                print(f'  {count:,} rows ({count / (time.perf_counter() - start):,.0f} rows/s)')
+
+        if json_file:
+            json_file.write('\n]\n')
+    finally:
+        if json_file:
+            json_file.close()
+        if csv_file:
+            csv_file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help='Number of destinations to generate')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed; same seed, same catalog')
+    parser.add_argument('--out-dir', default='generated', help='Directory for destinations.json / destinations.csv')
+    parser.add_argument('--only', choices=['json', 'csv'], help='Write just one of the two files')
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    json_path = os.path.join(args.out_dir, 'destinations.json') if args.only != 'csv' else None
+    csv_path = os.path.join(args.out_dir, 'destinations.csv') if args.only != 'json' else None
+
+    print(f'Generating {args.rows:,} destinations (seed {args.seed})...')
+    start = time.perf_counter()
+    write_catalog(args.rows, args.seed, json_path, csv_path)
+    for path in filter(None, [json_path, csv_path]):
+        print(f'✅ Wrote {path} ({os.path.getsize(path) / 1e6:,.1f} MB)')
+    print(f'Done in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+One-time geocoding of the destination catalog: adds latitude/longitude to
+every record that lacks them, so the /nearby endpoints can find it.
+
+Coordinates come from the record's googlemap_link when it already holds
+"?q=<lat>,<lon>", and otherwise from OpenTripMap's /geoname lookup of the
+link's place text ("Varkala+Kerala" is tried as "Varkala Kerala", then
+"Varkala"). Lookups are cached, so an interrupted run can simply be
+restarted. The file is rewritten atomically.
+
+Needs OPENTRIPMAP_API_KEY for lookups; without it (or with --links-only)
+only coordinates embedded in links are used.
+
+Usage:
+    python geocode_destinations.py [--path app/data/destinations.json] [--rate 5] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.data_loader import DESTINATIONS_FILE
+from app.utils.opentripmap_client import get_opentripmap_client
+
+_COORDINATES = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$')
+
+# ISO 3166 codes for /geoname's country filter
+COUNTRY_CODES = {'India': 'IN', 'Nepal': 'NP', 'Bhutan': 'BT', 'Sri Lanka': 'LK', 'Maldives': 'MV'}
+
+
+def link_query(link: str) -> str:
+    """The place text (or coordinates) after ?q= in a Google Maps link"""
+    values = parse_qs(urlparse(link or '').query).get('q')
+    return values[0].strip() if values else ''
+
+
+def has_coordinates(record) -> bool:
+    try:
+        lat, lon = float(record['latitude']), float(record['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return -90 <= lat <= 90 and -180 <= lon <= 180 and not (lat == 0 and lon == 0)
+
+
+def geocode(client, query: str, country: str, pause: float):
+    """Try the full place text, then without its last word (usually the state)"""
+    words = query.split()
+    for candidate in dict.fromkeys([' '.join(words), ' '.join(words[:-1])]):
+        if not candidate:
+            continue
+        time.sleep(pause)
+        point = client.geocode(candidate, COUNTRY_CODES.get(country))
+        if point is not None:
+            return point
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default=DESTINATIONS_FILE)
+    parser.add_argument('--rate', type=float, default=5, help='Lookups per second (OpenTripMap free tier allows 10)')
+    parser.add_argument('--links-only', action='store_true', help='Only use coordinates embedded in links')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args()
+
+    with open(args.path, 'r', encoding='utf-8') as f:
+        destinations = json.load(f)
+
+    client = get_opentripmap_client()
+    lookups = not args.links_only and bool(client.api_key)
+    if not lookups and not args.links_only:
+        print('⚠️  OPENTRIPMAP_API_KEY is not set; only coordinates embedded in links will be used')
+    pause = 1 / args.rate if args.rate > 0 else 0
+
+    counts = {'present': 0, 'link': 0, 'geocoded': 0, 'missing': 0}
+    for record in destinations:
+        if has_coordinates(record):
+            counts['present'] += 1
+            continue
+        query = link_query(record.get('googlemap_link', '')).replace('+', ' ') or record.get('name', '')
+        match = _COORDINATES.match(query)
+        point, source = None, 'missing'
+        if match:
+            point, source = (float(match.group(1)), float(match.group(2))), 'link'
+        elif lookups:
+            point = geocode(client, query, record.get('country', ''), pause)
+            source = 'geocoded' if point else 'missing'
+        counts[source] += 1
+        if point is None:
+            print(f"  ✗ {record.get('name')}: no coordinates for {query!r}")
+            continue
+        record['latitude'], record['longitude'] = round(point[0], 5), round(point[1], 5)
+        print(f"  ✓ {record.get('name')}: {record['latitude']}, {record['longitude']} ({source})")
+
+    print(f"\n{len(destinations)} destinations: {counts['present']} already had coordinates, "
+          f"{counts['link']} from links, {counts['geocoded']} geocoded, {counts['missing']} still missing")
+    if args.dry_run or not (counts['link'] or counts['geocoded']):
+        return
+
+    directory = os.path.dirname(os.path.abspath(args.path))
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False) as f:
+        json.dump(destinations, f, indent=2)
+    os.replace(f.name, args.path)
+    print(f"✅ Updated {args.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+Load-testing harness: local stand-in upstream APIs (fake_upstreams) and a
+load driver reporting per-endpoint throughput and tail latency (driver).
+"""
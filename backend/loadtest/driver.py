@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Load driver for the backend API.
+
+Runs a weighted mix of requests against a running server with a fixed number
+of concurrent workers and reports throughput and p50/p95/p99 latency per
+endpoint.
+
+Usage:
+    python -m loadtest.driver --base-url http://127.0.0.1:8000 --concurrency 32 --duration 30 \\
+        --mix recommend=6,match-dream=2,catalog=1,batch=1 --profiles 200
+
+``--profiles N`` draws preferences from N fixed profiles (so repeated queries
+exercise the result cache); by default every request gets fresh random ones.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import httpx
+
+BUDGETS = ['low', 'medium', 'high']
+WEATHER = ['Tropical', 'Pleasant', 'Hot', 'Cold', 'warm']
+ACTIVITIES = ['Beach', 'Trekking', 'culture', 'food', 'History', 'Temple Tours', 'Waterfalls', 'Shopping',
+              'Nightlife', 'Water Sports', 'Photography', 'Wildlife', 'Yoga', 'adventure', 'nature']
+GROUPS = [None, 'Couples', 'Family', 'Friends', 'Solo']
+SEASONS = [None, 'winter', 'summer', 'monsoon', 'Oct-Mar', 'Mar-Jun']
+DREAMS = ['red mountains and caves', 'turquoise lakes in a green forest', 'quiet beach with palm trees',
+          'snowy peaks under northern lights', 'ancient temples in the jungle', 'desert dunes under the stars']
+
+
+def random_preferences(rng: random.Random) -> Dict:
+    preferences = {
+        'budget': rng.choice(BUDGETS),
+        'weather': rng.sample(WEATHER, rng.randint(1, 2)),
+        'activities': rng.sample(ACTIVITIES, rng.randint(1, 3)),
+        'group_type': rng.choice(GROUPS),
+        'season': rng.choice(SEASONS),
+    }
+    # Optional fields are left out rather than sent as null, like the frontend does
+    return {key: value for key, value in preferences.items() if value is not None}
+
+
+class Workload:
+    """Builds requests for each scenario"""
+
+    def __init__(self, profiles: int, batch_size: int, seed: int):
+        self.rng = random.Random(seed)
+        self.profiles = [random_preferences(self.rng) for _ in range(profiles)]
+        self.batch_size = batch_size
+
+    def preferences(self) -> Dict:
+        return self.rng.choice(self.profiles) if self.profiles else random_preferences(self.rng)
+
+    def request(self, scenario: str):
+        """Return (method, path, kwargs) for one request of ``scenario``"""
+        if scenario == 'recommend':
+            return 'POST', '/recommend', {'json': self.preferences()}
+        if scenario == 'batch':
+            return 'POST', '/recommend/batch', {'json': {'queries': [self.preferences() for _ in range(self.batch_size)]}}
+        if scenario == 'match-dream':
+            return 'POST', '/match-dream', {'json': {'dream': self.rng.choice(DREAMS)}}
+        if scenario == 'catalog':
+            return 'GET', '/', {'headers': {'Accept-Encoding': 'gzip'}}
+        if scenario == 'ready':
+            return 'GET', '/ready', {}
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+
+SCENARIOS = ('recommend', 'batch', 'match-dream', 'catalog', 'ready')
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct * len(sorted_values) / 100) - 1))
+    return sorted_values[rank]
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, scenario: str, seconds: float, status):
+        self.latencies[scenario].append(seconds * 1000)
+        self.statuses[scenario][status] += 1
+
+    def summary(self, elapsed: float) -> Dict:
+        report = {}
+        for scenario in sorted(self.latencies):
+            values = sorted(self.latencies[scenario])
+            statuses = self.statuses[scenario]
+            ok = sum(count for status, count in statuses.items() if isinstance(status, int) and status < 400)
+            report[scenario] = {
+                'requests': len(values),
+                'ok': ok,
+                'errors': len(values) - ok,
+                'rps': round(len(values) / elapsed, 1),
+                'p50_ms': round(percentile(values, 50), 1),
+                'p95_ms': round(percentile(values, 95), 1),
+                'p99_ms': round(percentile(values, 99), 1),
+                'max_ms': round(values[-1], 1),
+                'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+            }
+        return report
+
+
+async def worker(client: httpx.AsyncClient, workload: Workload, mix: Dict[str, float],
+                 results: Results, deadline: float, remaining: List[int], warmup_until: float):
+    scenarios, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        if remaining[0] == 0:
+            return
+        remaining[0] -= 1
+        scenario = workload.rng.choices(scenarios, weights)[0]
+        method, path, kwargs = workload.request(scenario)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if start >= warmup_until:
+            results.record(scenario, time.perf_counter() - start, status)
+
+
+async def run(args) -> Dict:
+    workload = Workload(args.profiles, args.batch_size, args.seed)
+    results = Results()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        warmup_until = start + args.warmup
+        deadline = warmup_until + args.duration
+        remaining = [args.requests or -1]
+        await asyncio.gather(*[
+            worker(client, workload, args.mix, results, deadline, remaining, warmup_until)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - warmup_until
+    return {'concurrency': args.concurrency, 'elapsed_s': round(elapsed, 2), 'endpoints': results.summary(elapsed)}
+
+
+def print_report(report: Dict):
+    print(f"\nconcurrency {report['concurrency']}, {report['elapsed_s']}s")
+    header = f"{'endpoint':<14}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    print(header)
+    print('-' * len(header))
+    for scenario, row in report['endpoints'].items():
+        print(f"{scenario:<14}{row['requests']:>9}{row['errors']:>8}{row['rps']:>9}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}")
+        failures = {status: count for status, count in row['statuses'].items() if not status.startswith(('2', '3'))}
+        if failures:
+            print(f"{'':<14}non-2xx: {failures}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to measure')
+    parser.add_argument('--warmup', type=float, default=0, help='Seconds of load before measuring starts')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests (0 = run for --duration)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('recommend=6,match-dream=2,catalog=1,batch=1'))
+    parser.add_argument('--profiles', type=int, default=0, help='Distinct preference profiles to draw from (0 = random)')
+    parser.add_argument('--batch-size', type=int, default=16, help='Queries per /recommend/batch request')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the OpenTripMap, Geoapify and Amadeus APIs.
+
+Serves the endpoints the clients call, with deterministic fake data, under one
+prefix per provider:
+
+    /opentripmap/0.1/en/places/bbox        /opentripmap/0.1/en/places/xid/{xid}
+    /opentripmap/0.1/en/places/geoname
+    /geoapify/v2/places
+    /amadeus/v1/security/oauth2/token      /amadeus/v1/shopping/activities
+
+Each provider has its own latency distribution (lognormal around a median),
+error rate and token-bucket rate limit (429 with Retry-After when exceeded).
+
+Usage:
+    python -m loadtest.fake_upstreams --port 9100 --latency-ms 80 --error-rate 0.01 \\
+        --set opentripmap.rate_limit=50 --set amadeus.latency_ms=300
+
+Then point the backend at it:
+    OPENTRIPMAP_BASE_URL=http://127.0.0.1:9100/opentripmap/0.1/en/places
+    GEOAPIFY_BASE_URL=http://127.0.0.1:9100/geoapify/v2
+    AMADEUS_BASE_URL=http://127.0.0.1:9100/amadeus
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import secrets
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+PROVIDERS = ('opentripmap', 'geoapify', 'amadeus')
+
+KINDS = ['beaches', 'natural', 'cultural', 'museums', 'foods', 'sport', 'climbing', 'shops',
+         'interesting_places', 'tourist_facilities', 'theatres_and_entertainments', 'religion']
+
+STATES = ['Kerala', 'Goa', 'Rajasthan', 'Himachal Pradesh', 'Karnataka', 'Tamil Nadu', 'Uttarakhand', 'Sikkim']
+
+# Density of places behind /bbox (the India box still returns a full page)
+PLACES_PER_SQUARE_DEGREE = 40
+
+
+class UpstreamProfile:
+    """Latency, failure and rate-limit behaviour for one fake provider"""
+
+    def __init__(self,
+                 latency_ms: float = 50,
+                 sigma: float = 0.5,
+                 error_rate: float = 0.0,
+                 rate_limit: float = 0,
+                 burst: float = 0,
+                 token_ttl: int = 1799):
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # requests/second, 0 = unlimited
+        self.burst = burst or max(1.0, rate_limit)
+        self.token_ttl = token_ttl
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'errors': 0, 'rate_limited': 0}
+
+    def set(self, name: str, value: str):
+        if not hasattr(self, name) or name.startswith('_') or name == 'counters':
+            raise ValueError(f"Unknown profile setting: {name}")
+        setattr(self, name, type(getattr(self, name))(value))
+        if name == 'rate_limit':
+            self.burst = max(self.burst, 1.0, self.rate_limit)
+            self._tokens = self.burst
+
+    def latency(self) -> float:
+        """Seconds to wait before answering: lognormal with median ``latency_ms``"""
+        if self.latency_ms <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.latency_ms), self.sigma) / 1000
+
+    def admit(self) -> Optional[float]:
+        """Take a rate-limit token; returns seconds to wait if none is left"""
+        if self.rate_limit <= 0:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self.rate_limit
+
+    def as_dict(self) -> Dict:
+        return {
+            'latency_ms': self.latency_ms,
+            'sigma': self.sigma,
+            'error_rate': self.error_rate,
+            'rate_limit': self.rate_limit,
+            'burst': self.burst,
+            **self.counters,
+        }
+
+
+def _rng(*parts) -> random.Random:
+    """Random generator seeded from the request, so the same query gets the same data"""
+    seed = hashlib.sha256('|'.join(map(str, parts)).encode()).digest()[:8]
+    return random.Random(int.from_bytes(seed, 'big'))
+
+
+def _place_name(rng: random.Random) -> str:
+    syllables = ['ka', 'ra', 'ma', 'li', 'pur', 'van', 'shi', 'no', 'ta', 'gar', 'mu', 'sa', 'ni', 'ko', 'ri']
+    return ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def create_app(profiles: Dict[str, UpstreamProfile]) -> FastAPI:
+    app = FastAPI(title='Fake upstreams')
+    issued_tokens = {}
+
+    async def behave(provider: str) -> Optional[JSONResponse]:
+        """Apply the provider's rate limit, latency and error rate; returns an error response or None"""
+        profile = profiles[provider]
+        profile.counters['requests'] += 1
+        retry_after = profile.admit()
+        if retry_after is not None:
+            profile.counters['rate_limited'] += 1
+            return JSONResponse(status_code=429, content={'error': 'Too Many Requests'},
+                                headers={'Retry-After': str(max(1, math.ceil(retry_after)))})
+        await asyncio.sleep(profile.latency())
+        if profile.error_rate and random.random() < profile.error_rate:
+            profile.counters['errors'] += 1
+            return JSONResponse(status_code=random.choice([500, 502, 503]), content={'error': 'Upstream failure'})
+        return None
+
+    @app.get('/opentripmap/0.1/en/places/bbox')
+    async def opentripmap_bbox(lon_min: float, lat_min: float, lon_max: float, lat_max: float,
+                               kinds: str = 'interesting_places', limit: int = 10):
+        error = await behave('opentripmap')
+        if error:
+            return error
+        rng = _rng('bbox', lon_min, lat_min, lon_max, lat_max, kinds)
+        # Small boxes hold fewer places, so the ingestion crawl's tile splitting ends
+        available = math.ceil(abs(lon_max - lon_min) * abs(lat_max - lat_min) * PLACES_PER_SQUARE_DEGREE)
+        features = []
+        for _ in range(min(limit, 500, available)):
+            lon, lat = rng.uniform(lon_min, lon_max), rng.uniform(lat_min, lat_max)
+            xid = f"N{rng.randrange(10 ** 9)}"
+            features.append({
+                'type': 'Feature',
+                'id': xid,
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {'xid': xid, 'name': _place_name(rng), 'rate': rng.randint(1, 7), 'kinds': kinds},
+            })
+        return {'type': 'FeatureCollection', 'features': features}
+
+    @app.get('/opentripmap/0.1/en/places/xid/{xid}')
+    async def opentripmap_details(xid: str):
+        error = await behave('opentripmap')
+        if error:
+            return error
+        rng = _rng('xid', xid)
+        name = _place_name(rng)
+        state = rng.choice(STATES)
+        return {
+            'xid': xid,
+            'name': name,
+            'address': {'city': _place_name(rng), 'state': state, 'country': 'India'},
+            'point': {'lon': rng.uniform(68.2, 97.4), 'lat': rng.uniform(8.0, 35.5)},
+            'kinds': ','.join(rng.sample(KINDS, 3)),
+            'wikipedia_extracts': {'text': f"{name} is a well-known attraction in {state}."},
+            'preview': {'source': f"https://images.example.com/{xid}.jpg"} if rng.random() < 0.5 else {},
+        }
+
+    @app.get('/opentripmap/0.1/en/places/geoname')
+    async def opentripmap_geoname(name: str, country: str = ''):
+        error = await behave('opentripmap')
+        if error:
+            return error
+        rng = _rng('geoname', name.lower(), country.upper())
+        if rng.random() < 0.1:
+            return JSONResponse(status_code=404, content={'error': 'Not found', 'status': 'NOT_FOUND'})
+        return {
+            'name': name,
+            'country': country.upper() or 'IN',
+            'lat': rng.uniform(8.0, 35.5),
+            'lon': rng.uniform(68.2, 97.4),
+            'population': rng.randrange(1000, 5_000_000),
+            'timezone': 'Asia/Kolkata',
+            'status': 'OK',
+        }
+
+    @app.get('/geoapify/v2/places')
+    async def geoapify_places(categories: str = 'tourism.attraction', limit: int = 20, filter: str = '', bias: str = ''):
+        error = await behave('geoapify')
+        if error:
+            return error
+        rng = _rng('geoapify', categories, filter)
+        features = []
+        for _ in range(min(limit, 500)):
+            lon, lat = rng.uniform(68.2, 97.4), rng.uniform(8.0, 35.5)
+            features.append({
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {
+                    'name': _place_name(rng),
+                    'city': _place_name(rng),
+                    'state': rng.choice(STATES),
+                    'country': 'India',
+                    'lat': lat,
+                    'lon': lon,
+                    'categories': categories.split(','),
+                },
+            })
+        return {'type': 'FeatureCollection', 'features': features}
+
+    @app.post('/amadeus/v1/security/oauth2/token')
+    async def amadeus_token(request: Request):
+        error = await behave('amadeus')
+        if error:
+            return error
+        form = parse_qs((await request.body()).decode())
+        if form.get('grant_type') != ['client_credentials'] or not form.get('client_id'):
+            return JSONResponse(status_code=401, content={'error': 'invalid_client'})
+        token = secrets.token_urlsafe(24)
+        ttl = profiles['amadeus'].token_ttl
+        issued_tokens[token] = time.time() + ttl
+        return {'type': 'amadeusOAuth2Token', 'access_token': token, 'token_type': 'Bearer', 'expires_in': ttl}
+
+    @app.get('/amadeus/v1/shopping/activities')
+    async def amadeus_activities(latitude: float, longitude: float, radius: int = 1, limit: int = 10,
+                                 authorization: str = Header('')):
+        token = authorization.removeprefix('Bearer ').strip()
+        if issued_tokens.get(token, 0) < time.time():
+            return JSONResponse(status_code=401, content={'errors': [{'code': 38192, 'title': 'Access token expired'}]})
+        error = await behave('amadeus')
+        if error:
+            return error
+        rng = _rng('amadeus', latitude, longitude, radius)
+        return {'data': [{
+            'id': str(rng.randrange(10 ** 7)),
+            'type': 'activity',
+            'name': f"{_place_name(rng)} tour",
+            'shortDescription': 'A guided local experience.',
+            'geoCode': {'latitude': latitude + rng.uniform(-0.5, 0.5), 'longitude': longitude + rng.uniform(-0.5, 0.5)},
+            'price': {'amount': f"{rng.randint(10, 300)}.00", 'currencyCode': 'EUR'},
+            'pictures': [f"https://images.example.com/activity-{i}.jpg"],
+        } for i in range(min(limit, 100))]}
+
+    @app.get('/_stats')
+    def stats():
+        return {name: profile.as_dict() for name, profile in profiles.items()}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency-ms', type=float, default=50, help='Median response latency for every provider')
+    parser.add_argument('--sigma', type=float, default=0.5, help='Lognormal spread of the latency (0 = fixed)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 5xx')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Requests/second per provider before 429s (0 = unlimited)')
+    parser.add_argument('--set', action='append', default=[], metavar='PROVIDER.SETTING=VALUE',
+                        help='Per-provider override, e.g. opentripmap.error_rate=0.2')
+    args = parser.parse_args()
+
+    profiles = {
+        name: UpstreamProfile(args.latency_ms, args.sigma, args.error_rate, args.rate_limit)
+        for name in PROVIDERS
+    }
+    for override in args.set:
+        target, _, value = override.partition('=')
+        provider, _, setting = target.partition('.')
+        if provider not in profiles:
+            parser.error(f"Unknown provider in --set {override}")
+        profiles[provider].set(setting, value)
+
+    import uvicorn
+    print(f"🧪 Fake upstreams on http://{args.host}:{args.port} ({', '.join(PROVIDERS)})")
+    uvicorn.run(create_app(profiles), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+import pytest
+
+
+class FakeClock:
+    """Stands in for the ``time`` module of the code under test"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    monotonic = time
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, NegativeCacheHit
+
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return CircuitBreaker('test', failure_threshold=3, reset_timeout=30, half_open_max_calls=1, negative_ttl=60)
+
+
+def fail():
+    raise RuntimeError('upstream down')
+
+
+def trip(breaker):
+    for i in range(breaker.failure_threshold):
+        breaker.record_failure(f'q{i}')
+
+
+def test_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_success()  # Resets the count
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError, match='circuit is open') as raised:
+        breaker.before_call('fresh query')
+    assert not isinstance(raised.value, NegativeCacheHit)
+    assert breaker.snapshot()['trips'] == 1
+
+
+def test_half_open_probe_success_closes(breaker, clock):
+    trip(breaker)
+    clock.advance(29)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()['retry_in'] == 1
+
+    clock.advance(1)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one probe at a time
+    with pytest.raises(CircuitOpenError, match='circuit is half_open'):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    assert breaker.call(None, lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
+
+    trip(breaker)
+    clock.advance(30)
+    with pytest.raises(RuntimeError):
+        breaker.call(None, fail)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()['trips'] == 3
+
+
+def test_negative_cache_rejects_a_failed_key_while_closed(breaker, clock):
+    with pytest.raises(RuntimeError):
+        breaker.call('q', fail)
+    assert breaker.state == CLOSED
+    assert breaker.allow('other')
+
+    with pytest.raises(NegativeCacheHit, match='test q negatively cached') as raised:
+        breaker.call('q', fail)
+    assert 'circuit' not in str(raised.value)
+    assert breaker.snapshot()['negative_hits'] == 1
+    assert breaker.snapshot()['negative_cache_size'] == 1
+
+    clock.advance(60)
+    assert breaker.call('q', lambda: 'ok') == 'ok'
+    assert breaker.snapshot()['negative_cache_size'] == 0
+
+
+def test_negative_cache_can_be_disabled(clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    breaker = CircuitBreaker('test', negative_ttl=0)
+    breaker.record_failure('q')
+    assert breaker.allow('q')
+
+
+def test_call_async(breaker):
+    async def ok():
+        return 'ok'
+
+    async def down():
+        fail()
+
+    assert asyncio.run(breaker.call_async('q', ok)) == 'ok'
+    with pytest.raises(RuntimeError):
+        asyncio.run(breaker.call_async('q', down))
+    with pytest.raises(NegativeCacheHit):
+        asyncio.run(breaker.call_async('q', ok))
+
+
+def test_cancelled_half_open_probe_frees_its_slot(breaker, clock):
+    async def hang():
+        await asyncio.sleep(10)
+
+    trip(breaker)
+    clock.advance(30)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(breaker.call_async('q', hang), 0.01))
+    assert breaker.state == HALF_OPEN
+    assert breaker.snapshot()['negative_cache_size'] == 3  # Only the tripping failures
+
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_closed_call_records_nothing(breaker):
+    async def hang():
+        await asyncio.sleep(10)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(breaker.call_async('q', hang), 0.01))
+    assert breaker.allow('q')
+    assert breaker.snapshot()['failures'] == 0
+
+
+def test_release_probe_outside_half_open_is_a_no_op(breaker):
+    breaker.release_probe()
+    trip(breaker)
+    breaker.release_probe()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
@@ -0,0 +1,69 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from app.utils.columnar import DestinationStore, DictColumn, NumericColumn, ObjectColumn
+
+RECORDS = [
+    {'id': 1, 'name': 'Jaipur', 'activities': ['Forts', 'Shopping'], 'latitude': 26.9, 'rating': 4},
+    {'id': 2, 'name': 'Goa', 'activities': ['Beach'], 'latitude': 15.3, 'rating': 4.5, 'extra': {'a': 1}},
+    {'id': 3, 'name': 'Jaipur', 'activities': ['Forts', 'Shopping'], 'rating': '4.2'},
+    {'name': 'Leh', 'id': 4, 'activities': [], 'latitude': None},
+]
+
+
+@pytest.fixture
+def store():
+    return DestinationStore(RECORDS)
+
+
+def test_rows_round_trip(store):
+    assert len(store) == 4
+    assert store.dicts() == RECORDS
+    assert [store.row_dict(i) for i in range(4)] == RECORDS
+    # Key order follows the first record that had each key
+    assert list(store.row_dict(3)) == ['id', 'name', 'activities', 'latitude']
+
+
+def test_column_encodings(store):
+    assert isinstance(store.columns['id'], NumericColumn)
+    assert isinstance(store.columns['name'], DictColumn)
+    assert store.columns['name'].values == [None, 'Jaipur', 'Goa', 'Leh']
+    assert store.columns['activities'].kind == 'strs'
+    # Mixed int/float/str and nested values fall back to plain objects, unchanged
+    assert isinstance(store.columns['rating'], ObjectColumn)
+    assert isinstance(store.columns['extra'], ObjectColumn)
+
+
+def test_row_view_behaves_like_the_dict(store):
+    row = store[1]
+    assert dict(row) == RECORDS[1]
+    assert row['activities'] == ['Beach']
+    assert 'extra' not in store[0]
+    with pytest.raises(KeyError):
+        store[0]['extra']
+    assert store[-1]['name'] == 'Leh'
+    with pytest.raises(IndexError):
+        store[4]
+    assert [r['id'] for r in store[1:3]] == [2, 3]
+
+
+def test_field_selection_and_slices(store):
+    assert store.dicts(1, 3, fields=['name', 'missing', 'id']) == [{'name': 'Goa', 'id': 2}, {'name': 'Jaipur', 'id': 3}]
+    assert store.row_dict(2, fields=['latitude']) == {}
+
+
+def test_float_column(store):
+    np.testing.assert_array_equal(store.float_column('latitude'), [26.9, 15.3, np.nan, np.nan])
+    np.testing.assert_array_equal(store.float_column('rating'), [4.0, 4.5, 4.2, np.nan])
+    assert np.isnan(store.float_column('missing')).all()
+
+
+def test_pickles_for_process_workers(store):
+    assert pickle.loads(pickle.dumps(store)).dicts() == RECORDS
+
+
+def test_of_reuses_a_store(store):
+    assert DestinationStore.of(store) is store
+    assert DestinationStore.of(RECORDS).dicts() == RECORDS
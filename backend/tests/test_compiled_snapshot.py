@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.utils import compiled_snapshot
+from app.utils.compiled_snapshot import CURRENT, CompiledSnapshot, compile_snapshot, write_snapshot
+from app.utils.recommender import recommend_local
+from app.utils.snapshot import build_from_files, load_compiled
+
+QUERIES = [
+    ('low', ['warm'], ['beach'], None, 'winter'),
+    ('medium', ['cold'], ['trekking', 'adventure'], 'friends', None),
+    ('high', [], ['heritage'], 'family', 'Oct-Mar'),
+]
+DREAMS = ['quiet beach with sunsets', 'snowy mountains and monasteries', 'old forts and palaces']
+
+
+@pytest.fixture(scope='module')
+def built():
+    snapshot = build_from_files()
+    # A small dense index, so the ANN arrays are round-tripped too
+    snapshot.dream_index.build_dense(dims=8, nlist=3, nprobe=3)
+    return snapshot
+
+
+@pytest.fixture(scope='module')
+def compiled(built, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('compiled'))
+    write_snapshot(path, built)
+    return CompiledSnapshot(path)
+
+
+def test_destinations_round_trip(built, compiled):
+    assert compiled.version == built.version
+    assert compiled.destinations().dicts() == built.destinations.dicts()
+
+
+def test_recommender_round_trip(built, compiled):
+    index = compiled.recommender_index()
+    assert (index.matrix != built.index.matrix).nnz == 0
+    np.testing.assert_array_equal(index.filters.months, built.index.filters.months)
+    for query in QUERIES:
+        assert recommend_local(index, *query) == recommend_local(built.index, *query)
+
+
+@pytest.mark.parametrize('mode', ['exact', 'ann'])
+def test_dream_index_round_trip(built, compiled, mode):
+    index = compiled.dream_index(mode)
+    built.dream_index.use_ann = mode == 'ann'
+    for dream in DREAMS:
+        assert index.match(dream, k=5) == built.dream_index.match(dream, k=5)
+
+
+def test_catalog_round_trip(built, compiled):
+    catalog, expected = compiled.catalog().full, built.catalog.full
+    assert catalog.etag == expected.etag
+    assert bytes(catalog.identity) == bytes(expected.identity)
+    assert bytes(catalog.gzip) == bytes(expected.gzip)
+
+
+def test_compile_points_current_at_the_new_version_and_prunes(tmp_path):
+    root = str(tmp_path)
+    for stale in ('old-1', 'old-2', 'old-3'):
+        os.makedirs(os.path.join(root, stale))
+    target = compile_snapshot(root, mode='exact', keep=2)
+
+    with open(os.path.join(root, CURRENT)) as f:
+        assert os.path.join(root, f.read().strip()) == target
+    assert len([e for e in os.scandir(root) if e.is_dir()]) == 2
+    assert CompiledSnapshot.current(root).path == target
+    assert compile_snapshot(root, mode='exact', keep=2) == target  # Already compiled: reused
+
+    snapshot = load_compiled(root)
+    assert snapshot.source == target
+    assert load_compiled(root, previous=snapshot) is snapshot
+
+
+def test_rejects_an_unknown_format(compiled, monkeypatch):
+    monkeypatch.setattr(compiled_snapshot, 'FORMAT', compiled_snapshot.FORMAT + 1)
+    with pytest.raises(ValueError, match='Unsupported compiled snapshot format'):
+        CompiledSnapshot(compiled.path)
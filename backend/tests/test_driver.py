@@ -0,0 +1,18 @@
+import pytest
+
+from loadtest.driver import percentile
+
+
+@pytest.mark.parametrize('pct, expected', [(0, 1), (10, 1), (11, 2), (50, 5), (90, 9), (95, 10), (99, 10), (100, 10)])
+def test_percentile_is_nearest_rank(pct, expected):
+    assert percentile(list(range(1, 11)), pct) == expected
+
+
+def test_percentile_no_float_overshoot():
+    # 0.07 * 100 == 7.000000000000001, which must not round up to rank 8
+    assert percentile(list(range(1, 101)), 7) == 7
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+def test_percentile_empty():
+    assert percentile([], 95) == 0.0
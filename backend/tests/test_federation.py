@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.utils.federation import FederatedSearch, PlaceMerger, Provider
+
+
+def place(name, lat=None, lon=None, **fields):
+    return {'name': name, 'country': 'India', 'latitude': lat, 'longitude': lon, **fields}
+
+
+TAJ = place('Taj Mahal', 27.1751, 78.0421, image='')
+TAJ_AGAIN = place('The Taj-Mahal', 27.1753, 78.0420, image='taj.jpg')
+FORT = place('Agra Fort', 27.1795, 78.0211)
+GATE = place('India Gate', 28.6129, 77.2295)
+
+
+def provider(name, places, deadline=1.0, breaker=None, hang_after=None, fail=False):
+    """A provider yielding ``places``, then hanging (past any deadline) if ``hang_after`` is set"""
+
+    async def fetch():
+        if fail:
+            raise RuntimeError(f'{name} down')
+        if hang_after is not None:
+            await asyncio.sleep(10)
+        return []
+
+    async def places_iter(budget, weather, activities, limit):
+        for item in places:
+            await asyncio.sleep(0)
+            yield dict(item)
+        # The upstream call behind the first page, through the provider's breaker
+        for item in await (breaker.call_async('query', fetch) if breaker else fetch()):
+            yield item
+
+    return Provider(name, places_iter, lambda: True, deadline)
+
+
+def search(providers, limit=10):
+    return asyncio.run(FederatedSearch(providers).search(None, [], [], limit=limit))
+
+
+def stream(providers, limit=10):
+    async def collect():
+        return [p async for p in FederatedSearch(providers).stream(None, [], [], limit=limit)]
+    return asyncio.run(collect())
+
+
+def names(places):
+    return [p['name'] for p in places]
+
+
+def test_merges_duplicates_across_providers_in_priority_order():
+    results = search([provider('a', [TAJ, FORT]), provider('b', [TAJ_AGAIN, GATE])])
+    assert names(results) == ['Taj Mahal', 'Agra Fort', 'India Gate']
+    # The duplicate filled in what the first copy was missing
+    assert results[0]['image'] == 'taj.jpg'
+
+
+def test_slow_provider_keeps_what_it_delivered_before_its_deadline():
+    results = search([provider('fast', [TAJ]), provider('slow', [GATE], deadline=0.05, hang_after=1)])
+    assert names(results) == ['Taj Mahal', 'India Gate']
+
+
+def test_failing_provider_does_not_sink_the_search():
+    assert names(search([provider('down', [], fail=True), provider('up', [FORT])])) == ['Agra Fort']
+
+
+def test_deadline_does_not_wedge_a_half_open_breaker():
+    breaker = CircuitBreaker('slow', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == HALF_OPEN
+
+    # The half-open probe is cut off by the federation deadline...
+    assert names(search([provider('slow', [GATE], deadline=0.05, breaker=breaker, hang_after=0)])) == ['India Gate']
+    # ...which is no verdict: the next query may probe again, and its success closes the circuit
+    assert breaker.state == HALF_OPEN
+    search([provider('slow', [], breaker=breaker)])
+    assert breaker.state == CLOSED
+
+
+def test_open_breaker_skips_the_provider():
+    breaker = CircuitBreaker('down', failure_threshold=1, reset_timeout=60)
+    search([provider('down', [], breaker=breaker, fail=True)])
+    assert breaker.state == OPEN
+    results = search([provider('down', [TAJ], breaker=breaker, fail=True), provider('up', [FORT])])
+    assert names(results) == ['Taj Mahal', 'Agra Fort']
+    assert breaker.snapshot()['negative_hits'] == 1
+
+
+def test_stream_deduplicates_and_stops_at_limit():
+    results = stream([provider('a', [TAJ, FORT]), provider('b', [TAJ_AGAIN, GATE])])
+    assert sorted(names(results)) == ['Agra Fort', 'India Gate', 'Taj Mahal']
+    assert len(stream([provider('a', [TAJ, FORT, GATE]), provider('slow', [], hang_after=0)], limit=2)) == 2
+
+
+@pytest.mark.parametrize('a, b, same', [
+    (TAJ, TAJ_AGAIN, True),
+    (place('Red Fort', 28.6562, 77.2410), place('Fort', 28.6562, 77.2410), False),  # Too short to contain
+    (place('Red Fort', 28.6562, 77.2410), place('Red Fort Delhi', 28.6563, 77.2411), True),
+    (place('Taj Mahal', 27.1751, 78.0421), place('Taj Mahal', 27.19, 78.0421), False),  # ~1.7 km apart
+    (place('Goa'), place('Goa'), True),
+    (place('Goa'), place('Goa', country='Portugal'), False),
+    (place('Goa'), place('Goa', 15.3, 74.1), False),
+])
+def test_place_merger(a, b, same):
+    merger = PlaceMerger(radius_m=250)
+    assert merger.add(dict(a))
+    assert merger.add(dict(b)) is not same
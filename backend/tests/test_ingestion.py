@@ -0,0 +1,157 @@
+import asyncio
+import csv
+import json
+
+import httpx
+import pytest
+
+from app.utils import ingestion
+from app.utils.ingestion import Crawler, IngestStore, export_catalog, grid, quarters, tile_key
+from app.utils.opentripmap_client import OpenTripMapClient
+from app.utils.prefilter import StructuredIndex
+
+BOX = (74.0, 14.0, 76.0, 16.0)
+
+# xid -> (lon, lat, name); four places crowd the south-west quarter of the first tile
+PLACES = {
+    'N1': (74.1, 14.1, 'Palolem Beach'),
+    'N2': (74.2, 14.2, 'Agonda Beach'),
+    'N3': (74.3, 14.3, 'Cabo de Rama Fort'),
+    'N4': (74.4, 14.4, ''),  # Unnamed: listed, but not a destination
+    'N5': (74.9, 14.9, 'Butterfly Beach'),
+    'N6': (75.5, 15.5, 'Dudhsagar Falls'),
+    'GONE': (75.2, 14.2, 'Closed Museum'),  # Listed, but /xid answers 404
+    'FLAKY': (74.6, 15.6, 'Chapora Fort'),  # /xid answers 503 once
+}
+
+
+def status_error(status: int, url: str) -> httpx.HTTPStatusError:
+    request = httpx.Request('GET', url)
+    return httpx.HTTPStatusError(str(status), request=request, response=httpx.Response(status, request=request))
+
+
+class FakeOpenTripMap:
+    """Stands in for the async client: /bbox and /xid over PLACES, counting requests"""
+
+    def __init__(self):
+        self.base = OpenTripMapClient()
+        self.base.base_url, self.base.api_key = 'https://otm.test', 'key'
+        self.requests = []
+        self.flaky_left = 1
+
+    async def _request_json(self, url, params, timeout):
+        path = url[len(self.base.base_url):]
+        self.requests.append(path)
+        if path == '/bbox':
+            features = [
+                {'properties': {'xid': xid}} for xid, (lon, lat, _) in PLACES.items()
+                if params['lon_min'] <= lon < params['lon_max'] and params['lat_min'] <= lat < params['lat_max']
+            ]
+            return {'features': features[:params['limit']]}
+        xid = path.rsplit('/', 1)[1]
+        if xid == 'GONE':
+            raise status_error(404, url)
+        if xid == 'FLAKY' and self.flaky_left:
+            self.flaky_left -= 1
+            raise status_error(503, url)
+        lon, lat, name = PLACES[xid]
+        return {'xid': xid, 'name': name, 'point': {'lon': lon, 'lat': lat}, 'kinds': 'beaches,natural'}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Retry backoff (1-8 s) is skipped; the 10 s progress reporter keeps its interval
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        await real_sleep(0 if seconds < 10 else seconds)
+
+    monkeypatch.setattr(ingestion.asyncio, 'sleep', sleep)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = IngestStore(str(tmp_path / 'ingest.sqlite3'))
+    yield store
+    store.close()
+
+
+def crawl(store, fake, **kwargs):
+    crawler = Crawler(store, ['beaches'], box=BOX, tile_deg=1.0, min_tile_deg=0.25, page_size=3, rate=0,
+                      concurrency=4, **kwargs)
+    crawler.client = fake
+    return asyncio.run(crawler.run())
+
+
+def test_grid_and_quarters():
+    assert list(grid((74.0, 14.0, 75.5, 15.0), 1.0)) == [(74.0, 14.0, 75.0, 15.0), (75.0, 14.0, 75.5, 15.0)]
+    assert quarters((74.0, 14.0, 75.0, 15.0)) == [(74.0, 14.0, 74.5, 14.5), (74.5, 14.0, 75.0, 14.5),
+                                                  (74.0, 14.5, 74.5, 15.0), (74.5, 14.5, 75.0, 15.0)]
+    assert tile_key('beaches', (74, 14, 75, 15)) == 'beaches|74.000000,14.000000,75.000000,15.000000'
+
+
+def test_crawl_splits_full_tiles_and_records_every_place(store):
+    counters = crawl(store, FakeOpenTripMap())
+    # The first tile lists 5 places on a page of 3, so it is searched again as quarters;
+    # its south-west quarter still holds 4 and is split down to the minimum tile size
+    assert counters['tiles_split'] == 2
+    assert counters['tiles_searched'] == 4 + 4 + 4
+    assert counters['details_fetched'] == len(PLACES)
+    assert counters['details_failed'] == 0
+
+    names = sorted(d['name'] for d in store.destinations())
+    assert names == sorted(name for xid, (_, _, name) in PLACES.items() if name and xid != 'GONE')
+    places = store.stats(0, 0)['places']
+    assert (places['listed'], places['skipped'], places['pending']) == (len(PLACES), 2, 0)
+
+
+def test_rerun_within_ttl_makes_no_requests(store):
+    crawl(store, FakeOpenTripMap())
+    fake = FakeOpenTripMap()
+    counters = crawl(store, fake)
+    assert fake.requests == []
+    assert counters['tiles_fresh'] == 12 - 2  # Split tiles are followed into their quarters
+
+
+def test_interrupted_details_are_fetched_first_on_the_next_run(store):
+    fake = FakeOpenTripMap()
+    fake.flaky_left = 99  # Fails every retry this run
+    counters = crawl(store, fake)
+    assert counters['details_failed'] == 1
+    assert store.pending(0) == ['FLAKY']
+
+    fake = FakeOpenTripMap()
+    crawl(store, fake)
+    # Only the failed place, retried once after the 503
+    assert [path for path in fake.requests if path.startswith('/xid')] == ['/xid/FLAKY', '/xid/FLAKY']
+    assert store.pending(0) == []
+
+
+def test_crawled_places_leave_unknowns_empty(store):
+    crawl(store, FakeOpenTripMap())
+    destination = next(store.destinations())
+    assert (destination['avg_budget'], destination['best_season']) == ('', [])
+    assert (destination['weather'], destination['travel_with']) == ([], [])
+    # Unknown budget and season pass the hard pre-filters rather than matching by default
+    index = StructuredIndex(list(store.destinations()))
+    assert len(index.candidates(budget='high', season='June')) == index.size
+
+
+def test_export(store, tmp_path):
+    crawl(store, FakeOpenTripMap())
+    out = tmp_path / 'out'
+    count = export_catalog(store, str(out))
+    records = json.loads((out / 'destinations.json').read_text(encoding='utf-8'))
+    with open(out / 'destinations.csv', newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert count == len(records) == len(rows) - 1 == 6
+    assert rows[0] == ['name', 'country', 'description', 'keywords']
+    assert [row[0] for row in rows[1:]] == [record['name'] for record in records]
+    assert all(row[3].startswith('beaches natural ') for row in rows[1:])
+    assert not [p for p in out.iterdir() if p.suffix == '.tmp']
+
+
+def test_export_refuses_to_overwrite_the_hand_written_catalog(store, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingestion, 'DESTINATIONS_FILE', str(tmp_path / 'destinations.json'))
+    with pytest.raises(ValueError):
+        export_catalog(store, str(tmp_path))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from app.utils.prefilter import ALL_MONTHS, StructuredIndex, parse_budget_range, parse_months
+
+
+def months(*names):
+    return sum(1 << ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+                     'jul', 'aug', 'sep', 'oct', 'nov', 'dec'].index(n) for n in names)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Oct-Mar', months('oct', 'nov', 'dec', 'jan', 'feb', 'mar')),
+    ('June', months('jun')),
+    ('Apr to Jun', months('apr', 'may', 'jun')),
+    ('Nov–Feb', months('nov', 'dec', 'jan', 'feb')),
+    ('Mar-May, Sep-Nov', months('mar', 'apr', 'may', 'sep', 'oct', 'nov')),
+    ('Dec and Jan', months('dec', 'jan')),
+    ('winter', months('oct', 'nov', 'dec', 'jan', 'feb')),
+    ('Monsoon', months('jul', 'aug', 'sep')),
+    ('Year-round', ALL_MONTHS),
+    ('any', ALL_MONTHS),
+    ('', 0),
+    (None, 0),
+    ('whenever', 0),
+])
+def test_parse_months(text, expected):
+    assert parse_months(text) == expected
+
+
+def test_parse_budget_range():
+    assert parse_budget_range('₹10,000 - ₹20,000') == (10000.0, 20000.0)
+    assert parse_budget_range('Under ₹5,000') == (5000.0, 5000.0)
+    assert all(np.isnan(parse_budget_range('')))
+
+
+@pytest.fixture
+def index():
+    return StructuredIndex([
+        # 0: cheap winter beach
+        {'avg_budget': '₹5,000 - ₹9,000', 'best_season': ['Nov-Feb'],
+         'weather': ['Warm'], 'travel_with': ['Couple'], 'activities': ['Beach']},
+        # 1: mid-range summer hills
+        {'avg_budget': '₹12,000 - ₹18,000', 'best_season': ['Apr-Jun'],
+         'weather': ['Cold'], 'travel_with': ['Family'], 'activities': ['Trekking']},
+        # 2: expensive, all year
+        {'avg_budget': '₹25,000 - ₹40,000', 'best_season': ['Year-round'],
+         'weather': ['Warm'], 'travel_with': ['Family'], 'activities': ['Beach']},
+        # 3: nothing known (e.g. a crawled place)
+        {'avg_budget': '', 'best_season': [], 'weather': [], 'travel_with': [], 'activities': []},
+    ])
+
+
+def test_candidates_without_constraints_scores_everything(index):
+    assert index.candidates() is None
+    assert index.candidates(weather=['Humid'], group_type='Pets') is None
+
+
+def test_candidates_budget_and_season_are_hard(index):
+    assert index.candidates(budget='low').tolist() == [0, 3]
+    assert index.candidates(budget='high').tolist() == [2, 3]
+    assert index.candidates(season='winter').tolist() == [0, 2, 3]
+    assert index.candidates(budget='medium', season='May').tolist() == [1, 3]
+
+
+def test_candidates_soft_terms_narrow_only_when_enough_remain(index):
+    assert index.candidates(weather=['warm'], activities=['beach']).tolist() == [0, 2]
+    assert index.candidates(budget='high', group_type='family').tolist() == [2]
+    # Too few rows left with the soft terms: fall back to the hard constraints
+    assert index.candidates(budget='high', group_type='family', min_candidates=2).tolist() == [2, 3]
+    assert index.candidates(group_type='family', min_candidates=3) is None
+
+
+def test_candidates_within_rows(index):
+    rows = np.array([3, 1, 0], dtype=np.int32)
+    assert index.candidates(rows=rows) is rows
+    assert index.candidates(budget='low', rows=rows).tolist() == [3, 0]
+    assert index.candidates(weather=['cold'], rows=rows).tolist() == [1]
+
+
+def test_from_arrays_round_trip(index):
+    restored = StructuredIndex.from_arrays(index.budget_min, index.budget_max, index.months, index.postings)
+    assert restored.candidates(budget='medium', season='May').tolist() == [1, 3]
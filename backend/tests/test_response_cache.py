@@ -0,0 +1,124 @@
+import pytest
+
+from app.utils import response_cache
+from app.utils.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(clock, monkeypatch):
+    monkeypatch.setattr(response_cache, 'time', clock)
+    cache = ResponseCache(':memory:', max_entries=3, max_stale=100)
+    yield cache
+    cache._conn.close()
+
+
+def test_make_key_ignores_param_order_and_secrets():
+    a = ResponseCache.make_key('/bbox', {'lon_min': 1, 'kinds': ' beaches ', 'apikey': 'x'})
+    b = ResponseCache.make_key('/bbox', {'kinds': 'beaches', 'lon_min': 1, 'apikey': 'y', 'rate': None})
+    assert a == b
+    assert 'apikey' not in a
+
+
+def test_fresh_until_ttl(cache, clock):
+    cache.set('k', {'a': 1}, ttl=10)
+    entry = cache.get('k')
+    assert entry.value == {'a': 1}
+    assert not entry.stale
+    assert entry.expires_at == clock.now + 10
+
+    clock.advance(10)
+    assert not cache.get('k').stale
+    assert cache.get('missing') is None
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+
+
+def test_stale_within_max_stale_then_miss(cache, clock):
+    cache.set('k', [1, 2], ttl=10)
+    clock.advance(50)
+    entry = cache.get('k')
+    assert entry.value == [1, 2]
+    assert entry.stale
+
+    clock.advance(61)  # 101s past expiry
+    assert cache.get('k') is None
+    assert cache.stats()['stale_hits'] == 1
+
+
+def test_expired_is_a_miss_without_swr(clock, monkeypatch):
+    monkeypatch.setattr(response_cache, 'time', clock)
+    cache = ResponseCache(':memory:', stale_while_revalidate=False)
+    cache.set('k', 1, ttl=10)
+    clock.advance(11)
+    assert cache.get('k') is None
+
+
+def test_set_refreshes_a_stale_entry(cache, clock):
+    cache.set('k', 'old', ttl=10)
+    clock.advance(20)
+    assert cache.get('k').stale
+    cache.set('k', 'new', ttl=10)
+    entry = cache.get('k')
+    assert (entry.value, entry.stale) == ('new', False)
+
+
+def test_evicts_least_recently_used(cache, clock):
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key, ttl=60)
+        clock.advance(1)
+    cache.get('a')  # 'b' is now the least recently used
+    clock.advance(1)
+    cache.set('d', 'd', ttl=60)
+
+    assert cache.get('b') is None
+    assert [cache.get(key).value for key in ('a', 'c', 'd')] == ['a', 'c', 'd']
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions']) == (3, 1)
+
+
+def test_one_refresh_per_key(cache):
+    assert cache.start_refresh('k')
+    assert not cache.start_refresh('k')
+    assert cache.start_refresh('other')
+    assert cache.stats()['refreshing'] == 2
+
+    cache.finish_refresh('k')
+    assert cache.start_refresh('k')
+
+
+def test_evicts_a_batch_when_full(clock, monkeypatch):
+    monkeypatch.setattr(response_cache, 'time', clock)
+    cache = ResponseCache(':memory:', max_entries=20)
+    for i in range(21):
+        cache.set(f'k{i}', i, ttl=60)
+        clock.advance(1)
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions']) == (18, 3)
+    assert cache.get('k2') is None
+    assert cache.get('k3').value == 3
+
+    for i in range(21, 23):  # Fits in the freed room without another eviction
+        cache.set(f'k{i}', i, ttl=60)
+    assert cache.stats()['evictions'] == 3
+
+
+def test_replacing_a_key_does_not_grow_the_count(cache):
+    for _ in range(10):
+        cache.set('k', 1, ttl=60)
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 1, ttl=60)
+    assert cache.stats()['evictions'] == 0
+
+
+def test_capacity_holds_across_processes_sharing_the_file(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    first = ResponseCache(path, max_entries=100)
+    second = ResponseCache(path, max_entries=100)
+    for i in range(300):
+        (first if i % 2 else second).set(f'k{i}', i, ttl=60)
+    # Each writer only sees the other's inserts when it recounts
+    assert first.stats()['entries'] <= 100 + first._recount_every
+
+    for i in range(first._recount_every):
+        first.set(f'k{i}', i, ttl=60)
+    assert first.stats()['entries'] <= 100
@@ -0,0 +1,105 @@
+import pytest
+
+from app.utils import response_cache, result_cache
+from app.utils.response_cache import ResponseCache
+from app.utils.result_cache import Preferences, ResultCache, canonical_preferences
+
+
+def test_canonical_preferences_normalizes_equivalent_requests():
+    a = canonical_preferences(' Medium ', ['Warm', 'sunny', 'warm'], ['Beach ', 'water  sports'], 'Family', 'Winter')
+    b = canonical_preferences('medium', ['SUNNY', 'Warm'], ['water sports', 'beach', ''], ' family', 'winter ')
+    assert a == b == Preferences(
+        budget='medium',
+        weather=('sunny', 'warm'),
+        activities=('beach', 'water sports'),
+        group_type='family',
+        season='winter',
+    )
+    assert hash(a) == hash(b)
+
+
+def test_canonical_preferences_blanks():
+    assert canonical_preferences(None, None, []) == Preferences('', (), (), None, None)
+    assert canonical_preferences('low', [' '], None, '  ', '') == Preferences('low', (), (), None, None)
+    assert canonical_preferences('low', [], [], 'solo') != canonical_preferences('low', [], [], 'couple')
+
+
+@pytest.fixture
+def cache(clock, monkeypatch):
+    monkeypatch.setattr(result_cache, 'time', clock)
+    monkeypatch.setattr(response_cache, 'time', clock)
+    return ResultCache(max_entries=2, ttl=300, fallback_ttl=15, version='v1')
+
+
+def test_ttl_and_fallback_ttl(cache, clock):
+    key = canonical_preferences('low', ['warm'], ['beach'])
+    cache.set(key, ['live'])
+    cache.set(('fallback',), ['local'], ttl=cache.fallback_ttl)
+    clock.advance(15)
+    assert cache.get(('fallback',)) is None
+    assert cache.get(key) == ['live']
+    clock.advance(285)
+    assert cache.get(key) is None
+
+
+def test_lru_eviction(cache):
+    cache.set(('a',), 1)
+    cache.set(('b',), 2)
+    cache.get(('a',))
+    cache.set(('c',), 3)
+    assert cache.get(('b',)) is None
+    assert (cache.get(('a',)), cache.get(('c',))) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_set_version_invalidates(cache):
+    cache.set(('a',), 1)
+    cache.set_version('v1')
+    assert cache.get(('a',)) == 1
+    cache.set_version('v2')
+    assert cache.get(('a',)) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_shared_tier_keeps_the_fallback_expiry(clock, monkeypatch):
+    monkeypatch.setattr(result_cache, 'time', clock)
+    monkeypatch.setattr(response_cache, 'time', clock)
+    shared = ResponseCache(':memory:', stale_while_revalidate=False)
+    writer = ResultCache(ttl=300, version='v1', shared=shared)
+    reader = ResultCache(ttl=300, version='v1', shared=shared)
+
+    writer.set(('fallback',), ['local'], ttl=15)
+    clock.advance(10)
+    assert reader.get(('fallback',)) == ['local']
+    assert reader.stats()['shared_hits'] == 1
+    clock.advance(6)
+    assert reader.get(('fallback',)) is None
+
+    reader.set_version('v2')
+    writer.set(('a',), 1)
+    assert reader.get(('a',)) is None
+
+
+def test_results_from_an_old_version_are_dropped(cache):
+    key = canonical_preferences('low', [], [])
+    cache.set(key, ['v1 data'], version='v1')
+    assert cache.get(key, 'v1') == ['v1 data']
+
+    # Scored on v1, finished after the reload to v2
+    cache.set_version('v2')
+    cache.set(key, ['v1 data'], version='v1')
+    assert cache.get(key, 'v2') is None
+    assert cache.get(key, 'v1') is None
+    assert cache.stats()['stale_writes'] == 1
+
+    cache.set(key, ['v2 data'], version='v2')
+    assert cache.get(key, 'v2') == ['v2 data']
+
+
+def test_old_version_never_reaches_the_shared_tier(clock, monkeypatch):
+    monkeypatch.setattr(result_cache, 'time', clock)
+    monkeypatch.setattr(response_cache, 'time', clock)
+    shared = ResponseCache(':memory:', stale_while_revalidate=False)
+    reloaded = ResultCache(version='v2', shared=shared)
+    reloaded.set(('a',), ['v1 data'], version='v1')
+    assert shared.stats()['entries'] == 0
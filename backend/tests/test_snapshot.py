@@ -0,0 +1,116 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.result_cache import ResultCache
+from app.utils.snapshot import SnapshotStore
+
+
+def test_publish_swaps_before_on_publish():
+    seen = []
+    store = SnapshotStore(builder=None, on_publish=lambda snapshot: seen.append(store.current is snapshot))
+    store.publish(SimpleNamespace(version='v1'))
+    assert seen == [True]
+
+
+def test_request_straddling_a_reload_does_not_cache_old_data():
+    cache = ResultCache()
+    store = SnapshotStore(builder=None, on_publish=lambda snapshot: cache.set_version(snapshot.version))
+    store.publish(SimpleNamespace(version='v1'))
+
+    snapshot = store.current  # Request starts scoring against v1...
+    store.publish(SimpleNamespace(version='v2'))
+    cache.set(('prefs',), ['from v1'], version=snapshot.version)  # ...and finishes after the reload
+
+    assert cache.get(('prefs',), store.current.version) is None
+
+
+class Builder:
+    """Returns a new snapshot per data version; reuses ``previous`` when the data is unchanged"""
+
+    def __init__(self):
+        self.version = 'v1'
+        self.error = None
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, previous=None):
+        self.gate.wait(5)
+        if self.error:
+            raise self.error
+        if previous is not None and previous.version == self.version:
+            return previous
+        return SimpleNamespace(version=self.version, index=object(), dream_index=object())
+
+
+@pytest.fixture
+def builder():
+    return Builder()
+
+
+@pytest.fixture
+def store(builder, tmp_path):
+    data = tmp_path / 'destinations.json'
+    data.write_text('[]')
+    store = SnapshotStore(builder, watch_paths=(str(data),))
+    store.load()
+    yield store
+    store.stop()
+
+
+def test_reload_swaps_in_a_new_generation(store, builder):
+    held = store.current  # A request in flight keeps its snapshot
+    builder.version = 'v2'
+    assert store.reload()
+    assert store.current.version == 'v2'
+    assert held.version == 'v1'
+    assert store.reloads == 1
+
+
+def test_unchanged_data_keeps_the_snapshot(store):
+    before = store.current
+    assert store.reload()
+    assert store.current is before
+    assert store.reloads == 0
+
+
+def test_failed_reload_keeps_serving_the_old_snapshot(store, builder):
+    before = store.current
+    builder.version, builder.error = 'v2', RuntimeError('bad json')
+    assert store.reload()
+    assert store.current is before
+    assert store.last_error == 'bad json'
+
+    builder.error = None
+    store.reload()
+    assert (store.current.version, store.last_error) == ('v2', None)
+
+
+def test_one_reload_at_a_time(store, builder):
+    builder.gate.clear()
+    builder.version = 'v2'
+    assert store.reload_in_background()
+    assert store.reloading
+    assert not store.reload_in_background()
+    assert not store.reload()
+
+    builder.gate.set()
+    deadline = time.time() + 5
+    while store.reloading and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.current.version == 'v2'
+
+
+def test_watcher_reloads_when_a_file_changes(store, builder):
+    store.watch(0.01)
+    builder.version = 'v2'
+    path = store.watch_paths[0]
+    with open(path, 'w') as f:
+        f.write('[{}]')  # New size, so the signature changes even within one mtime tick
+
+    deadline = time.time() + 5
+    while store.current.version != 'v2' and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.current.version == 'v2'
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.utils.columnar import DestinationStore
+from app.utils.places import haversine_m
+from app.utils.spatial import SpatialIndex
+
+
+@pytest.fixture(scope='module')
+def points():
+    rng = np.random.default_rng(7)
+    lat = rng.uniform(-89, 89, 3000)
+    lon = rng.uniform(-180, 180, 3000)
+    # Rows the index must skip: no coordinates, out of range, and the 0,0 placeholder
+    lat[:3], lon[:3] = [np.nan, 95.0, 0.0], [10.0, 10.0, 0.0]
+    return lat, lon
+
+
+@pytest.fixture(scope='module')
+def index(points):
+    return SpatialIndex(*points)
+
+
+def brute_force_km(points, lat, lon):
+    """Distance to every point; the three invalid rows are infinitely far"""
+    return np.array([haversine_m((lat, lon), (a, b)) / 1000 if i >= 3 else np.inf
+                     for i, (a, b) in enumerate(zip(*points))])
+
+
+def test_skips_rows_without_valid_coordinates(index, points):
+    assert len(index) == len(points[0]) - 3
+    assert not set(index.rows) & {0, 1, 2}
+
+
+@pytest.mark.parametrize('lat, lon', [(28.6, 77.2), (89.5, 0.0), (-10.0, 179.9)])
+def test_nearest_matches_brute_force(index, points, lat, lon):
+    expected = brute_force_km(points, lat, lon)
+    rows, km = index.nearest(lat, lon, k=10)
+    assert rows.tolist() == np.argsort(expected)[:10].tolist()
+    np.testing.assert_allclose(km, np.sort(expected)[:10], rtol=1e-6)
+
+
+def test_nearest_within_radius(index, points):
+    expected = brute_force_km(points, 28.6, 77.2)
+    rows, km = index.nearest(28.6, 77.2, k=1000, radius_km=800)
+    assert sorted(rows.tolist()) == sorted(np.flatnonzero(expected <= 800).tolist())
+    assert (np.diff(km) >= 0).all()
+
+
+@pytest.mark.parametrize('box', [
+    (8.0, 68.0, 37.0, 97.0),      # India
+    (-20.0, 170.0, 20.0, -170.0),  # Across the antimeridian
+    (60.0, -180.0, 90.0, 180.0),  # Polar cap
+])
+def test_bbox_matches_brute_force(index, points, box):
+    lat_min, lon_min, lat_max, lon_max = box
+    lat, lon = points
+    width = (lon_max - lon_min) % 360 or 360.0
+    with np.errstate(invalid='ignore'):
+        inside = (lat >= lat_min) & (lat <= lat_max) & ((lon - lon_min) % 360 <= width)
+    inside[:3] = False
+    rows, _ = index.in_bbox(*box, limit=10_000)
+    assert sorted(rows.tolist()) == np.flatnonzero(inside).tolist()
+
+    limited, km = index.in_bbox(*box, limit=5)
+    assert len(limited) == min(5, inside.sum())
+    assert set(limited.tolist()) <= set(rows.tolist())
+    assert (np.diff(km) >= 0).all()
+
+
+def test_empty_and_degenerate_queries():
+    empty = SpatialIndex([], [])
+    assert len(empty.nearest(0, 0, k=5)[0]) == 0
+    assert len(empty.in_bbox(0, 0, 1, 1, limit=5)[0]) == 0
+    index = SpatialIndex([10.0], [20.0])
+    assert len(index.nearest(10, 20, k=0)[0]) == 0
+    assert len(index.in_bbox(5, 5, 1, 1, limit=5)[0]) == 0
+
+
+def test_from_store():
+    store = DestinationStore([{'latitude': 12.0, 'longitude': 77.0}, {'name': 'no coords'}, {'latitude': '13', 'longitude': '80'}])
+    assert SpatialIndex.from_store(store).rows.tolist() == [0, 2]
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+
+from app.utils.token_manager import FileTokenStore, Token, TokenManager
+
+
+class Fetcher:
+    """Counts token fetches; each one is slow enough for callers to pile up"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            return f'token-{self.calls}', 3600
+
+    def __call__(self):
+        time.sleep(self.delay)
+        return self._next()
+
+    async def fetch_async(self):
+        await asyncio.sleep(self.delay)
+        return self._next()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileTokenStore(str(tmp_path / 'token.json'))
+
+
+def test_file_store_round_trip(store):
+    assert store.load() is None
+    store.save(Token('abc', 123.5))
+    assert store.load() == Token('abc', 123.5)
+    with store.lock():
+        pass
+
+
+def test_concurrent_callers_share_one_fetch():
+    fetch = Fetcher()
+    manager = TokenManager(fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['token-1'] * 8
+    assert fetch.calls == 1
+
+
+def test_workers_reuse_the_stored_token(store):
+    fetch = Fetcher(delay=0)
+    first = TokenManager(fetch, store=store)
+    second = TokenManager(fetch, store=FileTokenStore(store.path))
+    assert first.get_token() == 'token-1'
+    assert second.get_token() == 'token-1'
+    assert fetch.calls == 1
+
+
+def test_invalidated_token_is_not_reused_from_the_store(store):
+    fetch = Fetcher(delay=0)
+    manager = TokenManager(fetch, store=store)
+    assert manager.get_token() == 'token-1'
+    manager.invalidate()
+    assert manager.get_token() == 'token-2'
+    assert store.load().value == 'token-2'
+
+
+def test_async_callers_share_one_fetch(store):
+    fetch = Fetcher()
+
+    async def scenario():
+        # Two workers (managers) sharing the store, several requests in each
+        workers = [TokenManager(None, store=store), TokenManager(None, store=FileTokenStore(store.path))]
+        return await asyncio.gather(*(
+            worker.get_token_async(fetch.fetch_async) for worker in workers for _ in range(5)
+        ))
+
+    assert asyncio.run(scenario()) == ['token-1'] * 10
+    assert fetch.calls == 1
+
+
+def test_async_refresh_inside_margin_serves_the_old_token(store):
+    fetch = Fetcher(delay=0)
+
+    async def scenario():
+        manager = TokenManager(None, store=store, refresh_margin=60)
+        manager._token = Token('old', time.time() + 30)
+        served = await manager.get_token_async(fetch.fetch_async)
+        await manager._async_refresh
+        return served, manager._token.value
+
+    assert asyncio.run(scenario()) == ('old', 'token-1')
+
+
+def test_failed_background_refresh_is_logged(caplog):
+    async def fetch_async():
+        raise RuntimeError('auth down')
+
+    async def scenario():
+        manager = TokenManager(fetch=None, refresh_margin=60, name='test token')
+        manager._token = Token('old', time.time() + 30)  # Usable, inside the refresh margin
+        assert await manager.get_token_async(fetch_async) == 'old'
+        task = manager._async_refresh
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return manager, task
+
+    with caplog.at_level(logging.WARNING, logger='app.utils.token_manager'):
+        manager, task = asyncio.run(scenario())
+
+    assert task.done()
+    assert manager._async_refresh is None
+    assert 'Error refreshing test token: auth down' in caplog.text